@@ -27,6 +27,7 @@ class ReadPayloadBLE(gr.sync_block):
         self.pending_tag = None  # Store the tag for processing when buffer is filled
 
         self.lfsr = None
+        self.whitening_cycles = {}  # Whitening keystream periods, per (LFSR seed, polynomial)
 
     def work(self, input_items, output_items):
         in_data = input_items[0]  # Input stream
@@ -124,29 +125,40 @@ class ReadPayloadBLE(gr.sync_block):
         # Input data must be LSB first (0x7C = 124 must be formatted as 0011 1110)
         # LFSR default value is 0x01 as it is the default value in the nRF DATAWHITEIV register
         # The polynomial default value is 0x11 = 0b001_0001 -> x⁷ + x⁴ + 1 (x⁷ is omitted)
-        output = np.empty_like(data)  # Initialise output array
-
-        for idx, byte, in enumerate(data):
-            whitened_byte = 0
-            for bit_pos in range(8):
-                # XOR the current data bit with LFSR MSB
-                lfsr_msb = (lfsr & 0x40) >> 6  # LFSR is 7-bit, so MSB is at position 6
-                data_bit = (byte >> bit_pos) & 1  # Extract current bit
-                whitened_bit = data_bit ^ lfsr_msb  # XOR
-                
-                # Update the whitened byte
-                whitened_byte |= (whitened_bit << (bit_pos))
-
-                # Update LFSR
-                if lfsr_msb:  # If MSB is 1 (before shifting), apply feedback
-                    lfsr = (lfsr << 1) ^ polynomial  # XOR with predefined polynomial
-                else:
-                    lfsr <<= 1
-                lfsr &= 0x7F  # 0x7F mask to keep ksfr within 7 bits
-
-            output[idx] = whitened_byte
+        keystream, states = self.whitening_keystream(lfsr, polynomial)
+        output = np.bitwise_xor(data, np.resize(keystream, len(data))).astype(np.uint8)
 
         return output
+
+    def whitening_keystream(self, lfsr=0x01, polynomial=0x11):
+        # x⁷ + x⁴ + 1 repeats every 127 bits, so the keystream repeats every 127 bytes
+        # Run the LFSR once per (seed, polynomial) and store one period of keystream bytes and LFSR states
+        key = (int(lfsr), int(polynomial))
+        if key not in self.whitening_cycles:
+            keystream = np.empty(127, dtype=np.uint8)
+            states = np.empty(127, dtype=np.uint8)
+            lfsr = key[0]
+
+            for idx in range(127):
+                key_byte = 0
+                for bit_pos in range(8):
+                    # The data bit is XORed with the LFSR MSB
+                    lfsr_msb = (lfsr & 0x40) >> 6  # LFSR is 7-bit, so MSB is at position 6
+                    key_byte |= (lfsr_msb << bit_pos)
+
+                    # Update LFSR
+                    if lfsr_msb:  # If MSB is 1 (before shifting), apply feedback
+                        lfsr = (lfsr << 1) ^ polynomial  # XOR with predefined polynomial
+                    else:
+                        lfsr <<= 1
+                    lfsr &= 0x7F  # 0x7F mask to keep ksfr within 7 bits
+
+                keystream[idx] = key_byte
+                states[idx] = lfsr
+
+            self.whitening_cycles[key] = (keystream, states)
+
+        return self.whitening_cycles[key]
     
     def compute_CRC(self, data, crc_init=0x00FFFF, crc_poly=0x00065B, crc_size=3):
         crc_mask = (1 << (crc_size * 8)) - 1  # Mask to n-byte width (0xFFFF for crc_size = 2)
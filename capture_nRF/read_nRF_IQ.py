@@ -2,7 +2,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 
 # Load complex binary file
-data = np.fromfile("data/nrf_IQ.dat", dtype=np.complex64)
+data = np.memmap("data/nrf_IQ.dat", dtype=np.complex64, mode="r")  # Only the sliced window is read
 
 start_index = 15
 end_index = 65
@@ -0,0 +1,116 @@
+import functools
+import os
+import numpy as np
+import scipy
+from concurrent.futures import ProcessPoolExecutor
+
+from receiver import Receiver, ReceiverBLE, Receiver802154, ReceiverType
+from stage_timing import stage
+
+_receiver_classes: dict[str, type[Receiver]] = {"BLE": ReceiverBLE, "IEEE802154": Receiver802154}
+
+
+# Low-pass prototype of the polyphase filterbank channeliser: cutoff at half the channel spacing. Cached.
+@functools.lru_cache
+def pfb_prototype_taps(num_channels: int, taps_per_arm: int = 12) -> np.ndarray:
+    """
+    Low-pass prototype of the polyphase filterbank channeliser: cutoff at half the channel spacing (fs / num_channels),
+    num_channels · taps_per_arm taps (taps_per_arm per polyphase arm), unity gain. Cached and read-only.
+    """
+    taps = scipy.signal.firwin(num_channels * taps_per_arm, 1 / num_channels, window="hamming")
+    taps.flags.writeable = False
+    return taps
+
+
+# Split a wideband capture into num_channels baseband channels with one polyphase filterbank (PFB) pass.
+def pfb_channelise(
+    iq_samples: np.ndarray, num_channels: int, taps_per_arm: int = 12, oversampling: int = 2
+) -> np.ndarray:
+    """
+    Split a wideband capture into num_channels baseband channels with one polyphase filterbank (PFB) pass.
+    Channel k is centred at k·fs / num_channels (channels above num_channels / 2 are the negative frequencies), and
+    is sampled at oversampling·fs / num_channels, so that the channel edges do not alias. Returns an array of shape
+    (channels, samples).
+
+    Same output as mixing every channel to DC, low-pass filtering with pfb_prototype_taps() and decimating, but the
+    filtering is shared: each arm of the prototype filters one phase of the input at the output rate, and one inverse
+    FFT across the arms per output sample gives all the channels.
+    """
+    if num_channels % oversampling:
+        raise ValueError(f"The number of channels ({num_channels}) must be a multiple of oversampling ({oversampling})")
+    decimation = num_channels // oversampling
+    taps = pfb_prototype_taps(num_channels, taps_per_arm)
+    num_outputs = -(-len(iq_samples) // decimation)
+
+    # Input phases: row r holds the samples nD - r (zeros before the first sample), shape (channels, outputs)
+    padded = np.pad(iq_samples, (num_channels - 1, num_outputs * decimation - len(iq_samples)))
+    phases = np.lib.stride_tricks.sliding_window_view(padded, num_channels)[::decimation][:num_outputs, ::-1].T
+
+    # Arm r holds taps r, r + M, r + 2M... and is applied to its phase with a lag of `oversampling` outputs per tap
+    arms = taps.reshape(taps_per_arm, num_channels).T
+    filtered = np.zeros(phases.shape, dtype=np.result_type(iq_samples, taps))
+    for p in range(min(taps_per_arm, -(-num_outputs // oversampling))):
+        lag = p * oversampling
+        filtered[:, lag:] += arms[:, p, np.newaxis] * phases[:, : num_outputs - lag]
+
+    # All the channels from one inverse FFT across the arms, then the mixing phase of each output sample
+    channels = num_channels * np.fft.ifft(filtered, axis=0)
+    k, n = np.arange(num_channels)[:, np.newaxis], np.arange(num_outputs)[np.newaxis, :]
+    return channels * np.exp(-2j * np.pi * ((k * n) % oversampling) / oversampling)
+
+
+# Decode several channels of a wideband capture: one channeliser pass, then each channel on its receiver in parallel.
+def channelise_to_packets(
+    iq_samples: np.ndarray,
+    fs: float,
+    channel_spacing: float,
+    channels: dict[float, ReceiverType],  # Channel centre (Hz, relative to the capture centre) -> protocol
+    *,
+    taps_per_arm: int = 12,
+    oversampling: int = 2,
+    max_workers: int | None = None,  # Defaults to the number of CPUs (channels are decoded in-process if 1)
+    **kwargs,  # Passed to demodulate_to_packet()
+) -> dict[float, list[dict]]:
+    """
+    Decode several channels of a wideband capture: one channeliser pass, then each channel on its receiver in parallel.
+    The channel centres must lie on a grid of channel_spacing, possibly offset from DC (e.g. BLE channels at ±1 MHz
+    with a 2 MHz spacing): the capture is then shifted once before the channeliser. Each receiver runs at
+    oversampling·channel_spacing samples/s. Returns the packets of every channel, keyed as in `channels`.
+    """
+    num_channels = int(round(fs / channel_spacing))
+    if not np.isclose(num_channels * channel_spacing, fs):
+        raise ValueError(f"The sampling rate ({fs:g}) must be an integer multiple of the channel spacing")
+    for receiver_type in channels.values():
+        if receiver_type not in _receiver_classes:
+            raise ValueError(f"Invalid receiver type '{receiver_type}'. Choose from {list(_receiver_classes.keys())}")
+
+    # Grid offset from DC, and channel index of every centre
+    centres = np.array(list(channels), dtype=float)
+    grid_offset = centres[0] % channel_spacing
+    indices = (centres - grid_offset) / channel_spacing
+    if not np.allclose(indices, np.round(indices)) or np.any(np.abs(centres) >= fs / 2):
+        raise ValueError(f"Channel centres must be within ±fs/2 and {channel_spacing:g} Hz apart")
+
+    with stage("channeliser", len(iq_samples)):
+        if grid_offset:
+            iq_samples = iq_samples * np.exp(-2j * np.pi * grid_offset * np.arange(len(iq_samples)) / fs)
+        streams = pfb_channelise(iq_samples, num_channels, taps_per_arm, oversampling)
+
+    channel_fs = oversampling * channel_spacing
+    tasks = [
+        (receiver_type, channel_fs, streams[int(round(index)) % num_channels], kwargs)
+        for receiver_type, index in zip(channels.values(), indices)
+    ]
+    max_workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    if max_workers > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            packets = list(executor.map(_decode_channel, *zip(*tasks)))
+    else:
+        packets = [_decode_channel(*task) for task in tasks]
+
+    return dict(zip(channels, packets))
+
+
+# Decode one channeliser output with a new receiver of the given protocol.
+def _decode_channel(receiver_type: ReceiverType, fs: float, iq_samples: np.ndarray, kwargs: dict) -> list[dict]:
+    return _receiver_classes[receiver_type](fs).demodulate_to_packet(iq_samples, **kwargs)
@@ -1,12 +1,51 @@
 import os
+import dataclasses
+import hashlib
+import json
 import numpy as np
-from sic_simulator import SimulationConfig
+from typing import TYPE_CHECKING, Iterator
+
+if TYPE_CHECKING:  # Annotations only, so that reading IQ files does not import the simulator
+    from sic_simulator import SimulationConfig
 
 
 # Read interleaved float32 values from binary .dat file and convert to complex numbers.
-def read_iq_data(filename: str) -> np.ndarray:
-    iq = np.fromfile(filename, dtype=np.complex64)
-    return iq
+def read_iq_data(filename: str, offset: int = 0, count: int | None = None) -> np.ndarray:
+    """
+    Read interleaved float32 values from binary .dat file and convert to complex numbers.
+    The file is memory-mapped: only the window of `count` samples (all if None) starting at sample `offset` is read,
+    and only when accessed. The returned array is a copy-on-write view, so in-place changes never reach the file.
+    """
+    iq = _map_iq_file(filename)
+    stop = len(iq) if count is None else min(offset + count, len(iq))
+    return iq[offset:stop]
+
+
+# Iterate over a .dat file in windows of `chunk_size` samples, every `step` samples (default: consecutive chunks).
+def iq_chunks(
+    filename: str, chunk_size: int, step: int | None = None, offset: int = 0, count: int | None = None
+) -> Iterator[np.ndarray]:
+    """
+    Iterate over a .dat file in windows of `chunk_size` samples, every `step` samples (default: consecutive chunks).
+    Chunks are zero-copy views of the memory-mapped file (the last one may be shorter), e.g. for
+    Receiver.demodulate_to_packet_stream(). `offset` and `count` restrict the iteration to a window of the file.
+    """
+    step = chunk_size if step is None else step
+    if chunk_size <= 0 or step <= 0:
+        raise ValueError("chunk_size and step must be positive")
+
+    iq = read_iq_data(filename, offset, count)
+    for start in range(0, len(iq), step):
+        yield iq[start : start + chunk_size]
+
+
+# Memory-map a binary .dat file of complex64 samples (copy-on-write, as a plain ndarray view).
+def _map_iq_file(filename: str) -> np.ndarray:
+    # Whole samples only: a trailing partial sample (e.g. a capture cut off mid-write) is ignored, as np.fromfile did
+    num_samples = os.path.getsize(filename) // np.dtype(np.complex64).itemsize
+    if num_samples == 0:
+        return np.array([], dtype=np.complex64)  # np.memmap cannot map an empty file
+    return np.memmap(filename, dtype=np.complex64, mode="c", shape=(num_samples,)).view(np.ndarray)
 
 
 # Formats protocol: if BLE, specify the transmission rate
@@ -23,7 +62,7 @@ def _sic_make_proto_payload_tag(protocol: str, payload_len: int, ble_rate: float
 
 
 # Build a filename to store SIC simulation results.
-def sic_make_filename(cfg: SimulationConfig, num_trials: int) -> str:
+def sic_make_filename(cfg: "SimulationConfig", num_trials: int) -> str:
     """
     Build a filename like:
       802154-30B_BLE1Mbps-200B_20trials.npz
@@ -39,13 +78,16 @@ def sic_make_filename(cfg: SimulationConfig, num_trials: int) -> str:
 
 # Save SIC simulation results in a .npz file (includes input parameters and results).
 def sic_save_simulation(
-    cfg: SimulationConfig,
+    cfg: "SimulationConfig",
     high_power_db: float,
     low_powers_db: np.ndarray,
     snr_lows_db: np.ndarray,
     num_trials: int,
     pdr: np.ndarray,
     folder: str = "../sic_simulations",
+    *,
+    trials: np.ndarray | None = None,  # Shape (Powers, SNRs), trials of every cell if not num_trials (adaptive mode)
+    pdr_interval: np.ndarray | None = None,  # Shape (2, 2, Powers, SNRs), (lower, upper) bounds of every pdr
 ):
     """Save SIC simulation results in a .npz file (includes input parameters and results)."""
     os.makedirs(folder, exist_ok=True)
@@ -53,6 +95,7 @@ def sic_save_simulation(
 
     # Dump numpy arrays + cfg.__dict__
     fullpath = os.path.join(folder, fname)
+    optional_results = {"trials": trials, "pdr_interval": pdr_interval}
     np.savez_compressed(
         fullpath,
         high_power_db=high_power_db,
@@ -61,5 +104,93 @@ def sic_save_simulation(
         num_trials=num_trials,
         pdr=pdr,
         cfg=cfg.__dict__,
+        **{name: value for name, value in optional_results.items() if value is not None},
     )
     print(f"Saved simulation to {fullpath}")
+
+
+# Hash of the SimulationConfig parameters that affect the simulation results (batch_size only affects speed).
+def sic_config_hash(cfg: "SimulationConfig") -> str:
+    """Hash of the SimulationConfig parameters that affect the simulation results (batch_size only affects speed)."""
+    parameters = {field.name: repr(getattr(cfg, field.name)) for field in dataclasses.fields(cfg)}
+    parameters.pop("batch_size")
+    return hashlib.sha256(json.dumps(parameters, sort_keys=True).encode()).hexdigest()[:16]
+
+
+class SICResultsStore:
+    """
+    Incremental on-disk store of SIC Monte Carlo success counts, one file per SimulationConfig (keyed by its hash).
+    Every finished chunk of trials is appended as one JSON line with the (high power, low power, SNR) cell and its
+    success and trial counts, so a crashed sweep keeps all finished chunks. Counts of the same cell are added up:
+    sweeps resume by running only the missing trials of each cell, and can add trials or extend the grid.
+    """
+
+    def __init__(self, cfg: "SimulationConfig", folder: str = "../sic_simulations"):
+        os.makedirs(folder, exist_ok=True)
+        tag = os.path.splitext(sic_make_filename(cfg, 0))[0].removesuffix("_0trials")
+        self.path: str = os.path.join(folder, f"{tag}_{sic_config_hash(cfg)}.jsonl")
+        self._counts: dict[tuple[float, float, float], np.ndarray] = {}  # (successes_high, successes_low, trials)
+
+        if not os.path.exists(self.path):
+            with open(self.path, "w") as file:  # The first line records the configuration
+                file.write(json.dumps({"cfg": {key: repr(value) for key, value in cfg.__dict__.items()}}) + "\n")
+            return
+
+        with open(self.path) as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:  # Line cut by a crash while writing
+                    continue
+                if "cell" in record:
+                    self._accumulate(tuple(record["cell"]), record["counts"])
+
+    # Key of a cell, rounded so that the same grid values always map to the same cell
+    @staticmethod
+    def _cell(high_power_db: float, low_power_db: float, snr_low_db: float) -> tuple[float, float, float]:
+        return tuple(round(float(value), 9) for value in (high_power_db, low_power_db, snr_low_db))
+
+    def _accumulate(self, cell: tuple[float, float, float], counts: list[int]) -> None:
+        self._counts[cell] = self._counts.get(cell, np.zeros(3, dtype=int)) + np.asarray(counts, dtype=int)
+
+    # Stored counts of a cell: (successes_high, successes_low, trials)
+    def counts(self, high_power_db: float, low_power_db: float, snr_low_db: float) -> tuple[int, int, int]:
+        """Stored counts of a cell: (successes_high, successes_low, trials). Zeros if the cell was never simulated."""
+        counts = self._counts.get(self._cell(high_power_db, low_power_db, snr_low_db), np.zeros(3, dtype=int))
+        return tuple(int(count) for count in counts)
+
+    # Add the counts of a chunk of trials to a cell, and append them to the file immediately
+    def add(
+        self,
+        high_power_db: float,
+        low_power_db: float,
+        snr_low_db: float,
+        successes_high: int,
+        successes_low: int,
+        trials: int,
+    ) -> None:
+        """Add the counts of a chunk of trials to a cell, and append them to the file immediately."""
+        cell = self._cell(high_power_db, low_power_db, snr_low_db)
+        counts = [int(successes_high), int(successes_low), int(trials)]
+        with open(self.path, "a") as file:
+            file.write(json.dumps({"cell": cell, "counts": counts}) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        self._accumulate(cell, counts)
+
+    # PDR of a grid of cells from all their stored trials
+    def pdr(
+        self, high_power_db: float, low_powers_db: np.ndarray, snr_lows_db: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        PDR of a grid of cells from all their stored trials.
+        Returns (pdr, trials): pdr of shape (2, Powers, SNRs) as SimulatorSIC.run_monte_carlo(), NaN for cells without
+        trials, and the number of trials of every cell, shape (Powers, SNRs).
+        """
+        counts = np.array(
+            [[self.counts(high_power_db, power, snr) for snr in snr_lows_db] for power in low_powers_db], dtype=int
+        ).reshape(len(low_powers_db), len(snr_lows_db), 3)
+        trials = counts[..., 2]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pdr = np.moveaxis(counts[..., :2], -1, 0) / trials
+        return pdr, trials
@@ -1,30 +1,143 @@
+import functools
+from fractions import Fraction
 import numpy as np
 import scipy
 
 
-# Zero out samples that fall below the amplitude threshold.
-def simple_squelch(iq_samples: np.ndarray, threshold: float = 0.01) -> np.ndarray:
-    """Zero out samples that fall below the amplitude threshold."""
-    return np.where(np.abs(iq_samples) < threshold, 0, iq_samples)
+# Zero out samples whose single-pole IIR power estimate falls below the threshold (GNU Radio Simple Squelch).
+def simple_squelch(iq_samples: np.ndarray, threshold_dB: float = -20, alpha: float = 0.3) -> np.ndarray:
+    """Zero out samples whose single-pole IIR power estimate falls below the threshold (GNU Radio Simple Squelch)."""
+    power = iq_samples.real**2 + iq_samples.imag**2  # Magnitude squared
+    power_estimate = single_pole_iir_filter(power, alpha)  # Starts from zero, as the GNU Radio block
+    return np.where(power_estimate >= 10 ** (threshold_dB / 10), iq_samples, 0).astype(iq_samples.dtype, copy=False)
+
+
+# Active regions of a capture: moving-average power with hysteresis, minimum duration and guard intervals.
+def detect_bursts(
+    iq_samples: np.ndarray,
+    window_len: int,
+    threshold_dB: float = 10,
+    hysteresis_dB: float = 4,
+    min_duration: int = 0,
+    guard: int = 0,
+    noise_floor: float | None = None,
+    align: int = 1,
+) -> np.ndarray:
+    """
+    Active regions of a capture: moving-average power with hysteresis, minimum duration and guard intervals.
+    A burst starts when the power rises `threshold_dB` above the noise floor (10th percentile of the moving-average
+    power if None) and lasts while it stays above `threshold_dB - hysteresis_dB`. Bursts shorter than `min_duration`
+    samples are dropped, the rest are extended by `guard` samples on each side and merged if they overlap.
+    Starts are rounded down to multiples of `align` (e.g. the samples per symbol, so that symbol synchronisation on a
+    burst starts with the same timing phase as on the whole capture).
+    Returns an array of shape (bursts, 2) with the [start, stop) sample indices.
+    """
+    power = iq_samples.real**2 + iq_samples.imag**2
+    power = scipy.ndimage.uniform_filter1d(power, window_len, mode="constant")
+    if noise_floor is None:  # One value per averaging window is enough for the percentile
+        noise_floor = np.percentile(power[::window_len], 10) if len(power) else 0.0
+    noise_floor = max(float(noise_floor), np.finfo(np.float32).tiny)
+
+    # Runs above the lower threshold that reach the upper one (Schmitt trigger)
+    active = power > noise_floor * 10 ** ((threshold_dB - hysteresis_dB) / 10)
+    edges = np.diff(active.astype(np.int8), prepend=0, append=0)
+    starts, stops = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    if len(starts) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    peaks = np.maximum.reduceat(power, starts)  # Samples between runs are below both thresholds
+    keep = (peaks > noise_floor * 10 ** (threshold_dB / 10)) & (stops - starts >= min_duration)
+
+    # Guard intervals, then merge overlapping bursts
+    starts = np.maximum(starts[keep] - guard, 0) // align * align
+    stops = np.minimum(stops[keep] + guard, len(power))
+    if len(starts) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    new_burst = np.concatenate(([True], starts[1:] > np.maximum.accumulate(stops)[:-1]))
+    groups = np.cumsum(new_burst) - 1
+    merged_stops = np.zeros(groups[-1] + 1, dtype=np.int64)
+    np.maximum.at(merged_stops, groups, stops)
+    return np.column_stack((starts[new_burst], merged_stops)).astype(np.int64)
 
 
 # Applies a decimating FIR low-pass filter.
 def decimating_fir_filter(
     data: np.ndarray, decimation: int, gain: float, fs: int, cutoff_freq, transition_width, window="hamming"
 ) -> np.ndarray:
-    """Applies a decimating FIR low-pass filter."""
+    """Applies a decimating FIR low-pass filter (only the retained outputs are computed, see polyphase_decimate())."""
+    taps = low_pass_fir_taps(fs, cutoff_freq, transition_width, gain=gain, window=window)
+    return polyphase_decimate(data, taps, decimation)
+
+
+# Windowed low-pass FIR taps, with the length rule of thumb of decimating_fir_filter(). Cached.
+@functools.lru_cache
+def low_pass_fir_taps(
+    fs: float, cutoff_freq: float, transition_width: float, gain: float = 1.0, window="hamming"
+) -> np.ndarray:
+    """Windowed low-pass FIR taps, with the length rule of thumb of decimating_fir_filter(). Cached and read-only."""
     nyquist = fs / 2
     num_taps = int(4 * nyquist / transition_width)  # Rule of thumb for FIR filter length
     num_taps |= 1  # Ensure odd number of taps
 
-    # Design FIR filter
     taps = scipy.signal.firwin(num_taps, cutoff=cutoff_freq / nyquist, window=window, pass_zero=True)
     taps *= gain  # Apply gain
+    taps.flags.writeable = False
+    return taps
+
+
+# FIR filter and decimate, computing only the retained outputs. Same as lfilter(taps, 1.0, data)[::decimation].
+def polyphase_decimate(data: np.ndarray, taps: np.ndarray, decimation: int) -> np.ndarray:
+    """
+    FIR filter and decimate, computing only the retained outputs. Same as lfilter(taps, 1.0, data)[::decimation].
+    The taps are split into `decimation` polyphase arms (taps p, p + D, p + 2D...), each one filtering one phase of
+    the input at the output rate, so each input sample costs len(taps) / decimation multiplications instead of
+    len(taps). A 2D input (packets, samples) is decimated row by row.
+    """
+    num_samples = data.shape[-1]
+    num_outputs = -(-num_samples // decimation)
+    if num_samples == 0:
+        return np.zeros(data.shape, dtype=np.result_type(data, taps))
+    arm_len = -(-len(taps) // decimation)
+    arms = np.pad(taps, (0, arm_len * decimation - len(taps))).reshape(arm_len, decimation).T  # Shape (D, arm_len)
+
+    # Input phase p holds the samples nD - p (zeros before the first sample), shape (..., D, rows)
+    rows = -(-(num_samples + decimation - 1) // decimation)
+    padding = [(0, 0)] * (data.ndim - 1) + [(decimation - 1, rows * decimation - num_samples - decimation + 1)]
+    phases = np.pad(data, padding).reshape(data.shape[:-1] + (rows, decimation))[..., ::-1]
+    phases = np.ascontiguousarray(np.swapaxes(phases, -1, -2))
 
-    # Filter and decimate
-    filtered = scipy.signal.lfilter(taps, 1.0, data)
-    decimated = filtered[::decimation]  # Downsample
-    return decimated
+    # Tap j of every arm applies to the phases delayed by j outputs: one (D,) @ (D, outputs) product per arm tap
+    output = np.zeros(data.shape[:-1] + (num_outputs,), dtype=np.result_type(data, taps))
+    for j in range(min(arm_len, num_outputs)):
+        output[..., j:] += arms[:, j] @ phases[..., : num_outputs - j]
+    return output
+
+
+# Chunk by chunk polyphase_decimate(): same output as on the whole stream, with constant memory.
+class StreamingPolyphaseDecimator:
+    def __init__(self, taps: np.ndarray, decimation: int):
+        """Chunk by chunk polyphase_decimate(): same output as on the whole stream, with constant memory."""
+        self._taps = taps
+        self._decimation = decimation
+        self._history = None  # Last len(taps) - 1 input samples
+        self._phase = 0  # Position of the next retained output from the start of the next chunk
+
+    # Decimated outputs of the next chunk of samples.
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        history_len = len(self._taps) - 1
+        if self._history is None:
+            self._history = np.zeros(history_len, dtype=samples.dtype)
+        extended = np.concatenate((self._history, samples))
+
+        # Align the first retained output (whose taps reach back into the history) to a multiple of the decimation,
+        # padding with zeros before the history (no retained output reaches back that far)
+        first = self._phase + history_len
+        padding = -first % self._decimation
+        aligned = np.concatenate((np.zeros(padding, dtype=extended.dtype), extended))
+        outputs = polyphase_decimate(aligned, self._taps, self._decimation)[(first + padding) // self._decimation :]
+
+        self._history = extended[len(extended) - history_len :]
+        self._phase += len(outputs) * self._decimation - len(samples)
+        return outputs
 
 
 # Apply FIR filtering (convolution) with the given taps
@@ -41,6 +154,77 @@ def single_pole_iir_filter(x, alpha) -> np.ndarray:
     return scipy.signal.lfilter(b, a, x)
 
 
+# Integer samples per symbol for a sampling rate fs, and the rational factors (up, down) from fs to sps·symbol_rate.
+def integer_sps_resampling(fs: float, symbol_rate: float) -> tuple[int, int, int]:
+    """
+    Integer samples per symbol for a sampling rate fs, and the rational factors (up, down) from fs to sps·symbol_rate.
+    If fs is an integer multiple of symbol_rate, returns (fs / symbol_rate, 1, 1). Otherwise sps is rounded up, so that
+    resampling from fs to sps·symbol_rate (by up / down) does not lose bandwidth,
+    e.g. (6, 15, 13) for 5.2 MHz at 1 MHz.
+    """
+    ratio = fs / symbol_rate
+    if abs(ratio - round(ratio)) < 1e-9 and round(ratio) >= 1:
+        return int(round(ratio)), 1, 1
+    sps = int(np.ceil(ratio))
+    factor = Fraction(int(round(sps * symbol_rate)), int(round(fs)))
+    return sps, factor.numerator, factor.denominator
+
+
+# Polyphase anti-imaging / anti-aliasing low-pass of the rational resamplers (as scipy.signal.resample_poly). Cached.
+@functools.lru_cache
+def rational_resampler_taps(up: int, down: int, gain: float = 1.0) -> np.ndarray:
+    """
+    Low-pass of the rational resamplers, the default design of scipy.signal.resample_poly(): Kaiser window (beta 5),
+    cutoff at the lower of both Nyquist frequencies and 10 taps per polyphase arm. A gain of `up` compensates the
+    zero stuffing (scipy.signal.resample_poly() applies it to the taps it receives). Cached and read-only.
+    """
+    max_rate = max(up, down)
+    taps = scipy.signal.firwin(2 * 10 * max_rate + 1, 1 / max_rate, window=("kaiser", 5.0)) * gain
+    taps.flags.writeable = False
+    return taps
+
+
+# Resample by up / down with the cached polyphase filter bank. Causal, same output as StreamingRationalResampler.
+def rational_resample(data: np.ndarray, up: int, down: int) -> np.ndarray:
+    """
+    Resample by up / down with the cached polyphase filter bank (scipy.signal.upfirdn computes only the retained
+    outputs). Causal: unlike scipy.signal.resample_poly() the filter delay is kept, so that the output is the same as
+    StreamingRationalResampler on the whole stream. Returns ceil(samples·up / down) samples, row by row if 2D.
+    """
+    if up == down == 1:
+        return data
+    num_outputs = -(-data.shape[-1] * up // down)
+    return scipy.signal.upfirdn(rational_resampler_taps(up, down, up), data, up, down, axis=-1)[..., :num_outputs]
+
+
+# Chunk by chunk rational_resample(): same output as on the whole stream, with constant memory.
+class StreamingRationalResampler:
+    def __init__(self, up: int, down: int):
+        """Chunk by chunk rational_resample(): same output as on the whole stream, with constant memory."""
+        self._up, self._down = up, down
+        self._taps = rational_resampler_taps(up, down, up)
+        self._history_len = -(-(len(self._taps) - 1) // up)  # Input samples within the filter span
+        self._history = None
+        self._phase = 0  # Upsampled position of the next output from the start of the next chunk
+
+    # Resampled outputs of the next chunk of samples.
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        if self._history is None:
+            self._history = np.zeros(self._history_len, dtype=samples.dtype)
+        extended = np.concatenate((self._history, samples))
+
+        # Align the next output (upsampled position) to a multiple of down by padding whole input samples before the
+        # history: padding·up ≡ -first (mod down), solvable as up and down are coprime
+        first = self._phase + self._history_len * self._up
+        padding = (-first * pow(self._up, -1, self._down)) % self._down
+        aligned = np.concatenate((np.zeros(padding, dtype=extended.dtype), extended))
+        outputs = rational_resample(aligned, self._up, self._down)[(first + padding * self._up) // self._down :]
+
+        self._history = extended[len(extended) - self._history_len :]
+        self._phase += len(outputs) * self._down - len(samples) * self._up
+        return outputs
+
+
 # Applies a delay to the input data by first applying a fractional delay using an FIR filter,
 # and then applying an integer delay via sample shifting with zero-padding.
 def fractional_delay_fir_filter(
@@ -74,3 +258,73 @@ def fractional_delay_fir_filter(
         delayed_output[integer_delay:] = frac_delayed[: len(frac_delayed) - integer_delay]
 
     return delayed_output
+
+
+# Row by row fractional_delay_fir_filter() of a 2D array (packets, samples), with one delay per row.
+def fractional_delay_fir_filter_batch(
+    data: np.ndarray, delays: np.ndarray, num_taps: int = 21, same_size: bool = True
+) -> np.ndarray:
+    """Row by row fractional_delay_fir_filter() of a 2D array (packets, samples), with one delay per row."""
+    delays = np.asarray(delays, dtype=float)
+    integer_delays = np.floor(delays).astype(int)
+    fractional_delays = delays - integer_delays
+
+    # One set of FIR taps per row, as in fractional_delay_fir_filter()
+    n = np.arange(-num_taps // 2, num_taps // 2)
+    fir_kernels = np.sinc(n[np.newaxis, :] - fractional_delays[:, np.newaxis])
+    fir_kernels /= np.sum(fir_kernels, axis=1, keepdims=True)
+    frac_delayed = scipy.signal.fftconvolve(data, fir_kernels, mode="full", axes=1)
+
+    # Compensate for the intrinsic delay caused by convolution
+    length = data.shape[1] if same_size else data.shape[1] + num_taps // 2
+    frac_delayed = np.roll(frac_delayed, -num_taps // 2, axis=1)[:, :length]
+
+    # Integer delays and pad with zeros
+    source = np.arange(length)[np.newaxis, :] - integer_delays[:, np.newaxis]
+    delayed_output = np.take_along_axis(frac_delayed, np.clip(source, 0, length - 1), axis=1)
+    delayed_output[source < 0] = 0
+    return delayed_output
+
+
+# Polyphase bank of the fractional delay filters used in fractional_delay_fir_filter() (row k delays by k/num_phases).
+@functools.lru_cache
+def fractional_delay_bank(num_taps: int = 21, num_phases: int = 128) -> np.ndarray:
+    """
+    Polyphase bank of the fractional delay filters used in fractional_delay_fir_filter().
+    Row k delays by k/num_phases samples (num_phases + 1 rows, both 0 and 1 included). Cached and read-only.
+    """
+    n = np.arange(-num_taps // 2, num_taps // 2)  # Same taps positions as fractional_delay_fir_filter()
+    bank = np.sinc(n[np.newaxis, :] - np.arange(num_phases + 1)[:, np.newaxis] / num_phases)
+    bank /= np.sum(bank, axis=1, keepdims=True)  # Normalise filter taps, unity gain
+    bank.flags.writeable = False
+    return bank
+
+
+# Delays the input data with the closest arm of the cached fractional delay bank, then the integer delay.
+def polyphase_fractional_delay(
+    data: np.ndarray, delay: float | np.ndarray, num_taps: int = 21, num_phases: int = 128, same_size: bool = True
+) -> np.ndarray:
+    """
+    Delays the input data with the closest arm of the cached fractional delay bank, then the integer delay.
+    Unlike fractional_delay_fir_filter(), same_size=False keeps the whole delayed signal (tail included).
+    A 2D input (packets, samples) is delayed row by row, with one delay per row.
+    """
+    delay = np.asarray(delay, dtype=float)
+    if np.any(delay < 0):
+        raise ValueError("delay must be non-negative")
+
+    integer_delay = np.floor(delay).astype(int)
+    arm = np.round((delay - integer_delay) * num_phases).astype(int)
+    fir_kernel = fractional_delay_bank(num_taps, num_phases)[arm]  # Shape (taps,) or (packets, taps)
+
+    offset = -(-num_taps // 2)  # Intrinsic delay of the filter (taps before the centre one)
+    frac_delayed = scipy.signal.fftconvolve(data, fir_kernel, mode="full", axes=-1)[..., offset:]
+    if same_size:
+        frac_delayed = frac_delayed[..., : data.shape[-1]]
+
+    # Integer delay (per row) and pad with zeros
+    length = data.shape[-1] if same_size else frac_delayed.shape[-1] + int(np.max(integer_delay))
+    source = np.arange(length) - integer_delay[..., np.newaxis]
+    valid = (source >= 0) & (source < frac_delayed.shape[-1])
+    delayed_output = np.take_along_axis(frac_delayed, np.clip(source, 0, frac_delayed.shape[-1] - 1), axis=-1)
+    return np.where(valid, delayed_output, 0)
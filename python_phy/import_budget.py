@@ -0,0 +1,68 @@
+import subprocess
+import sys
+
+import click
+
+# Modules imported by the worker processes and the CLIs: their import must stay at the NumPy/SciPy cost
+BUDGET_MODULES: tuple[str, ...] = (
+    "receiver",
+    "transmitter",
+    "interference_utils",
+    "sic_simulator",
+    "data_io",
+    "channeliser",
+    "sic_sim_monte_carlo",
+    "main_ble",
+    "main_802154",
+)
+
+# Backends that must only be loaded on first use (plotting, GNU Radio reference blocks)
+HEAVY_MODULES: tuple[str, ...] = ("matplotlib", "gnuradio")
+
+# Baseline: what the DSP code needs anyway
+BASELINE_IMPORT: str = "numpy, scipy, scipy.signal"
+
+_MEASURE_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+print(" ".join(sorted({{name.split(".")[0] for name in sys.modules}})))
+"""
+
+
+# Import time (s) of `module` in a fresh interpreter (best of `repeats`), and the top-level packages it loaded
+def measure_import(module: str, repeats: int = 3) -> tuple[float, set[str]]:
+    """Import time (s) of `module` in a fresh interpreter (best of `repeats`), and the top-level packages it loaded."""
+    best, loaded = float("inf"), set()
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", _MEASURE_SCRIPT.format(module=module)], capture_output=True, text=True, check=True
+        ).stdout.splitlines()
+        best, loaded = min(best, float(output[0])), set(output[1].split())
+    return best, loaded
+
+
+@click.command()
+@click.option("--budget", default=0.25, type=float, help="Import time allowed over the NumPy/SciPy baseline (s).")
+@click.option("--repeats", default=3, type=int, help="Fresh interpreters per module, the fastest is kept.")
+def main(budget: float, repeats: int) -> None:
+    """Measure the import time of the worker and CLI modules against the NumPy/SciPy baseline."""
+    baseline, _ = measure_import(BASELINE_IMPORT, repeats)
+    print(f"{'baseline (' + BASELINE_IMPORT + ')':<40}{baseline:>8.3f} s")
+
+    failures = []
+    for module in BUDGET_MODULES:
+        seconds, loaded = measure_import(module, repeats)
+        heavy = sorted(loaded.intersection(HEAVY_MODULES))
+        over_budget = seconds - baseline > budget
+        print(f"{module:<40}{seconds:>8.3f} s  {'OVER BUDGET ' if over_budget else ''}{' '.join(heavy)}")
+        if heavy or over_budget:
+            failures.append(module)
+
+    if failures:
+        raise click.ClickException(f"Import budget exceeded by: {', '.join(failures)}")
+
+
+if __name__ == "__main__":
+    main()
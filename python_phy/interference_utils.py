@@ -1,9 +1,25 @@
+import functools
 import numpy as np
 import scipy
 import concurrent.futures
+import os
+from multiprocessing import shared_memory
+from typing import Literal, get_args
 from demodulation import TEDType
+from filters import polyphase_fractional_delay
 from receiver import DemodulationType, Receiver, ReceiverBLE, Receiver802154, ReceiverType
-from snr_related import add_awgn_signal_present, flat_fader_impl
+from snr_related import add_awgn_signal_present, flat_fader_impl, wilson_interval
+import stage_timing
+
+# Strategies to search for the interference frequency offset and delay
+SearchStrategy = Literal[
+    "BRUTE_FORCE",  # One full correlation per frequency offset
+    "CROSS_AMBIGUITY",  # Delay-Doppler surface from segmented correlations, then exact evaluation around its peak
+    "INTERPOLATED",  # As CROSS_AMBIGUITY on the coarse grid, then parabolic refinement of the frequency (no fine grid)
+]
+
+# Receiver classes of the PDR analyses, by receiver type
+_pdr_receiver_classes: dict[str, type[Receiver]] = {"BLE": ReceiverBLE, "IEEE802154": Receiver802154}
 
 
 # Pads iq_samples_interference with zeros at the beginning (delay_zero_padding)
@@ -40,8 +56,8 @@ def pad_interference(
 def multiply_by_complex_exponential(
     input_signal: np.ndarray, fs: float, freq: float, phase: float = 0, amplitude: float = 1, offset: complex = 0
 ) -> np.ndarray:
-    """Multiply an input complex exponential."""
-    t = np.arange(input_signal.size) / fs
+    """Multiply an input complex exponential (along the last axis, parameters may be arrays broadcasting to it)."""
+    t = np.arange(input_signal.shape[-1]) / fs
     complex_cosine = offset + amplitude * np.exp(1j * (2 * np.pi * freq * t + phase))
 
     return input_signal * complex_cosine
@@ -65,16 +81,30 @@ def subtract_interference_wrapper(
     freq_offsets: list[float] | range,
     amplitude: float = None,
     phase: float = None,
-    samples_shift: int = None,
+    samples_shift: float = None,
     *,
     fine_step: float | None = None,  # Step size (Hz) for the fine search
     fine_window: float | None = None,  # Half-width (Hz) of the window around best coarse frequency
+    search: SearchStrategy = "CROSS_AMBIGUITY",
+    fractional_delay: bool = False,  # Estimate and subtract with a sub-sample delay
     verbose: bool = False,
 ) -> np.ndarray:
-    """Subtract a known interference from an affected packet."""
-    est_frequency, est_amplitude, est_phase, est_samples_shift = find_interference_parameters(
-        affected, interference, freq_offsets, fs, fine_step=fine_step, fine_window=fine_window
-    )
+    """
+    Subtract a known interference from an affected packet.
+    A non-integer samples_shift (given, or estimated with fractional_delay=True) delays the interference through the
+    cached polyphase fractional delay bank before subtraction.
+    """
+    with stage_timing.stage("interference_search", affected.size):
+        est_frequency, est_amplitude, est_phase, est_samples_shift = find_interference_parameters(
+            affected,
+            interference,
+            freq_offsets,
+            fs,
+            fine_step=fine_step,
+            fine_window=fine_window,
+            search=search,
+            fractional_delay=fractional_delay,
+        )
     if verbose:
         print(f"{est_frequency = } [Hz]")
         print(f"{est_amplitude = :.2f} [-]")
@@ -88,13 +118,217 @@ def subtract_interference_wrapper(
         (est_amplitude, est_phase, est_samples_shift),
     )
 
-    # Subtract the interference
-    ready_to_subtract = multiply_by_complex_exponential(
-        interference, fs, freq=est_frequency, phase=phase, amplitude=amplitude
+    # Subtract the interference (fractional part of the delay first, as in find_interference_parameters())
+    with stage_timing.stage("interference_subtraction", affected.size):
+        integer_shift = int(np.floor(samples_shift))
+        if samples_shift != integer_shift:
+            interference = polyphase_fractional_delay(interference, samples_shift - integer_shift, same_size=False)
+        ready_to_subtract = multiply_by_complex_exponential(
+            interference, fs, freq=est_frequency, phase=phase, amplitude=amplitude
+        )
+        ready_to_subtract = pad_interference(affected, ready_to_subtract, integer_shift)
+
+        return affected - ready_to_subtract
+
+
+# Subtract known interferences from a batch of affected packets, 2D inputs of shape (trials, samples).
+def subtract_interference_batch(
+    affected: np.ndarray,
+    interference: np.ndarray,
+    fs: float,
+    freq_offsets: list[float] | range,
+    *,
+    fine_step: float | None = None,  # Step size (Hz) for the fine search
+    fine_window: float | None = None,  # Half-width (Hz) of the window around best coarse frequency
+    search: SearchStrategy = "CROSS_AMBIGUITY",
+    fractional_delay: bool = False,  # Estimate and subtract with a sub-sample delay
+) -> np.ndarray:
+    """
+    Subtract known interferences from a batch of affected packets, 2D inputs of shape (trials, samples).
+    Same result as subtract_interference_wrapper() on each row, with the parameters of all trials estimated together
+    by find_interference_parameters_batch().
+    """
+    with stage_timing.stage("interference_search", affected.size):
+        frequency, amplitude, phase, samples_shift = find_interference_parameters_batch(
+            affected,
+            interference,
+            freq_offsets,
+            fs,
+            fine_step=fine_step,
+            fine_window=fine_window,
+            search=search,
+            fractional_delay=fractional_delay,
+        )
+
+    # Subtract the interferences (fractional part of the delay first, as in subtract_interference_wrapper())
+    with stage_timing.stage("interference_subtraction", affected.size):
+        integer_shift = np.floor(samples_shift).astype(int)
+        if fractional_delay:
+            interference = polyphase_fractional_delay(interference, samples_shift - integer_shift, same_size=False)
+        ready_to_subtract = multiply_by_complex_exponential(
+            interference,
+            fs,
+            freq=frequency[:, np.newaxis],
+            phase=phase[:, np.newaxis],
+            amplitude=amplitude[:, np.newaxis],
+        )
+
+        # Delay each row by its integer shift, cropping or zero padding to the length of the affected packets
+        index = np.arange(affected.shape[-1]) - integer_shift[:, np.newaxis]
+        valid = (index >= 0) & (index < ready_to_subtract.shape[-1])
+        ready_to_subtract = np.where(
+            valid, np.take_along_axis(ready_to_subtract, np.clip(index, 0, ready_to_subtract.shape[-1] - 1), axis=1), 0
+        )
+
+        return affected - ready_to_subtract
+
+
+# Correlation of the affected packet with consecutive segments of the interference, for every non-negative lag.
+def segmented_correlation(affected: np.ndarray, interference: np.ndarray, segment_len: int) -> np.ndarray:
+    """
+    Correlation of the affected packet with consecutive segments of the interference, for every non-negative lag.
+    Returns an array of shape (segments, len(affected)). Summing over axis 0 gives correlation_wrapper() (unnormalised).
+    2D inputs (trials, samples) give shape (trials, segments, samples).
+
+    Overlap-save: the affected packet is split once into short overlapping blocks (a few segments long), and each
+    segment is correlated with the blocks it spans, instead of one full-length FFT pair per segment.
+    """
+    batch_shape = np.broadcast_shapes(affected.shape[:-1], interference.shape[:-1])
+    num_samples, template_len = affected.shape[-1], interference.shape[-1]
+    num_segments = int(np.ceil(template_len / segment_len))
+    segment_starts = np.arange(num_segments) * segment_len
+
+    # Each block of block_len samples gives hop valid lags, and every segment needs the blocks over num_samples lags
+    block_len = scipy.fft.next_fast_len(4 * segment_len)
+    hop = block_len - segment_len + 1
+    blocks_per_segment = (hop - 2 + num_samples) // hop + 1
+    num_blocks = segment_starts[-1] // hop + blocks_per_segment
+
+    padding = (num_blocks - 1) * hop + block_len - num_samples
+    padded = np.pad(affected, [(0, 0)] * (affected.ndim - 1) + [(0, padding)])
+    blocks = np.lib.stride_tricks.sliding_window_view(padded, block_len, axis=-1)[..., ::hop, :][..., :num_blocks, :]
+    blocks_fft = scipy.fft.fft(blocks, axis=-1)
+
+    segments = np.pad(
+        interference, [(0, 0)] * (interference.ndim - 1) + [(0, num_segments * segment_len - template_len)]
+    )
+    segments = segments.reshape(interference.shape[:-1] + (num_segments, segment_len))
+    segments_fft = np.conj(scipy.fft.fft(segments, block_len, axis=-1))
+
+    segment_corr = np.empty(batch_shape + (num_segments, num_samples), dtype=complex)
+    elements = blocks_per_segment * block_len * np.prod(batch_shape, dtype=int)
+    batch = max(1, int(2**18 // elements))  # Segments per FFT (bounded memory)
+    for first in range(0, num_segments, batch):
+        last = min(first + batch, num_segments)
+        first_block, offset = np.divmod(segment_starts[first:last], hop)
+        block_index = first_block[:, np.newaxis] + np.arange(blocks_per_segment)
+        products = blocks_fft[..., block_index, :] * segments_fft[..., first:last, np.newaxis, :]
+        lags = scipy.fft.ifft(products, axis=-1)[..., :hop]
+        lags = lags.reshape(lags.shape[:-2] + (-1,))
+
+        # Lag 0 of segment s is lag segment_starts[s] of the correlation with the segment alone
+        lag_index = offset[:, np.newaxis] + np.arange(num_samples)
+        segment_corr[..., first:last, :] = np.take_along_axis(
+            lags, np.broadcast_to(lag_index, lags.shape[:-1] + (num_samples,)), axis=-1
+        )
+
+    return segment_corr
+
+
+# Delay-Doppler (cross-ambiguity) surface of the affected packet against the interference.
+def cross_ambiguity_surface(
+    affected: np.ndarray, interference: np.ndarray, fs: float, freq_range: tuple[float, float]
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Delay-Doppler (cross-ambiguity) surface of the affected packet against the interference.
+    Returns (freqs, surface): the Doppler bins within freq_range and the correlation magnitude,
+    with shape (len(freqs), len(affected)) and normalised as correlation_wrapper().
+    2D inputs (trials, samples) give a surface of shape (trials, len(freqs), samples).
+
+    The interference is split into segments short enough for the frequency offset to be almost constant within each one
+    (at most a quarter of a cycle). Every segment is correlated once (overlap-save), and a DFT across the segment
+    correlations of each lag then gives the Doppler bins (FFT-of-products, only the bins within freq_range computed).
+    """
+    template_len = interference.shape[-1]
+    max_freq = max(abs(freq_range[0]), abs(freq_range[1]))
+    segment_len = template_len if max_freq == 0 else int(max(1, min(template_len, fs / (4 * max_freq))))
+    segment_corr = segmented_correlation(affected, interference, segment_len)
+
+    # Doppler bins, zero-padded twice across segments (bin spacing of half the inverse template duration)
+    num_bins = scipy.fft.next_fast_len(2 * segment_corr.shape[-2])
+    freqs = scipy.fft.fftfreq(num_bins, d=segment_len / fs)
+    bin_width = fs / (segment_len * num_bins)
+    in_range = (freqs >= freq_range[0] - bin_width) & (freqs <= freq_range[1] + bin_width)
+
+    # DFT matrix of the bins in range (a matrix product is faster than the full FFT across segments for every lag)
+    bins = np.flatnonzero(in_range)
+    dft = np.exp(-1j * 2 * np.pi * np.outer(bins, np.arange(segment_corr.shape[-2])) / num_bins)
+    surface = np.abs(dft @ segment_corr)
+
+    template_energy = np.sum(np.abs(interference) ** 2, axis=-1)[..., np.newaxis, np.newaxis]
+    return freqs[in_range], surface / template_energy
+
+
+# Chirp-z transform (zoom FFT) evaluating z_k = exp(j2π(start + k·step)/fs), cached for repeated searches.
+@functools.lru_cache(maxsize=32)
+def _zoom_fft_plan(num_samples: int, num_freqs: int, step: float, start: float, fs: float) -> scipy.signal.CZT:
+    """Chirp-z transform (zoom FFT) evaluating z_k = exp(j2π(start + k·step)/fs), cached for repeated searches."""
+    return scipy.signal.CZT(
+        num_samples, m=num_freqs, w=np.exp(-1j * 2 * np.pi * step / fs), a=np.exp(1j * 2 * np.pi * start / fs)
     )
-    ready_to_subtract = pad_interference(affected, ready_to_subtract, samples_shift)
 
-    return affected - ready_to_subtract
+
+# Exact correlation (as in correlation_wrapper()) for every frequency hypothesis at a few given lags.
+def correlation_at_lags(
+    affected: np.ndarray, interference: np.ndarray, freq_offsets: np.ndarray, fs: float, lags: np.ndarray
+) -> np.ndarray:
+    """
+    Exact correlation (as in correlation_wrapper()) for every frequency hypothesis at a few given lags.
+    Returns shape (len(freq_offsets), len(lags)). With 2D inputs (trials, samples), freq_offsets and lags can also be
+    given per trial (2D), and the result has shape (trials, freqs, lags).
+    """
+    template_len = interference.shape[-1]
+    pad_width = [(0, 0)] * (affected.ndim - 1) + [(0, template_len)]
+    padded = np.pad(affected, pad_width)
+    windows = np.arange(template_len) + np.asarray(lags)[..., np.newaxis]  # Shape (..., lags, len(interference))
+    if affected.ndim == 1:
+        windows = padded[windows]
+    else:
+        windows = padded[np.arange(len(affected)).reshape((-1,) + (1,) * (windows.ndim - 1)), windows]
+    products = windows * np.conj(interference)[..., np.newaxis, :]
+
+    freq_offsets = np.asarray(freq_offsets, dtype=float)
+    steps = np.diff(freq_offsets, axis=-1)
+    if freq_offsets.shape[-1] > 1 and np.allclose(steps, steps.flat[0]):
+        # Uniform frequency grid: chirp-z transform of the products (zoom FFT), z_k = exp(j2π(f0 + k·step)/fs)
+        start = float(freq_offsets.flat[0])
+        if freq_offsets.ndim > 1:  # Grid starting at a different frequency for each trial: shift it to 0 Hz
+            t = np.arange(template_len) / fs
+            products = products * np.exp(-1j * 2 * np.pi * freq_offsets[..., :1, np.newaxis] * t)
+            start = 0.0
+        plan = _zoom_fft_plan(template_len, freq_offsets.shape[-1], float(steps.flat[0]), start, fs)
+        correlation = np.swapaxes(plan(products, axis=-1), -1, -2)
+    else:
+        t = np.arange(template_len) / fs
+        exponentials = np.exp(-1j * 2 * np.pi * freq_offsets[..., np.newaxis] * t)  # Shape (..., freqs, samples)
+        correlation = exponentials @ np.swapaxes(products, -1, -2)
+
+    return correlation / np.sum(np.abs(interference) ** 2, axis=-1)[..., np.newaxis, np.newaxis]
+
+
+# Offset of the vertex of the parabola through three equally spaced samples, relative to the middle one (in steps).
+def parabolic_peak_offset(
+    y_minus: float | np.ndarray, y_0: float | np.ndarray, y_plus: float | np.ndarray
+) -> float | np.ndarray:
+    """
+    Offset of the vertex of the parabola through three equally spaced samples, relative to the middle one (in steps).
+    Zero where the samples are not a maximum (flat or convex), clipped to ±1 step. Works element-wise on arrays.
+    """
+    denominator = np.asarray(y_minus - 2 * y_0 + y_plus, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        offset = np.where(denominator < 0, 0.5 * (y_minus - y_plus) / denominator, 0.0)
+    offset = np.clip(offset, -1, 1)
+    return float(offset) if offset.ndim == 0 else offset
 
 
 # Estimate best frequency offset, amplitude, phase and sample shift to subtract from affected packet.
@@ -106,23 +340,79 @@ def find_interference_parameters(
     *,
     fine_step: float | None = None,  # Step size (Hz) for the fine search
     fine_window: float | None = None,  # Half-width (Hz) of the window around best coarse frequency
-) -> tuple[float, float, float, int]:
+    search: SearchStrategy = "CROSS_AMBIGUITY",
+    lag_window: int = 2,  # Lags evaluated exactly at each side of the cross-ambiguity peak
+    refine_iterations: int = 2,  # Parabolic refinements of the frequency for search="INTERPOLATED"
+    fractional_delay: bool = False,  # Sub-sample delay from the correlation peak (the sample shift is then a float)
+) -> tuple[float, float, float, int | float]:
     """Estimate best frequency offset, amplitude, phase and sample shift to subtract from affected packet.
 
     If fine_step and fine_window are not None:
       1. Coarse search over freq_offsets
       2. Fine search around the best coarse frequency within ±fine_window at steps of fine_step
+
+    search="BRUTE_FORCE" runs one full correlation per frequency.
+    search="CROSS_AMBIGUITY" locates the peak on a delay-Doppler surface, then evaluates the exact correlation for all
+    frequencies only at the lags around that peak (the fine search reuses these lags).
+    search="INTERPOLATED" replaces the fine search: starting from the best coarse frequency, each iteration fits a
+    parabola to the correlation magnitude at (f - step, f, f + step) and moves to its vertex, dividing the step by 4.
+    Only 3 correlations per iteration are computed, and fine_step and fine_window are not used.
+
+    With fractional_delay=True, a parabola through the correlation magnitude at the best lag and its two neighbours
+    gives the sub-sample delay. Amplitude and phase are then re-estimated against the interference delayed by that
+    fraction (polyphase fractional delay bank), which is what subtract_interference_wrapper() subtracts.
+    """
+    frequency, amplitude, phase, samples_shift = find_interference_parameters_batch(
+        affected[np.newaxis, :],
+        interference[np.newaxis, :],
+        freq_offsets,
+        fs,
+        fine_step=fine_step,
+        fine_window=fine_window,
+        search=search,
+        lag_window=lag_window,
+        refine_iterations=refine_iterations,
+        fractional_delay=fractional_delay,
+    )
+    return float(frequency[0]), float(amplitude[0]), float(phase[0]), samples_shift[0].item()
+
+
+# find_interference_parameters() for a batch of trials, 2D inputs of shape (trials, samples).
+def find_interference_parameters_batch(
+    affected: np.ndarray,
+    interference: np.ndarray,
+    freq_offsets: list[float] | range,
+    fs: float,
+    *,
+    fine_step: float | None = None,  # Step size (Hz) for the fine search
+    fine_window: float | None = None,  # Half-width (Hz) of the window around best coarse frequency
+    search: SearchStrategy = "CROSS_AMBIGUITY",
+    lag_window: int = 2,  # Lags evaluated exactly at each side of the cross-ambiguity peak
+    refine_iterations: int = 2,  # Parabolic refinements of the frequency for search="INTERPOLATED"
+    fractional_delay: bool = False,  # Sub-sample delay from the correlation peak (the sample shift is then a float)
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    find_interference_parameters() for a batch of trials, 2D inputs of shape (trials, samples).
+    Returns one array per parameter (frequency, amplitude, phase, sample shift), each of shape (trials,).
+    The cross-ambiguity surfaces, exact correlations and refinements of all trials are computed together,
+    only search="BRUTE_FORCE" loops over the trials.
     """
+    if search not in get_args(SearchStrategy):
+        raise ValueError(f"Invalid search strategy '{search}'. Choose from {list(get_args(SearchStrategy))}")
 
-    def _single_search(freq_list):
+    trials = np.arange(len(affected))
+    num_samples = affected.shape[-1]
+    freq_offsets = np.asarray(freq_offsets, dtype=float)
+
+    def _single_search(affected_row, interference_row, freq_list):
         best_amp = -np.inf
         best_freq = 0.0
         best_ph = 0.0
         best_idx = 0
 
         for f in freq_list:
-            rotated = multiply_by_complex_exponential(interference, fs=fs, freq=f)
-            corr = correlation_wrapper(affected, rotated)
+            rotated = multiply_by_complex_exponential(interference_row, fs=fs, freq=f)
+            corr = correlation_wrapper(affected_row, rotated)
             abs_corr = np.abs(corr)
             idx = np.argmax(abs_corr)
             amp = abs_corr[idx]
@@ -135,15 +425,59 @@ def find_interference_parameters(
 
         return best_freq, best_amp, best_ph, best_idx
 
-    if fine_step is None or fine_window is None:
-        return _single_search(freq_offsets)
-
-    # Else, do fine search after coarse search
-    coarse_freq, _, _, _ = _single_search(freq_offsets)
-    low = coarse_freq - fine_window
-    high = coarse_freq + fine_window
-    fine_freqs = np.arange(low, high, fine_step)
-    return _single_search(fine_freqs)
+    def _search_at_lags(freq_list, lags):  # freq_list of shape (freqs,) or (trials, freqs), lags (trials, lags)
+        corr = correlation_at_lags(affected, interference, freq_list, fs, lags)
+        idx_freq, idx_lag = np.divmod(np.argmax(np.abs(corr).reshape(len(trials), -1), axis=1), lags.shape[-1])
+        best = corr[trials, idx_freq, idx_lag]
+        freq_list = np.broadcast_to(freq_list, (len(trials), np.shape(freq_list)[-1]))
+        return freq_list[trials, idx_freq], np.abs(best), np.angle(best), lags[trials, idx_lag]
+
+    if search == "BRUTE_FORCE":
+        estimates = []
+        for affected_row, interference_row in zip(affected, interference):
+            estimate = _single_search(affected_row, interference_row, freq_offsets)
+            if fine_step is not None and fine_window is not None:
+                fine_freqs = np.arange(estimate[0] - fine_window, estimate[0] + fine_window, fine_step)
+                estimate = _single_search(affected_row, interference_row, fine_freqs)
+            estimates.append(estimate)
+        frequency, amplitude, phase, samples_shift = (np.array(values) for values in zip(*estimates))
+    else:
+        # Cross-ambiguity search: peak location on the surface, exact values around it
+        _, surface = cross_ambiguity_surface(affected, interference, fs, (np.min(freq_offsets), np.max(freq_offsets)))
+        peak_lags = np.argmax(np.max(surface, axis=-2), axis=-1)
+        lags = np.clip(peak_lags[:, np.newaxis] + np.arange(-lag_window, lag_window + 1), 0, num_samples - 1)
+        frequency, amplitude, phase, samples_shift = _search_at_lags(freq_offsets, lags)
+
+        if search == "INTERPOLATED":
+            step = (
+                float(np.min(np.abs(np.diff(freq_offsets))))
+                if len(freq_offsets) > 1
+                else fs / (4 * interference.shape[-1])
+            )
+            for _ in range(refine_iterations):
+                hypotheses = frequency[:, np.newaxis] + step * np.arange(-1, 2)
+                corr = np.abs(correlation_at_lags(affected, interference, hypotheses, fs, lags))
+                best_lag = np.argmax(corr[:, 1, :], axis=1)
+                frequency = frequency + step * parabolic_peak_offset(*corr[trials, :, best_lag].T)
+                step /= 4
+            frequency, amplitude, phase, samples_shift = _search_at_lags(frequency[:, np.newaxis], lags)
+        elif fine_step is not None and fine_window is not None:
+            fine_freqs = frequency[:, np.newaxis] + np.arange(-fine_window, fine_window, fine_step)
+            frequency, amplitude, phase, samples_shift = _search_at_lags(fine_freqs, lags)
+
+    if not fractional_delay:
+        return frequency, amplitude, phase, samples_shift
+
+    # Sub-sample delay: parabolic interpolation of the correlation magnitude around the best lag
+    neighbours = np.clip(samples_shift[:, np.newaxis] + np.arange(-1, 2), 0, num_samples - 1)
+    corr = np.abs(correlation_at_lags(affected, interference, frequency[:, np.newaxis], fs, neighbours))[:, 0, :]
+    delay = np.maximum(samples_shift + parabolic_peak_offset(*corr.T), 0.0)
+
+    # Amplitude and phase against the fractionally delayed interference, at the integer part of the delay
+    integer_delay = np.floor(delay).astype(int)
+    delayed = polyphase_fractional_delay(interference, delay - integer_delay, same_size=False)
+    best = correlation_at_lags(affected, delayed, frequency[:, np.newaxis], fs, integer_delay[:, np.newaxis])[:, 0, 0]
+    return frequency, np.abs(best), np.angle(best), delay
 
 
 # Compute the Bit Error Rate (BER) for a range of frequency offsets.
@@ -230,54 +564,29 @@ def pdr_vs_snr_analysis_parallel(
     receiver_type: ReceiverType,
     demodulation_type: DemodulationType,
     ted_type: TEDType,
-    noise_realisations: int,
+    noise_realisations: int,  # Realisations per SNR (maximum per SNR if ci_width is given)
+    *,
+    max_workers: int | None = None,  # Defaults to the number of CPUs
+    chunk_size: int | None = None,  # Noise realisations per task, by default about 4 tasks per worker and SNR
+    ci_width: float | None = None,  # Stop an SNR once the PDR confidence interval is at most this wide
+    confidence: float = 0.95,  # Confidence level of the Wilson interval for ci_width
 ) -> dict:
-    """Computes the PDR and its standard deviation over a range of SNR values using concurrent futures."""
-    receiver_classes: dict[str, type] = {"BLE": ReceiverBLE, "IEEE802154": Receiver802154}
-    try:
-        # Create a new receiver for each SNR value in the worker below
-        receiver_factory = receiver_classes[receiver_type]
-    except KeyError:
-        raise ValueError(f"Invalid receiver type '{receiver_type}'. Choose from {list(receiver_classes.keys())}")
-
-    results: dict = {}
-
-    for snr in snr_range:
-        receiver = receiver_factory(fs)
-        delivered_count = 0
-        preamble_loss_count = 0
-        crc_failure_count = 0
-
-        # Use ProcessPoolExecutor for CPU-bound tasks
-        with concurrent.futures.ProcessPoolExecutor() as executor:
-            futures = [
-                executor.submit(
-                    helper_process_noise_realisation,
-                    iq_samples,
-                    snr,
-                    sample_interval,
-                    receiver,
-                    demodulation_type,
-                    ted_type,
-                )
-                for _ in range(noise_realisations)
-            ]
-            for future in concurrent.futures.as_completed(futures):
-                result = future.result()
-                if result == "delivered":
-                    delivered_count += 1
-                elif result == "preamble_loss":
-                    preamble_loss_count += 1
-                elif result == "crc_failure":
-                    crc_failure_count += 1
-
-        results[snr] = {
-            "pdr_ratio": delivered_count / noise_realisations,
-            "preamble_loss_ratio": preamble_loss_count / noise_realisations,
-            "crc_failure_ratio": crc_failure_count / noise_realisations,
-        }
-
-    return results
+    """
+    Computes the PDR and its standard deviation over a range of SNR values using concurrent futures.
+    One worker pool is kept for the whole sweep, and ci_width enables adaptive stopping (see _pdr_vs_snr_sweep()).
+    """
+    return _pdr_vs_snr_sweep(
+        iq_samples,
+        snr_range,
+        fs,
+        receiver_type,
+        noise_realisations,
+        (None, sample_interval, demodulation_type, ted_type),
+        max_workers=max_workers,
+        chunk_size=chunk_size,
+        ci_width=ci_width,
+        confidence=confidence,
+    )
 
 
 # Process one noise realisation: adds noise, demodulates, and categorises the packet result.
@@ -294,7 +603,7 @@ def helper_process_noise_realisation_risian(
     ted_type: TEDType,
 ) -> str:
     """Process one noise realisation: adds noise, demodulates, and categorises the packet result."""
-    
+
     iq_samples_fade = flat_fader_impl(iq_samples, fading_N_sinusoids, fading_fDts, True, rician_K, fading_seed)
     iq_noisy = add_awgn_signal_present(iq_samples_fade, snr_db=snr, sample_interval=sample_interval)
 
@@ -329,55 +638,175 @@ def pdr_vs_snr_analysis_parallel_risian(
     receiver_type: ReceiverType,
     demodulation_type: DemodulationType,
     ted_type: TEDType,
+    noise_realisations: int,  # Realisations per SNR (maximum per SNR if ci_width is given)
+    *,
+    max_workers: int | None = None,  # Defaults to the number of CPUs
+    chunk_size: int | None = None,  # Noise realisations per task, by default about 4 tasks per worker and SNR
+    ci_width: float | None = None,  # Stop an SNR once the PDR confidence interval is at most this wide
+    confidence: float = 0.95,  # Confidence level of the Wilson interval for ci_width
+) -> dict:
+    """
+    Computes the PDR and its standard deviation over a range of SNR values using concurrent futures.
+    One worker pool is kept for the whole sweep, and ci_width enables adaptive stopping (see _pdr_vs_snr_sweep()).
+    """
+    return _pdr_vs_snr_sweep(
+        iq_samples,
+        snr_range,
+        fs,
+        receiver_type,
+        noise_realisations,
+        ((fading_N_sinusoids, fading_fDts, rician_K, fading_seed), sample_interval, demodulation_type, ted_type),
+        max_workers=max_workers,
+        chunk_size=chunk_size,
+        ci_width=ci_width,
+        confidence=confidence,
+    )
+
+
+# Per-process state of the PDR workers, set once by _init_pdr_worker()
+_pdr_worker_state: dict = {}
+
+
+# Initialiser of the PDR worker processes: attaches the shared clean IQ samples and builds the receiver once.
+def _init_pdr_worker(
+    shm_name: str, shape: tuple, dtype: str, receiver_type: ReceiverType, fs: float, timing: bool = False
+) -> None:
+    """
+    Initialiser of the PDR worker processes: attaches the shared clean IQ samples and builds the receiver once.
+    timing enables the stage timing of the worker, as in the parent process.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _pdr_worker_state["shm"] = shm  # Keep the segment mapped for the lifetime of the worker
+    _pdr_worker_state["iq_samples"] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    _pdr_worker_state["receiver"] = _pdr_receiver_classes[receiver_type](fs)
+    np.random.seed()  # Forked workers would otherwise share the parent's noise generator state
+    stage_timing.enable(timing)
+    stage_timing.reset()  # Forked workers would otherwise also report the parent's totals
+
+
+# Process a range of noise realisations at one SNR in a PDR worker. Returns the count of each packet result.
+def _process_noise_realisations_chunk(
+    snr: float,
+    num_realisations: int,
+    fading: tuple | None,  # (N_sinusoids, fDts, rician_K, seed) for Rician fading, None for AWGN only
+    sample_interval: tuple,
+    demodulation_type: DemodulationType,
+    ted_type: TEDType,
+) -> tuple[dict[str, int], dict]:
+    """
+    Process a range of noise realisations at one SNR in a PDR worker.
+    Returns the count of each packet result, and the stage timing totals of the chunk (stage_timing.snapshot()).
+    """
+    iq_samples, receiver = _pdr_worker_state["iq_samples"], _pdr_worker_state["receiver"]
+    counts = {"delivered": 0, "preamble_loss": 0, "crc_failure": 0}
+    for _ in range(num_realisations):
+        if fading is None:
+            result = helper_process_noise_realisation(
+                iq_samples, snr, sample_interval, receiver, demodulation_type, ted_type
+            )
+        else:
+            result = helper_process_noise_realisation_risian(
+                iq_samples, snr, *fading, sample_interval, receiver, demodulation_type, ted_type
+            )
+        counts[result] += 1
+    return counts, stage_timing.snapshot(reset_totals=True)
+
+
+# Runs the noise realisations of every SNR value on one persistent worker pool and returns the PDR results.
+def _pdr_vs_snr_sweep(
+    iq_samples: np.ndarray,
+    snr_range: range,
+    fs: float,
+    receiver_type: ReceiverType,
     noise_realisations: int,
+    task_args: tuple,  # (fading, sample_interval, demodulation_type, ted_type) for _process_noise_realisations_chunk()
+    *,
+    max_workers: int | None = None,
+    chunk_size: int | None = None,
+    ci_width: float | None = None,
+    confidence: float = 0.95,
 ) -> dict:
-    """Computes the PDR and its standard deviation over a range of SNR values using concurrent futures."""
-    receiver_classes: dict[str, type] = {"BLE": ReceiverBLE, "IEEE802154": Receiver802154}
-    try:
-        # Create a new receiver for each SNR value in the worker below
-        receiver_factory = receiver_classes[receiver_type]
-    except KeyError:
-        raise ValueError(f"Invalid receiver type '{receiver_type}'. Choose from {list(receiver_classes.keys())}")
+    """
+    Runs the noise realisations of every SNR value on one persistent worker pool and returns the PDR results.
+    The clean IQ samples are placed in shared memory once and every worker builds its receiver in its initialiser,
+    so tasks only carry the SNR and the number of realisations. Each SNR is split into chunks of realisations.
+    With stage timing enabled (stage_timing.enable()), the totals of the workers are merged into this process.
+
+    With ci_width (adaptive mode), noise_realisations is the maximum per SNR: a new chunk is only submitted while the
+    Wilson interval of the PDR is wider than ci_width. Ratios are relative to the realisations actually run, which are
+    returned with the interval ("realisations" and "pdr_interval").
+    """
+    if receiver_type not in _pdr_receiver_classes:
+        raise ValueError(f"Invalid receiver type '{receiver_type}'. Choose from {list(_pdr_receiver_classes.keys())}")
+
+    max_workers = max_workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, int(np.ceil(noise_realisations / (4 * max_workers))))
+    counts = {snr: {"delivered": 0, "preamble_loss": 0, "crc_failure": 0} for snr in snr_range}
+    realisations = {snr: 0 for snr in snr_range}  # Finished realisations
+    pending = {snr: 0 for snr in snr_range}  # Submitted but unfinished realisations
+
+    # Chunks in flight per SNR: all of them, or in adaptive mode enough to keep every worker busy
+    if ci_width is None:
+        max_chunks = -(-noise_realisations // chunk_size)
+    else:
+        max_chunks = -(-2 * max_workers // max(1, len(counts)))
 
-    results: dict = {}
+    def _next_chunk(snr: float) -> int:
+        if ci_width is not None and realisations[snr] > 0:
+            lower, upper = wilson_interval(counts[snr]["delivered"], realisations[snr], confidence)
+            if upper - lower <= ci_width:
+                return 0
+        return max(0, min(chunk_size, noise_realisations - realisations[snr] - pending[snr]))
 
-    for snr in snr_range:
-        receiver = receiver_factory(fs)
-        delivered_count = 0
-        preamble_loss_count = 0
-        crc_failure_count = 0
-
-        # Use ProcessPoolExecutor for CPU-bound tasks
-        with concurrent.futures.ProcessPoolExecutor() as executor:
-            futures = [
-                executor.submit(
-                    helper_process_noise_realisation_risian,
-                    iq_samples,
+    iq_samples = np.ascontiguousarray(iq_samples)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, iq_samples.nbytes))
+    try:
+        np.ndarray(iq_samples.shape, dtype=iq_samples.dtype, buffer=shm.buf)[...] = iq_samples
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_pdr_worker,
+            initargs=(shm.name, iq_samples.shape, iq_samples.dtype.str, receiver_type, fs, stage_timing.is_enabled()),
+        ) as executor:
+            futures = {}
+
+            def _submit(snr: float, num_realisations: int) -> None:
+                futures[executor.submit(_process_noise_realisations_chunk, snr, num_realisations, *task_args)] = (
                     snr,
-                    fading_N_sinusoids,
-                    fading_fDts,
-                    rician_K,
-                    fading_seed,
-                    sample_interval,
-                    receiver,
-                    demodulation_type,
-                    ted_type,
+                    num_realisations,
                 )
-                for _ in range(noise_realisations)
-            ]
-            for future in concurrent.futures.as_completed(futures):
-                result = future.result()
-                if result == "delivered":
-                    delivered_count += 1
-                elif result == "preamble_loss":
-                    preamble_loss_count += 1
-                elif result == "crc_failure":
-                    crc_failure_count += 1
+                pending[snr] += num_realisations
+
+            for _ in range(max_chunks):
+                for snr in counts:
+                    if num_realisations := _next_chunk(snr):
+                        _submit(snr, num_realisations)
+
+            while futures:
+                done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    snr, num_realisations = futures.pop(future)
+                    chunk_counts, chunk_timing = future.result()
+                    for result, count in chunk_counts.items():
+                        counts[snr][result] += count
+                    stage_timing.merge(chunk_timing)  # Stage timing totals of all workers, in this process
+                    realisations[snr] += num_realisations
+                    pending[snr] -= num_realisations
+                    if num_realisations := _next_chunk(snr):
+                        _submit(snr, num_realisations)
+    finally:
+        shm.close()
+        shm.unlink()
 
+    results: dict = {}
+    for snr, snr_counts in counts.items():
+        num_realisations = max(1, realisations[snr])
         results[snr] = {
-            "pdr_ratio": delivered_count / noise_realisations,
-            "preamble_loss_ratio": preamble_loss_count / noise_realisations,
-            "crc_failure_ratio": crc_failure_count / noise_realisations,
+            "pdr_ratio": snr_counts["delivered"] / num_realisations,
+            "preamble_loss_ratio": snr_counts["preamble_loss"] / num_realisations,
+            "crc_failure_ratio": snr_counts["crc_failure"] / num_realisations,
+            "realisations": realisations[snr],
+            "pdr_interval": tuple(
+                float(bound) for bound in wilson_interval(snr_counts["delivered"], realisations[snr], confidence)
+            ),
         }
-
     return results
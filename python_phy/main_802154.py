@@ -1,15 +1,14 @@
 import click
 import numpy as np
-import matplotlib.pyplot as plt
 
 from data_io import read_iq_data
-from visualisation import subplots_iq_spectrogram_bits, plot_payload
 from receiver import Receiver802154
 
 
 @click.command()
 @click.option("--filename", default="802154_0dBm.dat", type=str, help="The name of the data file to process.")
 @click.option("--fs", default=10e6, type=float, help="Sampling frequency in Hz (default: 10e6).")
+@click.option("--plot/--no-plot", default=True, help="Plot the capture and the first packet (default: plot).")
 @click.option(
     "--crc_included",
     default=True,
@@ -22,7 +21,7 @@ from receiver import Receiver802154
     type=int,
     help="How many bit errors are accepted when detecting the preamble (default: 12).",
 )
-def main(filename: str, fs: float, crc_included: bool, preamble_detection_threshold: int) -> None:
+def main(filename: str, fs: float, plot: bool, crc_included: bool, preamble_detection_threshold: int) -> None:
     """Process IQ data from file."""
 
     # Open file
@@ -38,11 +37,15 @@ def main(filename: str, fs: float, crc_included: bool, preamble_detection_thresh
     # Print results
     print(received_packets)
 
-    # Plot
-    subplots_iq_spectrogram_bits([iq_samples, chip_samples], fs=fs, show=False)
-    if received_packets:
-        plot_payload(received_packets[0])
-    plt.show()
+    # Plot (matplotlib is only imported when plotting)
+    if plot:
+        import matplotlib.pyplot as plt
+        from visualisation import subplots_iq_spectrogram_bits, plot_payload
+
+        subplots_iq_spectrogram_bits([iq_samples, chip_samples], fs=fs, show=False)
+        if received_packets:
+            plot_payload(received_packets[0])
+        plt.show()
 
 
 if __name__ == "__main__":
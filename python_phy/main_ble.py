@@ -1,16 +1,15 @@
 import click
 import numpy as np
-import matplotlib.pyplot as plt
 
 from data_io import read_iq_data
-from visualisation import subplots_iq_spectrogram_bits, plot_payload
 from receiver import ReceiverBLE
 
 
 @click.command()
 @click.option("--filename", default="BLE_0dBm.dat", type=str, help="The name of the data file to process.")
 @click.option("--fs", default=10e6, type=float, help="Sampling frequency in Hz (default: 10e6).")
-def main(filename: str, fs: float) -> None:
+@click.option("--plot/--no-plot", default=True, help="Plot the capture and the first packet (default: plot).")
+def main(filename: str, fs: float, plot: bool) -> None:
     """Process IQ data from file."""
 
     # Open file
@@ -24,11 +23,15 @@ def main(filename: str, fs: float) -> None:
     # Print results
     print(received_packets)
 
-    # Plot
-    subplots_iq_spectrogram_bits([iq_samples, bit_samples], fs=fs, show=False)
-    if received_packets:
-        plot_payload(received_packets[0])
-    plt.show()
+    # Plot (matplotlib is only imported when plotting)
+    if plot:
+        import matplotlib.pyplot as plt
+        from visualisation import subplots_iq_spectrogram_bits, plot_payload
+
+        subplots_iq_spectrogram_bits([iq_samples, bit_samples], fs=fs, show=False)
+        if received_packets:
+            plot_payload(received_packets[0])
+        plt.show()
 
 
 if __name__ == "__main__":
@@ -1,3 +1,4 @@
+import functools
 import numpy as np
 import scipy
 
@@ -7,25 +8,27 @@ def pulse_shape_bits_fir(bits: np.ndarray, fir_taps: np.ndarray, sps: int) -> np
     """Modulates a bit sequence by
     1. Upsampling according to samples per symbol (sps).
     2. Filtering with an FIR filter defined by the FIR taps (fir_taps).
+    A 2D input (packets, bits) is modulated row by row.
     """
     # Upsample with zeros
-    upsampled_bits = np.zeros(len(bits) * sps)
-    upsampled_bits[::sps] = bits.astype(np.int16) * 2 - 1  # (-1 to 1)
+    upsampled_bits = np.zeros(bits.shape[:-1] + (bits.shape[-1] * sps,))
+    upsampled_bits[..., ::sps] = bits.astype(np.int16) * 2 - 1  # (-1 to 1)
 
     # Apply FIR filtering and crop at the end (sps - 1) samples
-    return scipy.signal.convolve(upsampled_bits, fir_taps, mode="full")[: -sps + 1]
+    fir_taps = np.reshape(fir_taps, (1,) * (bits.ndim - 1) + (-1,))  # Same taps for every row
+    return scipy.signal.convolve(upsampled_bits, fir_taps, mode="full")[..., : -sps + 1]
 
 
 # Modulates in frequency a real array of symbols. Outputs IQ complex signal
 def modulate_frequency(symbols: np.ndarray, fsk_deviation: float, fs: float) -> np.ndarray:
-    """Modulates in frequency a real array of symbols. Outputs IQ complex signal."""
+    """Modulates in frequency a real array of symbols (along the last axis). Outputs IQ complex signal."""
     # fsk_deviation: a value of 1 in symbols maps to a frequency of fsk_deviation
     # Compute the phase increment per sample based on fsk_deviation
     phase_increments = symbols * (2 * np.pi * fsk_deviation / fs)
 
     # Prepending a zero ensures that the signal starts at phase 0
-    phase_increments = np.insert(phase_increments, 0, 0)
-    phase: np.ndarray = np.cumsum(phase_increments)  # Integrate the phase increments
+    phase_increments = np.insert(phase_increments, 0, 0, axis=-1)
+    phase: np.ndarray = np.cumsum(phase_increments, axis=-1)  # Integrate the phase increments
 
     return np.exp(1j * phase)  # Return the complex IQ signal
 
@@ -41,11 +44,88 @@ def gaussian_fir_taps(sps: int, ntaps: int, bt: float, gain: float = 1.0) -> np.
     return gain * taps / np.sum(taps)  # Normalise and apply gain
 
 
+# Gaussian pulse of the GFSK modulator: Gaussian taps convolved with a one-symbol rectangular window. Cached per sps.
+@functools.lru_cache
+def gfsk_pulse_taps(sps: int, bt: float) -> np.ndarray:
+    """
+    Gaussian pulse of the GFSK modulator: Gaussian taps convolved with a one-symbol rectangular window.
+    The pulse spans 2·sps - 1 samples (two symbols). Cached per (sps, bt) and read-only.
+    """
+    taps = scipy.signal.convolve(gaussian_fir_taps(sps=sps, ntaps=sps, bt=bt), np.ones(sps))
+    taps.flags.writeable = False
+    return taps
+
+
+# Phase lookup table of the GFSK modulator, indexed by the (previous, current) symbol pair. Cached.
+@functools.lru_cache
+def gfsk_phase_table(sps: int, bt: float, phase_step: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Phase lookup table of the GFSK modulator, indexed by the (previous, current) symbol pair. Cached and read-only.
+    Symbols are -1, +1 or 0 (no symbol, before the first and after the last bit), the pair (p, c) is row 3(p+1) + (c+1).
+    phase_step is the phase increment (rad) for a pulse-shaped value of 1, i.e. 2π·fsk_deviation/fs.
+
+    Returns (phasors, phase_increments):
+    - phasors, shape (9, sps): exp(j·phase) within one symbol, relative to the phase at its start.
+    - phase_increments, shape (9,): phase accumulated over the whole symbol.
+    """
+    # Pulse-shaped values within one symbol only depend on the current and previous symbols (pulse of two symbols)
+    taps = np.append(gfsk_pulse_taps(sps, bt), 0.0).reshape(2, sps)
+    levels = np.array([-1.0, 0.0, 1.0])
+    previous, current = np.repeat(levels, 3), np.tile(levels, 3)
+    shaped = current[:, np.newaxis] * taps[0] + previous[:, np.newaxis] * taps[1]  # Shape (9, sps)
+
+    # Phase at each sample, before adding its own increment (as modulate_frequency() starts at phase 0)
+    phase = np.cumsum(shaped * phase_step, axis=1)
+    phasors = np.exp(1j * np.concatenate((np.zeros((9, 1)), phase[:, :-1]), axis=1))
+    phase_increments = phase[:, -1]
+
+    phasors.flags.writeable = False
+    phase_increments.flags.writeable = False
+    return phasors, phase_increments
+
+
+# GFSK modulation of a bit sequence by table gather. Same output as pulse_shape_bits_fir() and modulate_frequency().
+def modulate_gfsk(bits: np.ndarray, sps: int, bt: float, fsk_deviation: float, fs: float) -> np.ndarray:
+    """
+    GFSK modulation of a bit sequence by table gather. Same output as pulse_shape_bits_fir() and modulate_frequency()
+    with the gfsk_pulse_taps() pulse, of length (len(bits) + 1)·sps. A 2D input (packets, bits) is modulated row by
+    row.
+
+    Each symbol period is a row of gfsk_phase_table() rotated by the phase accumulated over the previous symbols,
+    so only one cumulative sum per symbol is computed instead of one per sample.
+    """
+    phasors, phase_increments = gfsk_phase_table(sps, bt, 2 * np.pi * fsk_deviation / fs)
+
+    # Symbol pair of every symbol period, with no symbol before the first bit and after the last one
+    symbols = bits.astype(np.int8) * 2 - 1  # (-1 to 1)
+    pad_width = [(0, 0)] * (symbols.ndim - 1)
+    current = np.pad(symbols, pad_width + [(0, 1)])
+    previous = np.pad(symbols, pad_width + [(1, 0)])
+    pairs = 3 * (previous + 1) + (current + 1)  # Shape (..., bits + 1)
+
+    # Phase at the start of every symbol period
+    start_phase = np.cumsum(phase_increments[pairs], axis=-1) - phase_increments[pairs]
+    iq_signal = np.exp(1j * start_phase)[..., np.newaxis] * phasors[pairs]  # Shape (..., bits + 1, sps)
+    return iq_signal.reshape(bits.shape[:-1] + (-1,))
+
+
 # Generate half-sine pulse FIR filter taps
 def half_sine_fir_taps(sps: int) -> np.ndarray:
     return np.sin(np.linspace(0, np.pi, sps + 1))
 
 
+# Half-sine pulse over one symbol, sampled `offset` samples (0 <= offset < 1) later than half_sine_fir_taps().
+@functools.lru_cache
+def half_sine_symbol_pulse(sps: int, offset: float = 0.0) -> np.ndarray:
+    """
+    Half-sine pulse over one symbol, sampled `offset` samples (0 <= offset < 1) later than half_sine_fir_taps().
+    Returns sps samples (the last tap of half_sine_fir_taps(), zero, is left out). Cached and read-only.
+    """
+    pulse = np.sin(np.pi * (np.arange(sps) + offset) / sps)
+    pulse.flags.writeable = False
+    return pulse
+
+
 # Modulate input I_chips and Q_chips in quadrature, with half a symbol offset.
 def oqpsk_modulate(I_chips: np.ndarray, Q_chips: np.ndarray, fir_taps: np.ndarray, sps: int) -> np.ndarray:
     from filters import fractional_delay_fir_filter
@@ -59,6 +139,10 @@ def oqpsk_modulate(I_chips: np.ndarray, Q_chips: np.ndarray, fir_taps: np.ndarra
     hss_I_chips = pulse_shape_bits_fir(np.concatenate((I_chips, [0])), fir_taps=fir_taps, sps=sps)
     hss_Q_chips = pulse_shape_bits_fir(np.concatenate(([0], Q_chips)), fir_taps=fir_taps, sps=sps)
 
+    length = len(I_chips) * sps + int(np.ceil(sps / 2)) + 1  # Magic expression found by inspection
+    if sps % 2 == 0:  # Integer offset: advance the Quadrature component instead of delaying the In-phase one
+        return hss_I_chips[:length] + 1j * hss_Q_chips[sps // 2 : sps // 2 + length]
+
     # Apply half-symbol offset to Quadrature component
     hss_I_chips = fractional_delay_fir_filter(hss_I_chips, sps / 2, same_size=False)
     hss_Q_chips = np.pad(hss_Q_chips, (0, len(hss_I_chips) - len(hss_Q_chips)), mode="constant")
@@ -66,6 +150,39 @@ def oqpsk_modulate(I_chips: np.ndarray, Q_chips: np.ndarray, fir_taps: np.ndarra
     # Pack into complex array and crop remainders resulting from concatenating
     iq_signal = hss_I_chips + 1j * hss_Q_chips
     iq_signal = iq_signal[sps // 2 :]
-    iq_signal = iq_signal[: len(I_chips) * sps + int(np.ceil(sps / 2)) + 1]  # Magic expression found by inspection
+    iq_signal = iq_signal[:length]
 
     return iq_signal
+
+
+# O-QPSK modulation with half-sine pulses, synthesised directly instead of by FIR filtering as oqpsk_modulate().
+def oqpsk_modulate_half_sine(I_chips: np.ndarray, Q_chips: np.ndarray, sps: int) -> np.ndarray:
+    """
+    O-QPSK modulation with half-sine pulses, synthesised directly instead of by FIR filtering as oqpsk_modulate().
+    Same output as oqpsk_modulate() with half_sine_fir_taps() for even sps. A 2D input (packets, chips) is modulated
+    row by row.
+
+    The half-sine is zero at both ends, so every symbol period is one chip level times the cached pulse: no FIR
+    filtering is needed. The half-symbol offset is an exact sample shift, and for odd sps the In-phase pulse is
+    sampled half a sample later (instead of the sinc fractional delay filter of oqpsk_modulate()).
+    """
+    assert I_chips.shape == Q_chips.shape, "I_chips and Q_chips must have the same size"
+    delay = sps / 2 - sps // 2  # Fractional part of the half-symbol offset, 0 or 0.5 samples
+    length = I_chips.shape[-1] * sps + int(np.ceil(sps / 2)) + 1  # As oqpsk_modulate()
+    pad_width = [(0, 0)] * (I_chips.ndim - 1)
+
+    # Chip levels (-1 to 1), with a -1 chip at the end of I and at the start of Q as in oqpsk_modulate()
+    I_levels = np.pad(I_chips.astype(np.int8) * 2 - 1, pad_width + [(0, 1)], constant_values=-1)
+    Q_levels = np.pad(Q_chips.astype(np.int8) * 2 - 1, pad_width + [(1, 0)], constant_values=-1)
+
+    # One pulse per chip
+    I_signal = I_levels[..., np.newaxis] * half_sine_symbol_pulse(sps, delay)
+    Q_signal = Q_levels[..., np.newaxis] * half_sine_symbol_pulse(sps)
+    I_signal = I_signal.reshape(I_levels.shape[:-1] + (-1,))
+    Q_signal = Q_signal.reshape(Q_levels.shape[:-1] + (-1,))
+
+    # Half-symbol offset: Quadrature component advanced by sps // 2 samples, In-phase one delayed by the fraction
+    I_signal = np.pad(I_signal, pad_width + [(int(np.ceil(delay)), 0)])[..., :length]
+    Q_signal = np.pad(Q_signal[..., sps // 2 :], pad_width + [(0, 1)])[..., :length]
+
+    return I_signal + 1j * Q_signal
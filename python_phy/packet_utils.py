@@ -1,3 +1,4 @@
+import functools
 import numpy as np
 
 
@@ -7,48 +8,38 @@ def correlate_access_code(data: np.ndarray, access_code: str, threshold: int, re
     # access_code: from LSB to MSB (as samples arrive on-air)
     access_code = access_code.replace("_", "")
     code_len = len(access_code)
-    access_int = int(access_code, 2)  # Convert the access code (e.g. "10110010") to an integer
-    mask = (1 << code_len) - 1  # Create a mask to keep only the last code_len bits.
+    if len(data) < code_len:
+        return np.array([], dtype=np.int64)
+
+    code_bits = np.frombuffer(access_code.encode(), dtype=np.uint8) - ord("0")  # "10110010" -> [1,0,1,1,0,0,1,0]
+    mask = np.ones(code_len, dtype=np.int32)
     if reduce_mask:
-        # Create a mask that has ones everywhere except at the MSB and LSB:
+        # Mask out the first and last bits of the code:
         # This is useful for differential encoding in chip sequences for IEEE 802.15.4 demodulation
-        reduced_mask = mask & ~((1 << (code_len - 1)) | 1)
-    else:
-        reduced_mask = mask
-    data_reg = 0
-    positions = []  # Positions where the access code has been found in data
+        mask[[0, -1]] = 0
 
-    for i, bit in enumerate(data):
-        bit = int(bit)
-        data_reg = ((data_reg << 1) | (bit & 0x1)) & mask  # Shift in the new bit
-        if i + 1 < code_len:  # Start comparing once data_reg is filled
-            continue
+    # Mismatches between a window w and the code c: sum(mask * (w XOR c)) = sum(mask * c) + sum(mask * (1 - 2c) * w)
+    # so all windows are evaluated at once with a single sliding dot product
+    weights = mask * (1 - 2 * code_bits.astype(np.int32))
+    bits = (np.asarray(data).astype(np.int32)) & 0x1
+    mismatches = np.correlate(bits, weights, mode="valid") + np.sum(mask * code_bits)
 
-        # Count the number of mismatched bits between data_reg and the access code
-        mismatches = bin((data_reg ^ access_int) & reduced_mask).count("1")
-        if mismatches <= threshold:
-            # Report the position immediately after the access code was found
-            positions.append(i + 1)
+    # Report the position immediately after the access code was found
+    return np.flatnonzero(mismatches <= threshold) + code_len
 
-    return np.array(positions)
 
+# Runs the whitening LFSR bit by bit. Returns the keystream bytes and the LFSR state after each byte.
+def _whitening_lfsr(lfsr: int, polynomial: int, num_bytes: int) -> tuple[np.ndarray, np.ndarray]:
+    """Runs the whitening LFSR bit by bit. Returns the keystream bytes and the LFSR state after each byte."""
+    keystream = np.empty(num_bytes, dtype=np.uint8)
+    states = np.empty(num_bytes, dtype=np.uint8)
 
-# Apply whintening (de-whitening) to an array of bytes
-def ble_whitening(data: np.ndarray, lfsr=0x01, polynomial=0x11):
-    """Apply whintening (de-whitening) to an array of bytes."""
-    # LFSR default value is 0x01 as it is the default value in the nRF DATAWHITEIV register
-    # The polynomial default value is 0x11 = 0b001_0001 -> x⁷ + x⁴ + 1 (x⁷ is omitted)
-    output = np.empty_like(data)  # Initialise output array
-
-    for idx, byte in enumerate(data):
-        whitened_byte = 0
+    for idx in range(num_bytes):
+        key_byte = 0
         for bit_pos in range(8):
-            # XOR the current data bit with LFSR MSB
+            # The data bit is XORed with the LFSR MSB
             lfsr_msb = (lfsr & 0x40) >> 6  # LFSR is 7-bit, so MSB is at position 6
-            data_bit = (byte >> bit_pos) & 1  # Extract current bit
-            whitened_bit = data_bit ^ lfsr_msb  # XOR
-
-            whitened_byte |= whitened_bit << (bit_pos)  # Update the whitened byte
+            key_byte |= lfsr_msb << bit_pos
 
             # Update LFSR
             if lfsr_msb:  # If MSB is 1 (before shifting), apply feedback
@@ -57,9 +48,47 @@ def ble_whitening(data: np.ndarray, lfsr=0x01, polynomial=0x11):
                 lfsr <<= 1
             lfsr &= 0x7F  # 0x7F mask to keep lsfr within 7 bits
 
-        output[idx] = whitened_byte
+        keystream[idx] = key_byte
+        states[idx] = lfsr
+
+    return keystream, states
 
-    return output, lfsr
+
+# One period of the whitening keystream (127 bytes) for a given seed and polynomial. Cached after the first call.
+@functools.lru_cache(maxsize=None)
+def ble_whitening_keystream(lfsr: int = 0x01, polynomial: int = 0x11) -> tuple[np.ndarray, np.ndarray] | None:
+    """
+    One period of the whitening keystream (127 bytes) for a given seed and polynomial. Cached after the first call.
+    The 7-bit LFSR repeats every 127 bits, so the byte keystream repeats every 127 bytes.
+    Returns None if the LFSR does not come back to its seed after 127 bytes (non-primitive polynomial).
+    """
+    keystream, states = _whitening_lfsr(lfsr, polynomial, 127)
+    if states[-1] != lfsr:
+        return None
+
+    keystream.flags.writeable = False  # Shared between calls
+    states.flags.writeable = False
+    return keystream, states
+
+
+# Apply whintening (de-whitening) to an array of bytes
+def ble_whitening(data: np.ndarray, lfsr=0x01, polynomial=0x11):
+    """Apply whintening (de-whitening) to an array of bytes (to every row, along the last axis, if 2D)."""
+    # LFSR default value is 0x01 as it is the default value in the nRF DATAWHITEIV register
+    # The polynomial default value is 0x11 = 0b001_0001 -> x⁷ + x⁴ + 1 (x⁷ is omitted)
+    data = np.asarray(data)
+    length = data.shape[-1]
+    if length == 0:
+        return np.empty_like(data), lfsr
+
+    cycle = ble_whitening_keystream(int(lfsr), int(polynomial))
+    if cycle is None:  # No 127-byte period, run the LFSR for this data length
+        keystream, states = _whitening_lfsr(int(lfsr), int(polynomial), length)
+    else:
+        keystream, states = cycle
+
+    output = np.bitwise_xor(data, np.resize(keystream, length)).astype(data.dtype, copy=False)
+    return output, int(states[(length - 1) % len(states)])
 
 
 # Pack a sequence of bits (array) into an array of bytes (integers)
@@ -78,32 +107,60 @@ def pack_bits_to_uint8(bits: np.ndarray) -> np.ndarray:
     return uint8_array
 
 
+# Reverse the bit order of an integer `width` bits wide (LSB <-> MSB)
+def reflect_bits(value: int, width: int) -> int:
+    """Reverse the bit order of an integer `width` bits wide (LSB <-> MSB)."""
+    value &= (1 << width) - 1
+    return int(f"{value:0{width}b}"[::-1], 2)
+
+
+# Lookup table (256 entries) for a reflected CRC, one per polynomial and size. Cached after the first call.
+@functools.lru_cache(maxsize=None)
+def crc_table(crc_poly: int, crc_size: int) -> tuple[int, ...]:
+    """Lookup table (256 entries) for a reflected CRC, one per polynomial and size. Cached after the first call."""
+    crc_poly = reflect_bits(crc_poly, crc_size * 8)  # LSB -> MSB, as bits are sent on air
+
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):  # Process each bit once, here instead of for every received byte
+            crc = (crc >> 1) ^ crc_poly if crc & 0x01 else crc >> 1
+        table.append(crc)
+
+    return tuple(table)
+
+
 # Computes the Cyclic Redundancy Check for a given array of bytes
 def compute_crc(data: np.ndarray, crc_init: int = 0x00FFFF, crc_poly: int = 0x00065B, crc_size: int = 3) -> np.ndarray:
     """Computes the Cyclic Redundancy Check for a given array of bytes."""
-    crc_mask = (1 << (crc_size * 8)) - 1  # Mask to n-byte width (0xFFFF for crc_size = 2)
-
-    def swap_nbit(num, n):
-        num = num & crc_mask
-        reversed_bits = f"{{:0{n * 8}b}}".format(num)[::-1]
-        return int(reversed_bits, 2)
-
-    crc_init = swap_nbit(crc_init, crc_size)  # LSB -> MSB
-    crc_poly = swap_nbit(crc_poly, crc_size)
-
-    crc = crc_init
-    for byte in data:
-        crc ^= int(byte)
-        for _ in range(8):  # Process each bit
-            if crc & 0x01:  # Check the LSB
-                crc = (crc >> 1) ^ crc_poly
-            else:
-                crc >>= 1
-            crc &= crc_mask  # Ensure CRC size
+    table = crc_table(crc_poly, crc_size)
+    crc = reflect_bits(crc_init, crc_size * 8)  # LSB -> MSB
+
+    for byte in np.asarray(data, dtype=np.uint8).tolist():  # Byte-wise, table-driven
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
 
     return np.array([(crc >> (8 * i)) & 0xFF for i in range(crc_size)], dtype=np.uint8)
 
 
+# Computes the Cyclic Redundancy Check for a batch of packets of the same length (one packet per row)
+def compute_crc_batch(
+    data: np.ndarray, crc_init: int = 0x00FFFF, crc_poly: int = 0x00065B, crc_size: int = 3
+) -> np.ndarray:
+    """
+    Computes the Cyclic Redundancy Check for a batch of packets of the same length (one packet per row).
+    Returns an array of shape (packets, crc_size), each row as returned by compute_crc.
+    """
+    data = np.atleast_2d(np.asarray(data, dtype=np.uint8))
+    table = np.array(crc_table(crc_poly, crc_size), dtype=np.uint32)
+    crc = np.full(data.shape[0], reflect_bits(crc_init, crc_size * 8), dtype=np.uint32)
+
+    for column in data.T:  # All packets advance one byte at a time
+        crc = (crc >> 8) ^ table[(crc ^ column) & 0xFF]
+
+    shifts = 8 * np.arange(crc_size, dtype=np.uint32)
+    return ((crc[:, np.newaxis] >> shifts) & 0xFF).astype(np.uint8)
+
+
 # Generates (preamble + base address sequence) to use as access code
 def generate_access_code_ble(base_address: int) -> str:
     """Generates (preamble + base address sequence) to use as access code."""
@@ -123,17 +180,12 @@ def map_nibbles_to_chips(
     byte_array: np.ndarray, chip_mapping: np.ndarray, return_string: bool = True
 ) -> str | np.ndarray:
     """Returns a string of chips to be used by correlate access code function."""
-    result = []
-    for byte in byte_array:
-        for nibble in [byte & 0x0F, (byte >> 4) & 0x0F]:  # Extract LSB first, then MSB
-            mapped_value = chip_mapping[nibble]
-            if return_string:
-                binary_string = f"{mapped_value:032b}"  # Convert to 32-bit binary
-                result.append(binary_string)  # Append delimiter
-            else:
-                result.append(mapped_value)  # Append uint32 chip value
+    # LSB nibble first, then MSB nibble of every byte
+    byte_array = np.asarray(byte_array, dtype=np.uint8)
+    nibbles = np.stack((byte_array & 0x0F, byte_array >> 4), axis=-1).reshape(byte_array.shape[:-1] + (-1,))
+    chips = np.asarray(chip_mapping, dtype=np.uint32)[nibbles]  # uint32 chip values
 
-    return "_".join(result) if return_string else np.array(result, dtype=np.uint32)
+    return "_".join(f"{chip:032b}" for chip in chips) if return_string else chips
 
 
 # Return the number of set bits in the lowest 'bits' of 'n'.
@@ -165,24 +217,47 @@ def decode_chips(chips32: int, chip_mapping: np.ndarray, threshold: int = 32) ->
     return 0xFF  # If no valid match was found, return 0xFF to indicate an error
 
 
-# Pack chips into bytes. Assumes each byte is formed from 64 chips (32 per nibble).
-def pack_chips_to_bytes(chips: np.ndarray, num_bytes: int, chip_mapping: np.ndarray, threshold: int) -> np.ndarray:
-    """Pack chips into bytes. Assumes each byte is formed from 64 chips (32 per nibble)."""
-    bytes_out = np.empty(num_bytes, dtype=np.uint8)
+# Despread a chip stream: decode every 32-chip block to the closest entry of the chip mapping, all at once.
+def despread_chips(
+    chips: np.ndarray, chip_mapping: np.ndarray, chip_mask: int = 0x7FFFFFFE
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Despread a chip stream: decode every 32-chip block to the closest entry of the chip mapping, all at once.
+    Returns (nibbles, distances), where distances are the masked Hamming distances to the chosen entry.
+    """
+    # Chip matrices (N, 32) and (16, 32), first chip is the MSB as in chips_to_int()
+    num_blocks = len(chips) // 32
+    chip_blocks = (np.asarray(chips[: num_blocks * 32]).astype(np.int16) & 0x1).reshape(num_blocks, 32)
+    msb_first = np.arange(31, -1, -1, dtype=np.uint32)
+    mapping_bits = ((np.asarray(chip_mapping, dtype=np.uint32)[:, np.newaxis] >> msb_first) & 0x1).astype(np.int16)
+    mask_bits = ((np.uint32(chip_mask) >> msb_first) & 0x1).astype(np.int16)
 
-    for i in range(num_bytes):
-        # Convert 32 chips into an integer
-        nibble1 = chips_to_int(chips[i * 64 : i * 64 + 32])
-        nibble2 = chips_to_int(chips[i * 64 + 32 : (i + 1) * 64])
+    # Masked Hamming distance to every entry: sum(m * (b XOR c)) = sum(m * c) + b · (m * (1 - 2c))
+    masked_mapping = mapping_bits * mask_bits
+    distances = chip_blocks @ (mask_bits - 2 * masked_mapping).T + np.sum(masked_mapping, axis=1)
 
-        # Decode the nibbles
-        nibble1 = decode_chips(nibble1, chip_mapping=chip_mapping, threshold=threshold)
-        nibble2 = decode_chips(nibble2, chip_mapping=chip_mapping, threshold=threshold)
+    nibbles = np.argmin(distances, axis=1)  # First closest entry on ties, as in decode_chips()
+    return nibbles.astype(np.uint8), distances[np.arange(num_blocks), nibbles]
 
-        # Pack into a byte
-        bytes_out[i] = nibble1 | (nibble2 << 4)
 
-    return bytes_out
+# Pack chips into bytes. Assumes each byte is formed from 64 chips (32 per nibble).
+def pack_chips_to_bytes(
+    chips: np.ndarray, num_bytes: int, chip_mapping: np.ndarray, threshold: int, return_distances: bool = False
+) -> np.ndarray | tuple[np.ndarray, np.ndarray]:
+    """
+    Pack chips into bytes. Assumes each byte is formed from 64 chips (32 per nibble).
+    Nibbles further than `threshold` from any chip sequence are decoded as 0xF (0xFF error code, cropped to a nibble).
+    Optionally returns the Hamming distance of each nibble (LSB nibble first), as a soft quality metric.
+    """
+    assert len(chips) >= num_bytes * 64, "Input must contain 64 chips per byte"
+
+    nibbles, distances = despread_chips(chips[: num_bytes * 64], chip_mapping)
+    nibbles = np.where(distances <= threshold, nibbles, 0xFF).astype(np.uint16)
+
+    # Pack into bytes, LSB nibble first
+    bytes_out = ((nibbles[0::2] | (nibbles[1::2] << 4)) & 0xFF).astype(np.uint8)
+
+    return (bytes_out, distances) if return_distances else bytes_out
 
 
 # Convert a 32-length binary array to an integer.
@@ -192,10 +267,22 @@ def chips_to_int(chips: np.ndarray) -> int:
     return int("".join(map(str, chips)), 2)
 
 
+# Concatenate byte fields along the last axis, repeating the fields shared by every packet of a batch
+def _concatenate_fields(fields: list, batch_shape: tuple[int, ...]) -> np.ndarray:
+    fields = [np.asarray(field, dtype=np.uint8) for field in fields]
+    return np.concatenate([np.broadcast_to(field, batch_shape + field.shape[-1:]) for field in fields], axis=-1)
+
+
+# CRC of one packet (1D) or of a batch of packets of the same length (one per row)
+def _crc_of_packets(data: np.ndarray, **kwargs) -> np.ndarray:
+    return compute_crc(data, **kwargs) if data.ndim == 1 else compute_crc_batch(data, **kwargs)
+
+
 # Create a physical BLE packet from payload and base address.
 def create_ble_phy_packet(payload: np.ndarray, base_address: int) -> np.ndarray:
     """
     Create a physical BLE packet from payload and base address.
+    A 2D payload is a batch of payloads of the same length (one per row): returns one packet per row.
 
     Packet Structure:
     ┌───────────┬──────────────┬───────────────┬───────────┬────────┬────────┬─────────┐
@@ -205,9 +292,11 @@ def create_ble_phy_packet(payload: np.ndarray, base_address: int) -> np.ndarray:
     └───────────┴──────────────┴───────────────┴───────────┴────────┴────────┴─────────┘
     """
     max_payload_size: int = 255  # Bytes
+    payload = np.asarray(payload, dtype=np.uint8)
+    batch_shape = payload.shape[:-1]
     # Crop the payload if it exceeds the maximum allowed size
-    if len(payload) > max_payload_size:
-        payload = payload[:max_payload_size]
+    if payload.shape[-1] > max_payload_size:
+        payload = payload[..., :max_payload_size]
         print(
             f"Warning: create_ble_phy_packet() - Payload exceeded the maximum allowed size ({max_payload_size}B) and has been cropped."
         )
@@ -225,16 +314,16 @@ def create_ble_phy_packet(payload: np.ndarray, base_address: int) -> np.ndarray:
     # Set prefix, S0 and length bytes
     prefix = np.uint8(0x00)
     s0 = np.uint8(0x00)
-    length = np.uint8(len(payload))
+    length = np.uint8(payload.shape[-1])
 
     # Append CRC
-    ready_for_crc = np.concatenate(([s0, length], payload))
-    crc = compute_crc(ready_for_crc, crc_init=0x00FFFF, crc_poly=0x00065B, crc_size=3)
-    ready_for_whitening = np.concatenate((ready_for_crc, crc))
+    ready_for_crc = _concatenate_fields([[s0, length], payload], batch_shape)
+    crc = _crc_of_packets(ready_for_crc, crc_init=0x00FFFF, crc_poly=0x00065B, crc_size=3)
+    ready_for_whitening = np.concatenate((ready_for_crc, crc), axis=-1)
 
     # Whiten from S0 (included) to CRC (included)
     whitened, _ = ble_whitening(ready_for_whitening)
-    packet = np.concatenate(([preamble], base_addr_bytes, [prefix], whitened))
+    packet = _concatenate_fields([[preamble], base_addr_bytes, [prefix], whitened], batch_shape)
 
     return packet
 
@@ -243,6 +332,7 @@ def create_ble_phy_packet(payload: np.ndarray, base_address: int) -> np.ndarray:
 def create_802154_phy_packet(payload: np.ndarray, append_crc: bool) -> np.ndarray:
     """
     Create a physical IEEE 802.15.4 packet from payload. CRC is optional.
+    A 2D payload is a batch of payloads of the same length (one per row): returns one packet per row.
 
     Packet Structure:
     ┌──────────────────────────────┬────────┬───────────────────────────┬────────────────┐
@@ -255,58 +345,45 @@ def create_802154_phy_packet(payload: np.ndarray, append_crc: bool) -> np.ndarra
     max_payload_size = 127  # Bytes
     max_payload_size_with_crc = max_payload_size - crc_size  # Bytes
     preamble = np.array([0x00, 0x00, 0x00, 0x00, 0xA7], dtype=np.uint8)  # Set the preamble
+    payload = np.asarray(payload, dtype=np.uint8)
+    batch_shape = payload.shape[:-1]
 
     # Adjust payload size based on CRC inclusion
     if append_crc:
-        if len(payload) > max_payload_size_with_crc:
-            payload = payload[:max_payload_size_with_crc]
+        if payload.shape[-1] > max_payload_size_with_crc:
+            payload = payload[..., :max_payload_size_with_crc]
             print(
                 f"Warning: create_802154_phy_packet() - Payload exceeded {max_payload_size_with_crc}B (CRC enabled) and has been cropped."
             )
         # Set length byte and CRC
-        length = np.uint8(len(payload) + crc_size)
-        crc = compute_crc(payload, crc_init=0x0000, crc_poly=0x011021, crc_size=crc_size)
-        packet = np.concatenate((preamble, [length], payload, crc))  # Assemble packet
+        length = np.uint8(payload.shape[-1] + crc_size)
+        crc = _crc_of_packets(payload, crc_init=0x0000, crc_poly=0x011021, crc_size=crc_size)
+        packet = _concatenate_fields([preamble, [length], payload, crc], batch_shape)  # Assemble packet
 
     else:
-        if len(payload) > max_payload_size:
-            payload = payload[:max_payload_size]
+        if payload.shape[-1] > max_payload_size:
+            payload = payload[..., :max_payload_size]
             print(f"Warning: create_802154_phy_packet() - Payload exceeded {max_payload_size}B and has been cropped.")
-        length = np.uint8(len(payload))  # Set length byte
-        packet = np.concatenate((preamble, [length], payload))  # Assemble packet
+        length = np.uint8(payload.shape[-1])  # Set length byte
+        packet = _concatenate_fields([preamble, [length], payload], batch_shape)  # Assemble packet
 
     return packet
 
 
 # Unpack an array of bytes (np.uint8) into an array of bits, LSB first
 def unpack_uint8_to_bits(uint8_array: np.ndarray) -> np.ndarray:
-    """Unpack an array of bytes (np.uint8) into an array of bits, LSB first"""
-    # Unpack bits from each byte into a matrix where each row is the binary representation
-    bits = np.unpackbits(uint8_array).reshape(-1, 8)
-    bits = bits[:, ::-1]  # LSB first as sent on air
-    return bits.flatten()
+    """Unpack an array of bytes (np.uint8) into an array of bits, LSB first (every row separately if 2D)"""
+    return np.unpackbits(np.asarray(uint8_array, dtype=np.uint8), axis=-1, bitorder="little")  # As sent on air
 
 
 # Maps a the even and odd chips in a uint32 input array to I chips and Q chips respectively.
 def split_iq_chips(uint32_chips: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
     """Maps a the even and odd chips in a uint32 input array to I chips and Q chips respectively."""
-    # Preallocate output arrays
-    total_bits = uint32_chips.size * 32
-    I_chips = np.empty(total_bits // 2, dtype=np.uint8)
-    Q_chips = np.empty(total_bits // 2, dtype=np.uint8)
-
-    index = 0
-    for value in uint32_chips:
-        # Convert each uint32 to a numpy array of 1s and 0s
-        bits = np.array([(value >> i) & 1 for i in range(31, -1, -1)], dtype=np.uint8)
-
-        # Even-indexed chips go to I_chips, odd-indexed bits to Q_chips
-        I_chips[index : index + 16] = bits[::2]
-        Q_chips[index : index + 16] = bits[1::2]
-
-        index += 16  # Increase return index for each value in uint32_array
+    # Unpack each uint32 into its 32 chips, MSB first (big-endian bytes)
+    chips = np.unpackbits(np.ascontiguousarray(uint32_chips, dtype=">u4").view(np.uint8), axis=-1)
 
-    return I_chips, Q_chips
+    # Even-indexed chips go to I_chips, odd-indexed bits to Q_chips
+    return chips[..., ::2], chips[..., 1::2]
 
 
 # Searches for an IEEE 802.15.4 preamble in hard decisions `chip_samples`.
@@ -336,6 +413,8 @@ def preamble_detection_802154(
     # Verify the remaining bytes of the pattern
     for position in preamble_positions:
         for byte in pattern[1:]:
+            if position + 64 > len(chip_samples):
+                break  # Truncated preamble at the end of the samples
             next_byte = pack_chips_to_bytes(
                 chip_samples[position : position + 64],
                 num_bytes=1,
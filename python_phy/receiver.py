@@ -1,14 +1,27 @@
 import numpy as np
 import scipy
 from abc import ABC, abstractmethod
-from typing import Literal, get_args
+from itertools import chain
+from typing import Callable, Iterable, Iterator, Literal, get_args
 
-from demodulation import symbol_sync, demodulate_frequency, binary_slicer, simple_squelch, TEDType
+from demodulation import BandPassDiscriminator, symbol_sync, demodulate_frequency, binary_slicer, TEDType
+from timing_recovery import StreamingClockRecovery
 from modulation import gaussian_fir_taps, half_sine_fir_taps
-from filters import single_pole_iir_filter
+from filters import (
+    StreamingPolyphaseDecimator,
+    StreamingRationalResampler,
+    detect_bursts,
+    integer_sps_resampling,
+    low_pass_fir_taps,
+    polyphase_decimate,
+    rational_resample,
+    single_pole_iir_filter,
+    simple_squelch,
+)
+from stage_timing import count_packets, stage
 from packet_utils import (
     correlate_access_code,
-    compute_crc,
+    compute_crc_batch,
     ble_whitening,
     pack_bits_to_uint8,
     generate_access_code_ble,
@@ -28,6 +41,12 @@ ReceiverType = Literal[
     "IEEE802154",
 ]
 
+# Decay time constant (symbols) of the BAND_PASS discriminator AGC
+AGC_TIME_CONSTANT: int = 256
+
+# Packet read up to its CRC check: (packet, bytes covered by the CRC, received CRC), both None without CRC
+_UncheckedPacket = tuple[dict, np.ndarray | None, np.ndarray | None]
+
 
 # Define abstract class template for Receivers
 # Methods are then overridden by the children classes
@@ -35,6 +54,7 @@ class Receiver(ABC):
     # Class variables (overriden in derived classes)
     crc_size: int = None  # Bytes
     max_packet_len: int = None  # Bytes
+    _crc_parameters: dict = None  # compute_crc() keyword arguments
 
     @abstractmethod  # Receives an array of complex data and returns hard decision array
     def demodulate(
@@ -65,20 +85,286 @@ class Receiver(ABC):
         self._symbol_sync_param_damping = damping
         self._symbol_sync_param_max_deviation = max_deviation
 
+    def _burst_parameters(self) -> dict:  # Default detect_bursts() parameters, overridden in derived classes
+        return {"window_len": 1}
+
+    # demodulate_to_packet() up to the CRC checks, left to _check_crcs(); overridden in derived classes
+    def _demodulate_to_unchecked(self, iq_samples: np.ndarray, **kwargs) -> list[_UncheckedPacket]:
+        raise NotImplementedError
+
+    # CRC check of packets read up to their CRC, all at once: one compute_crc_batch() pass per packet length.
+    def _check_crcs(self, unchecked: list[_UncheckedPacket]) -> list[dict]:
+        """
+        CRC check of packets read up to their CRC, all at once: one compute_crc_batch() pass per packet length.
+        Returns the packets with their "crc_check" set (None for packets without CRC).
+        """
+        indices_by_length: dict[int, list[int]] = {}
+        for index, (_, crc_data, _) in enumerate(unchecked):
+            if crc_data is not None:
+                indices_by_length.setdefault(len(crc_data), []).append(index)
+
+        for length, indices in indices_by_length.items():
+            with stage("crc", length * len(indices)):
+                computed_crcs = compute_crc_batch(
+                    np.stack([unchecked[index][1] for index in indices]), **self._crc_parameters
+                )
+            for index, computed_crc in zip(indices, computed_crcs):
+                packet, _, received_crc = unchecked[index]
+                packet["crc_check"] = bool(np.array_equal(computed_crc, received_crc))
+
+        return [packet for packet, _, _ in unchecked]
+
+    # Packets of every capture of a batch, as demodulate_to_packet(), with the CRCs of all the captures checked at once
+    def demodulate_to_packet_batch(self, iq_batch: Iterable[np.ndarray], **kwargs) -> list[list[dict]]:
+        """
+        Packets of every capture of a batch (e.g. one per row), as demodulate_to_packet() with the same keyword
+        arguments. The CRCs of the packets of all the captures are checked at once (see _check_crcs()).
+        """
+        unchecked = [self._demodulate_to_unchecked(iq_samples, **kwargs) for iq_samples in iq_batch]
+        packets = iter(self._check_crcs(list(chain.from_iterable(unchecked))))
+        return [[next(packets) for _ in capture] for capture in unchecked]
+
+    # Set up the front end: optional channel select and decimation, then resampling to an integer sps if needed.
+    def _set_front_end(self, fs: float, decimation: int, half_bandwidth: float, symbol_rate: float) -> tuple[int, int]:
+        """
+        Set up the front end: optional channel select and decimation, then resampling to an integer sps if needed.
+        Returns (internal sampling rate, samples per symbol), the rate at which the rest of the receiver runs.
+
+        The channel select low-pass keeps `half_bandwidth` (Hz) around DC and its transition band ends where the first
+        alias would fall on the signal, and only the retained samples are computed. If fs / decimation is not an
+        integer multiple of symbol_rate, the samples are then resampled (rational polyphase resampler) up to the next
+        integer number of samples per symbol.
+        """
+        if int(decimation) != decimation or decimation < 1 or int(fs) % decimation:
+            raise ValueError(f"Decimation must be a positive integer divisor of the sampling rate, not {decimation!r}")
+
+        self.decimation: int = int(decimation)
+        self.input_fs: int = int(fs)
+        decimated_fs: int = self.input_fs // self.decimation
+        if self.decimation > 1:
+            if decimated_fs < 2 * symbol_rate or 2 * half_bandwidth >= decimated_fs:
+                raise ValueError(
+                    f"Decimation {decimation} leaves {decimated_fs} samples/s, too few for {symbol_rate:g} symbols/s "
+                    f"and a {2 * half_bandwidth:g} Hz bandwidth"
+                )
+            self._decimation_taps = low_pass_fir_taps(
+                self.input_fs, cutoff_freq=decimated_fs / 2, transition_width=decimated_fs - 2 * half_bandwidth
+            )
+
+        sps, self._resampling_up, self._resampling_down = integer_sps_resampling(decimated_fs, symbol_rate)
+        internal_fs = int(round(sps * symbol_rate))
+        self._input_samples_per_internal: float = self.input_fs / internal_fs  # For the burst detector
+        return internal_fs, sps
+
+    # Channel select, decimate and resample to the internal sampling rate (identity if not needed)
+    def _channel_select(self, iq_samples: np.ndarray) -> np.ndarray:
+        if self.decimation > 1:
+            with stage("channel_select", len(iq_samples)):
+                iq_samples = polyphase_decimate(iq_samples, self._decimation_taps, self.decimation)
+        if self._resampling_up != self._resampling_down:
+            with stage("resample", len(iq_samples)):
+                iq_samples = rational_resample(iq_samples, self._resampling_up, self._resampling_down)
+        return iq_samples
+
+    # Channel select, decimate and resample a stream chunk by chunk (identity if not needed)
+    def _channel_select_stream(self, iq_chunks: Iterable[np.ndarray]) -> Iterable[np.ndarray]:
+        if self.decimation > 1:
+            decimator = StreamingPolyphaseDecimator(self._decimation_taps, self.decimation)
+            iq_chunks = (decimator.process(iq_samples) for iq_samples in iq_chunks)
+        if self._resampling_up != self._resampling_down:
+            resampler = StreamingRationalResampler(self._resampling_up, self._resampling_down)
+            iq_chunks = (resampler.process(iq_samples) for iq_samples in iq_chunks)
+        return iq_chunks
+
+    # Demodulate only the active regions (bursts) of the capture, so that the cost scales with the airtime
+    def demodulate_bursts_to_packet(self, iq_samples: np.ndarray, bursts: np.ndarray = None, **kwargs) -> list[dict]:
+        """
+        Demodulate only the active regions (bursts) of the capture, so that the cost scales with the airtime.
+        bursts: [start, stop) sample indices, from detect_bursts() with the receiver defaults if None.
+        kwargs are passed to demodulate_to_packet(). Packets also report the "burst_start" sample index, as
+        "position_in_array" is relative to their burst.
+        """
+        if bursts is None:  # Burst parameters are in internal samples, the capture is at the input rate
+            parameters = {
+                name: max(1, int(round(value * self._input_samples_per_internal)))
+                for name, value in self._burst_parameters().items()
+            }
+            bursts = detect_bursts(iq_samples, **parameters)
+
+        received_packets: list[dict] = []
+        for start, stop in bursts:
+            for packet in self.demodulate_to_packet(iq_samples[start:stop], **kwargs):
+                packet["burst_start"] = int(start)
+                received_packets.append(packet)
+
+        return received_packets
+
+    def _symbol_sync_parameters(self) -> dict:  # Keyword arguments for symbol_sync() / StreamingClockRecovery
+        return {
+            "TED_gain": self._symbol_sync_param_TED_gain,
+            "loop_BW": self._symbol_sync_param_loop_BW,
+            "damping": self._symbol_sync_param_damping,
+            "max_deviation": self._symbol_sync_param_max_deviation,
+        }
+
+    # Decode packets from a stream of hard decisions, keeping only the bits that can still belong to a packet
+    @staticmethod
+    def _stream_packets(
+        bit_chunks: Iterable[np.ndarray],
+        find_preambles: Callable[[np.ndarray], np.ndarray],
+        decode_packet: Callable[[np.ndarray, int], dict | None],
+        preamble_span: int,
+        packet_span: int,
+    ) -> Iterator[dict]:
+        """
+        Decode packets from a stream of hard decisions, keeping only the bits that can still belong to a packet.
+        A preamble is decoded once `packet_span` bits (longest packet after the preamble) are buffered after it, or
+        at the end of the stream. Packet positions ("position_in_array") are counted from the start of the stream.
+        """
+        bits = np.array([], dtype=np.int8)
+        offset = 0  # Stream position of bits[0]
+        next_preamble = 0  # Stream position from which preambles are not decoded yet
+
+        for chunk in chain(bit_chunks, [None]):
+            end_of_stream = chunk is None
+            if not end_of_stream:
+                bits = np.concatenate((bits, chunk))
+
+            for preamble in find_preambles(bits):
+                preamble = int(preamble)
+                if offset + preamble < next_preamble:
+                    continue  # Already decoded in a previous chunk
+                if not end_of_stream and preamble + packet_span > len(bits):
+                    break  # The packet may not be complete yet
+
+                next_preamble = offset + preamble + 1
+                packet = decode_packet(bits, preamble)
+                if packet is not None:
+                    packet["position_in_array"] += offset
+                    yield packet
+
+            # Any pending (or not yet detected) packet lies within the last preamble_span + packet_span bits
+            keep_from = max(0, len(bits) - preamble_span - packet_span)
+            bits = bits[keep_from:]
+            offset += keep_from
+
+
+# Chunk by chunk version of the FSK front end of the receivers' demodulate() methods.
+class StreamingFSKDemodulator:
+    def __init__(
+        self,
+        fs: float,
+        sps: float,
+        fsk_deviation: float,
+        lowpass_taps: np.ndarray,
+        bandpass_taps: np.ndarray,
+        post_demodulation_taps: np.ndarray | None = None,
+        demodulation_type: DemodulationType = "INSTANTANEOUS_FREQUENCY",
+        ted_type: TEDType = "MOD_MUELLER_AND_MULLER",
+        **symbol_sync_parameters,
+    ):
+        """
+        Chunk by chunk version of the FSK front end of the receivers' demodulate() methods.
+        Filters, squelch, DC removal and symbol synchronisation keep their state between chunks, so the memory use
+        does not depend on the stream length.
+        """
+        if demodulation_type not in get_args(DemodulationType):
+            raise ValueError(
+                f"Invalid demodulation type '{demodulation_type}'. Choose from {list(get_args(DemodulationType))}"
+            )
+
+        self.demodulation_type = demodulation_type
+        self._gain = fs / (2 * np.pi * fsk_deviation)
+
+        # FIR taps as lfilter() numerators, so that the filtering matches scipy.signal.correlate(mode="full")
+        if demodulation_type == "INSTANTANEOUS_FREQUENCY":
+            self._fir_taps = {"lowpass": np.conj(lowpass_taps[::-1])}
+            if post_demodulation_taps is not None:
+                self._fir_taps["post_demodulation"] = np.conj(post_demodulation_taps[::-1])
+        else:
+            self._fir_taps = {}
+            self._discriminator = BandPassDiscriminator(
+                fs, fsk_deviation, bandpass_taps, agc_time_constant=AGC_TIME_CONSTANT * sps
+            )
+        self._fir_state = {name: None for name in self._fir_taps}
+
+        self._squelch_state = np.zeros(1)  # simple_squelch(threshold_dB=-20, alpha=0.3)
+        self._dc_state = np.zeros(1)  # single_pole_iir_filter(alpha=160e-6)
+        self._last_sample = None  # Last squelched sample, for the frequency demodulator
+
+        self._clock_recovery = StreamingClockRecovery(sps, ted_type=ted_type, **symbol_sync_parameters)
+
+    def _fir(self, name: str, samples: np.ndarray, flush: bool) -> np.ndarray:  # Stateful FIR, flush adds the tail
+        taps = self._fir_taps[name]
+        if flush:
+            samples = np.concatenate((samples, np.zeros(len(taps) - 1, dtype=samples.dtype)))
+        if self._fir_state[name] is None:
+            self._fir_state[name] = np.zeros(len(taps) - 1, dtype=np.result_type(taps, samples))
+        output, self._fir_state[name] = scipy.signal.lfilter(taps, 1.0, samples, zi=self._fir_state[name])
+        return output
+
+    # Hard decisions for the next chunk of IQ samples (flush=True at the end of the stream to empty the filters).
+    def process(self, iq_samples: np.ndarray, flush: bool = False) -> np.ndarray:
+        """
+        Hard decisions for the next chunk of IQ samples (flush=True at the end of the stream to empty the filters).
+        """
+        if self.demodulation_type == "INSTANTANEOUS_FREQUENCY":
+            iq_samples = self._fir("lowpass", iq_samples, flush)
+
+            # Squelch (single pole IIR power estimate)
+            alpha = 0.3
+            power = iq_samples.real**2 + iq_samples.imag**2
+            power_estimate, self._squelch_state = scipy.signal.lfilter(
+                [alpha], [1, -(1 - alpha)], power, zi=self._squelch_state
+            )
+            iq_samples = np.where(power_estimate >= 10 ** (-20 / 10), iq_samples, 0)
+
+            # Frequency demodulation, continuing from the last sample of the previous chunk
+            if self._last_sample is not None:
+                freq_samples = demodulate_frequency(np.concatenate(([self._last_sample], iq_samples)), gain=self._gain)
+            else:
+                freq_samples = demodulate_frequency(iq_samples, gain=self._gain)
+            if len(iq_samples):
+                self._last_sample = iq_samples[-1]
+
+            alpha = 160e-6
+            dc_estimate, self._dc_state = scipy.signal.lfilter(
+                [alpha], [1, -(1 - alpha)], freq_samples, zi=self._dc_state
+            )
+            before_symbol_sync = freq_samples - dc_estimate
+
+            if "post_demodulation" in self._fir_taps:
+                before_symbol_sync = self._fir("post_demodulation", before_symbol_sync, flush)
+
+        else:  # BAND_PASS
+            before_symbol_sync = self._discriminator.process(iq_samples, flush)
+
+        return binary_slicer(self._clock_recovery.process(before_symbol_sync, flush))
+
+    # Hard decisions for every chunk of an IQ stream, flushing the filters at the end.
+    def stream(self, iq_chunks: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+        """Hard decisions for every chunk of an IQ stream, flushing the filters at the end."""
+        for iq_samples in iq_chunks:
+            yield self.process(iq_samples)
+        yield self.process(np.array([], dtype=np.complex64), flush=True)
+
 
 class ReceiverBLE(Receiver):
     # Class variables
     _valid_rates = (1e6, 2e6)  # BLE 1Mb/s or 2Mb/s
     _crc_size: int = 3  # 3 bytes CRC for BLE
+    _crc_parameters: dict = {"crc_init": 0x00FFFF, "crc_poly": 0x00065B, "crc_size": _crc_size}
     _max_payload_size: int = 255  # Bytes
 
-    def __init__(self, fs: int, transmission_rate: float = 1e6):
+    def __init__(self, fs: int, transmission_rate: float = 1e6, decimation: int = 1):
         # Instance variables
         self.transmission_rate: float = transmission_rate  # BLE 1 Mb/s or 2Mb/s
         self._fsk_deviation: float = transmission_rate * 0.25  # Hz
 
-        self._fs = int(fs)  # Sampling rate
-        self._sps: int = int(self._fs / self.transmission_rate)
+        # Sampling rate and samples per symbol after the front end (Carson's bandwidth for the channel select)
+        self._fs, self._sps = self._set_front_end(
+            fs, decimation, self._fsk_deviation + transmission_rate / 2, transmission_rate
+        )
 
         # Create matched filter taps from sampling rate `fs`
         # Generate Gaussian taps and convolve with rectangular window
@@ -97,37 +383,33 @@ class ReceiverBLE(Receiver):
         ted_type: TEDType = "MOD_MUELLER_AND_MULLER",
     ) -> np.ndarray:
         """Receives an array of complex data and returns hard decision array."""
+        iq_samples = self._channel_select(iq_samples)  # Internal sampling rate
 
         if demodulation_type == "INSTANTANEOUS_FREQUENCY":
             # Low pass matched filter (Gaussian kernel)
             # Generate Gaussian taps and convolve with rectangular window
-            iq_samples = scipy.signal.correlate(iq_samples, self._gauss_taps, mode="full")
+            with stage("matched_filter", len(iq_samples)):
+                iq_samples = scipy.signal.correlate(iq_samples, self._gauss_taps, mode="full")
 
             # Squelch
-            iq_samples = simple_squelch(iq_samples, threshold_dB=-20, alpha=0.3)
+            with stage("squelch", len(iq_samples)):
+                iq_samples = simple_squelch(iq_samples, threshold_dB=-20, alpha=0.3)
 
             # Frequency demodulation
-            freq_samples = demodulate_frequency(iq_samples, gain=(self._fs) / (2 * np.pi * self._fsk_deviation))
-            freq_samples -= single_pole_iir_filter(freq_samples, alpha=160e-6)
+            with stage("discriminator", len(iq_samples)):
+                freq_samples = demodulate_frequency(iq_samples, gain=(self._fs) / (2 * np.pi * self._fsk_deviation))
+                freq_samples -= single_pole_iir_filter(freq_samples, alpha=160e-6)
 
             # Matched filter after frequency demodulation
             # before_symbol_sync = scipy.signal.correlate(freq_samples, self.gauss_taps, mode="full")
             before_symbol_sync = freq_samples
 
         elif demodulation_type == "BAND_PASS":
-            complex_exp = np.exp(1j * 2 * np.pi * self._fsk_deviation * np.arange(len(self._gauss_taps)) / self._fs)
-            gauss_bandpass_lower = self._gauss_taps / complex_exp
-            gauss_bandpass_higher = self._gauss_taps * complex_exp
-
-            # Band-pass filter (complex signal, complex filter, complex output)
-            iq_samples_lower = scipy.signal.correlate(iq_samples, gauss_bandpass_lower, mode="full")
-            iq_samples_higher = scipy.signal.correlate(iq_samples, gauss_bandpass_higher, mode="full")
-
-            # Magnitude squared and subtract
-            iq_samples_lower_square = iq_samples_lower * np.conj(iq_samples_lower)
-            iq_samples_higher_square = iq_samples_higher * np.conj(iq_samples_higher)
-            before_symbol_sync = np.real(iq_samples_higher_square - iq_samples_lower_square)
-            before_symbol_sync /= np.max(before_symbol_sync)
+            # Band-pass filters at both tones (Gaussian kernel), magnitude squared, subtract and AGC
+            discriminator = BandPassDiscriminator(
+                self._fs, self._fsk_deviation, self._gauss_taps, agc_time_constant=AGC_TIME_CONSTANT * self._sps
+            )
+            before_symbol_sync = discriminator.process(iq_samples, flush=True)
 
         else:
             raise ValueError(
@@ -135,16 +417,17 @@ class ReceiverBLE(Receiver):
             )
 
         # Symbol synchronisation
-        bit_samples = symbol_sync(
-            before_symbol_sync,
-            sps=self._sps,
-            ted_type=ted_type,
-            TED_gain=self._symbol_sync_param_TED_gain,
-            loop_BW=self._symbol_sync_param_loop_BW,
-            damping=self._symbol_sync_param_damping,
-            max_deviation=self._symbol_sync_param_max_deviation,
-        )
-        bit_samples = binary_slicer(bit_samples)
+        with stage("symbol_sync", len(before_symbol_sync)):
+            bit_samples = symbol_sync(
+                before_symbol_sync,
+                sps=self._sps,
+                ted_type=ted_type,
+                TED_gain=self._symbol_sync_param_TED_gain,
+                loop_BW=self._symbol_sync_param_loop_BW,
+                damping=self._symbol_sync_param_damping,
+                max_deviation=self._symbol_sync_param_max_deviation,
+            )
+            bit_samples = binary_slicer(bit_samples)
 
         return bit_samples
 
@@ -153,46 +436,61 @@ class ReceiverBLE(Receiver):
         self, bit_samples: np.ndarray, base_address: int = 0x12345678, preamble_threshold: int = 4
     ) -> list[dict]:
         """Receive hard decisions (bit samples) and return dictionary with detected packets."""
+        return self._check_crcs(self._read_packets(bit_samples, base_address, preamble_threshold))
+
+    # Read the packets of every preamble found in bit_samples, up to their CRC check
+    def _read_packets(
+        self, bit_samples: np.ndarray, base_address: int = 0x12345678, preamble_threshold: int = 4
+    ) -> list[_UncheckedPacket]:
         # Decode detected packets found in bit_samples array
-        preamble_positions: np.ndarray = correlate_access_code(
-            bit_samples, generate_access_code_ble(base_address), threshold=preamble_threshold
-        )
-        detected_packets: list[dict] = []
+        with stage("access_code_search", len(bit_samples)):
+            preamble_positions: np.ndarray = correlate_access_code(
+                bit_samples, generate_access_code_ble(base_address), threshold=preamble_threshold
+            )
+        detected_packets: list[_UncheckedPacket] = []
 
         # Read packets starting from the end of the preamble
         for preamble in preamble_positions:
-            # Length reading for BLE
-            payload_start: int = preamble + 2 * 8  # S0 + length byte
-            header = pack_bits_to_uint8(bit_samples[preamble:payload_start])  # Whitened
-            header, lsfr = ble_whitening(header)  # De-whitened, length_byte includes S0
-            payload_length: int = int(header[-1])  # Payload length in bytes, without CRC
-
-            # Payload reading and de-whitening
-            total_bytes: int = payload_length + self._crc_size
-            payload_and_crc_end = payload_start + total_bytes * 8
-            if payload_and_crc_end > len(bit_samples):
-                # Discard this packet, it was corrupted by noise
-                return []
-
-            payload_and_crc = pack_bits_to_uint8(bit_samples[payload_start:payload_and_crc_end])
-            payload_and_crc, _ = ble_whitening(payload_and_crc, lsfr)
-
-            # CRC check
-            header_and_payload = np.concatenate((header, payload_and_crc[: -self._crc_size]))
-            computed_crc = compute_crc(
-                header_and_payload, crc_init=0x00FFFF, crc_poly=0x00065B, crc_size=self._crc_size
-            )
-            crc_check = True if (computed_crc == payload_and_crc[-self._crc_size :]).all() else False
-
-            payload = header_and_payload[2:]  # Remove CRC bytes
+            packet = self._read_packet(bit_samples, preamble)
+            if packet is None:
+                continue  # Discard this packet, it does not fit in bit_samples (truncated capture or false preamble)
 
             # Append dictionary to return list
-            detected_packets.append(
-                {"payload": payload, "length": len(payload), "crc_check": crc_check, "position_in_array": payload_start}
-            )
+            detected_packets.append(packet)
 
         return detected_packets
 
+    # Decode the packet starting at the end of a preamble, None if it does not fit in bit_samples
+    def _decode_packet(self, bit_samples: np.ndarray, preamble: int) -> dict | None:
+        packet = self._read_packet(bit_samples, preamble)
+        return None if packet is None else self._check_crcs([packet])[0]
+
+    # Read the packet starting at the end of a preamble up to its CRC check, None if it does not fit in bit_samples
+    def _read_packet(self, bit_samples: np.ndarray, preamble: int) -> _UncheckedPacket | None:
+        # Length reading for BLE
+        payload_start: int = preamble + 2 * 8  # S0 + length byte
+        if payload_start > len(bit_samples):
+            return None
+        header = pack_bits_to_uint8(bit_samples[preamble:payload_start])  # Whitened
+        header, lsfr = ble_whitening(header)  # De-whitened, length_byte includes S0
+        payload_length: int = int(header[-1])  # Payload length in bytes, without CRC
+
+        # Payload reading and de-whitening
+        total_bytes: int = payload_length + self._crc_size
+        payload_and_crc_end = payload_start + total_bytes * 8
+        if payload_and_crc_end > len(bit_samples):
+            return None
+
+        payload_and_crc = pack_bits_to_uint8(bit_samples[payload_start:payload_and_crc_end])
+        payload_and_crc, _ = ble_whitening(payload_and_crc, lsfr)
+
+        # The CRC covers the header and the payload
+        header_and_payload = np.concatenate((header, payload_and_crc[: -self._crc_size]))
+        payload = header_and_payload[2:]  # Remove CRC bytes
+
+        packet = {"payload": payload, "length": len(payload), "crc_check": None, "position_in_array": payload_start}
+        return packet, header_and_payload, payload_and_crc[-self._crc_size :]
+
     # Receive IQ data and return dictionary with detected packets.
     def demodulate_to_packet(
         self,
@@ -203,14 +501,68 @@ class ReceiverBLE(Receiver):
         preamble_threshold: int = 4,
     ) -> list[dict]:
         """Receive IQ data and return dictionary with detected packets."""
+        return self._check_crcs(
+            self._demodulate_to_unchecked(iq_samples, demodulation_type, ted_type, base_address, preamble_threshold)
+        )
+
+    def _demodulate_to_unchecked(
+        self,
+        iq_samples: np.ndarray,
+        demodulation_type: DemodulationType = "INSTANTANEOUS_FREQUENCY",
+        ted_type: TEDType = "MOD_MUELLER_AND_MULLER",
+        base_address: int = 0x12345678,
+        preamble_threshold: int = 4,
+    ) -> list[_UncheckedPacket]:
+        count_packets()  # Denominator of the time per packet of the stage timing
         bit_samples = self.demodulate(
             iq_samples, demodulation_type=demodulation_type, ted_type=ted_type
         )  # From IQ samples to hard decisions
-        received_packets: list[dict] = self.process_phy_packet(
-            bit_samples, base_address=base_address, preamble_threshold=preamble_threshold
-        )  # From hard decisions to packets
+        return self._read_packets(bit_samples, base_address, preamble_threshold)  # From hard decisions to packets
 
-        return received_packets
+    # Receives IQ data chunk by chunk and yields the hard decisions of each chunk.
+    def demodulate_stream(
+        self,
+        iq_chunks: Iterable[np.ndarray],
+        demodulation_type: DemodulationType = "INSTANTANEOUS_FREQUENCY",
+        ted_type: TEDType = "MOD_MUELLER_AND_MULLER",
+    ) -> Iterator[np.ndarray]:
+        """Receives IQ data chunk by chunk and yields the hard decisions of each chunk (see StreamingFSKDemodulator)."""
+        demodulator = StreamingFSKDemodulator(
+            self._fs,
+            self._sps,
+            self._fsk_deviation,
+            lowpass_taps=self._gauss_taps,
+            bandpass_taps=self._gauss_taps,
+            demodulation_type=demodulation_type,
+            ted_type=ted_type,
+            **self._symbol_sync_parameters(),
+        )
+        yield from demodulator.stream(self._channel_select_stream(iq_chunks))
+
+    # Receives IQ data chunk by chunk and yields the detected packets as they complete.
+    def demodulate_to_packet_stream(
+        self,
+        iq_chunks: Iterable[np.ndarray],
+        demodulation_type: DemodulationType = "INSTANTANEOUS_FREQUENCY",
+        ted_type: TEDType = "MOD_MUELLER_AND_MULLER",
+        base_address: int = 0x12345678,
+        preamble_threshold: int = 4,
+    ) -> Iterator[dict]:
+        """
+        Receives IQ data chunk by chunk and yields the detected packets as they complete.
+        Same packets as demodulate_to_packet() with constant memory, e.g. for long captures or live streams.
+        """
+        access_code = generate_access_code_ble(base_address)
+        yield from self._stream_packets(
+            self.demodulate_stream(iq_chunks, demodulation_type=demodulation_type, ted_type=ted_type),
+            find_preambles=lambda bits: correlate_access_code(bits, access_code, threshold=preamble_threshold),
+            decode_packet=self._decode_packet,
+            preamble_span=len(access_code.replace("_", "")),
+            packet_span=(2 + self._max_payload_size + self._crc_size) * 8,  # Header, longest payload and CRC
+        )
+
+    def _burst_parameters(self) -> dict:  # One bit average, shortest packet (preamble to CRC, 80 bits), 8 bits guard
+        return {"window_len": self._sps, "min_duration": 80 * self._sps, "guard": 8 * self._sps, "align": self._sps}
 
     @property
     def transmission_rate(self) -> float:
@@ -229,6 +581,7 @@ class Receiver802154(Receiver):
     transmission_rate: float = 2e6  # IEEE 802.15.4 2 Mchip/s
     fsk_deviation: float = 500e3  # Hz
     crc_size: int = 2  # 2 bytes CRC for IEEE 802.15.4
+    _crc_parameters: dict = {"crc_init": 0x0000, "crc_poly": 0x011021, "crc_size": crc_size}
     max_packet_len: int = 127  # Bytes
 
     # Chip mapping for differential MSK encoding
@@ -254,10 +607,11 @@ class Receiver802154(Receiver):
         dtype=np.uint32,
     )
 
-    def __init__(self, fs: int):
+    def __init__(self, fs: int, decimation: int = 1):
         # Instance variables
-        self.fs = int(fs)  # Sampling rate
-        self.spc: int = int(self.fs / self.transmission_rate)  # Samples per chip
+        # Sampling rate and samples per chip after the front end
+        # (main lobe of the O-QPSK spectrum for the channel select)
+        self.fs, self.spc = self._set_front_end(fs, decimation, 0.75 * self.transmission_rate, self.transmission_rate)
 
         # Matched filtering (Half Sine FIR taps) from sampling rate `fs`
         hss_taps = half_sine_fir_taps(2 * self.spc)  # One symbol is two chips long
@@ -271,6 +625,14 @@ class Receiver802154(Receiver):
 
         self.set_symbol_sync_parameters()
 
+    def _burst_parameters(self) -> dict:  # One symbol average, shortest frame (SHR, PHR and FCS), one symbol guard
+        return {
+            "window_len": 32 * self.spc,
+            "min_duration": 8 * 64 * self.spc,
+            "guard": 32 * self.spc,
+            "align": self.spc,
+        }
+
     # Receives an array of complex data and returns hard decision array
     def demodulate(
         self,
@@ -279,35 +641,31 @@ class Receiver802154(Receiver):
         ted_type: TEDType = "GARDNER",
     ) -> np.ndarray:
         """Receives an array of complex data and returns hard decision array."""
+        iq_samples = self._channel_select(iq_samples)  # Internal sampling rate
 
         if demodulation_type == "INSTANTANEOUS_FREQUENCY":
             # Low pass matched filter (half sine shape taps)
-            iq_samples = scipy.signal.correlate(iq_samples, self.hss_taps, mode="full")
+            with stage("matched_filter", len(iq_samples)):
+                iq_samples = scipy.signal.correlate(iq_samples, self.hss_taps, mode="full")
 
             # Squelch
-            iq_samples = simple_squelch(iq_samples, threshold_dB=-20, alpha=0.3)
+            with stage("squelch", len(iq_samples)):
+                iq_samples = simple_squelch(iq_samples, threshold_dB=-20, alpha=0.3)
 
             # Frequency demodulation
-            freq_samples = demodulate_frequency(iq_samples, gain=(self.fs) / (2 * np.pi * self.fsk_deviation))
-            freq_samples -= single_pole_iir_filter(freq_samples, alpha=160e-6)
+            with stage("discriminator", len(iq_samples)):
+                freq_samples = demodulate_frequency(iq_samples, gain=(self.fs) / (2 * np.pi * self.fsk_deviation))
+                freq_samples -= single_pole_iir_filter(freq_samples, alpha=160e-6)
 
-            # Matched filter after frequency demodulation
-            before_symbol_sync = scipy.signal.correlate(freq_samples, self.rect_taps, mode="full")
+                # Matched filter after frequency demodulation
+                before_symbol_sync = scipy.signal.correlate(freq_samples, self.rect_taps, mode="full")
 
         elif demodulation_type == "BAND_PASS":
-            complex_exp = np.exp(1j * 2 * np.pi * self.fsk_deviation * np.arange(len(self.rect_taps)) / self.fs)
-            rect_bandpass_lower = self.rect_taps / complex_exp
-            rect_bandpass_higher = self.rect_taps * complex_exp
-
-            # Band-pass filter (complex signal, complex filter, complex output)
-            iq_samples_lower = scipy.signal.correlate(iq_samples, rect_bandpass_lower, mode="full")
-            iq_samples_higher = scipy.signal.correlate(iq_samples, rect_bandpass_higher, mode="full")
-
-            # Magnitude squared and subtract
-            iq_samples_lower_square = iq_samples_lower * np.conj(iq_samples_lower)
-            iq_samples_higher_square = iq_samples_higher * np.conj(iq_samples_higher)
-            before_symbol_sync = np.real(iq_samples_higher_square - iq_samples_lower_square)
-            before_symbol_sync /= np.max(before_symbol_sync)
+            # Band-pass filters at both tones (rect kernel), magnitude squared, subtract and AGC
+            discriminator = BandPassDiscriminator(
+                self.fs, self.fsk_deviation, self.rect_taps, agc_time_constant=AGC_TIME_CONSTANT * self.spc
+            )
+            before_symbol_sync = discriminator.process(iq_samples, flush=True)
 
         else:
             raise ValueError(
@@ -315,16 +673,17 @@ class Receiver802154(Receiver):
             )
 
         # Symbol synchronisation
-        bit_samples = symbol_sync(
-            before_symbol_sync,
-            sps=self.spc,
-            ted_type=ted_type,
-            TED_gain=self._symbol_sync_param_TED_gain,
-            loop_BW=self._symbol_sync_param_loop_BW,
-            damping=self._symbol_sync_param_damping,
-            max_deviation=self._symbol_sync_param_max_deviation,
-        )
-        bit_samples = binary_slicer(bit_samples)
+        with stage("symbol_sync", len(before_symbol_sync)):
+            bit_samples = symbol_sync(
+                before_symbol_sync,
+                sps=self.spc,
+                ted_type=ted_type,
+                TED_gain=self._symbol_sync_param_TED_gain,
+                loop_BW=self._symbol_sync_param_loop_BW,
+                damping=self._symbol_sync_param_damping,
+                max_deviation=self._symbol_sync_param_max_deviation,
+            )
+            bit_samples = binary_slicer(bit_samples)
 
         return bit_samples
 
@@ -336,47 +695,70 @@ class Receiver802154(Receiver):
         CRC_included: bool = True,
     ) -> list[dict]:
         """Receive hard decisions (bit samples) and return dictionary with detected packets."""
-
-        preamble_positions: np.ndarray = preamble_detection_802154(chip_samples, preamble_threshold, self.chip_mapping)
-        detected_packets: list[dict] = []
+        return self._check_crcs(self._read_packets(chip_samples, preamble_threshold, CRC_included))
+
+    # Read the packets of every preamble found in chip_samples, up to their CRC check
+    def _read_packets(
+        self, chip_samples: np.ndarray, preamble_threshold: int = 12, CRC_included: bool = True
+    ) -> list[_UncheckedPacket]:
+        with stage("access_code_search", len(chip_samples)):
+            preamble_positions: np.ndarray = preamble_detection_802154(
+                chip_samples, preamble_threshold, self.chip_mapping
+            )
+        detected_packets: list[_UncheckedPacket] = []
 
         # Read packets starting from the end of the preamble
         for preamble in preamble_positions:
-            # Length reading for IEEE 802.15.4
-            payload_start: int = preamble + 2 * 32  # 2 nibbles, 1 byte
+            packet = self._read_packet(chip_samples, preamble, CRC_included=CRC_included)
+            if packet is None:
+                continue  # The packet is lost (not valid)
+
+            # Append dictionary to return list
+            detected_packets.append(packet)
+
+        return detected_packets
+
+    # Decode the packet starting at the end of a preamble, None if it is not valid or does not fit in chip_samples
+    def _decode_packet(self, chip_samples: np.ndarray, preamble: int, CRC_included: bool = True) -> dict | None:
+        packet = self._read_packet(chip_samples, preamble, CRC_included=CRC_included)
+        return None if packet is None else self._check_crcs([packet])[0]
+
+    # Read the packet starting at the end of a preamble up to its CRC check, None if it is not valid or does not fit
+    def _read_packet(
+        self, chip_samples: np.ndarray, preamble: int, CRC_included: bool = True
+    ) -> _UncheckedPacket | None:
+        # Length reading for IEEE 802.15.4
+        payload_start: int = preamble + 2 * 32  # 2 nibbles, 1 byte
+        if payload_start > len(chip_samples):
+            return None
+        with stage("despreading", payload_start - preamble):
             payload_length = pack_chips_to_bytes(
                 chip_samples[preamble:payload_start], num_bytes=1, chip_mapping=self.chip_mapping, threshold=10
             )  # Payload length in bytes
-            payload_length = payload_length[0]
-            if payload_length > self.max_packet_len:  # Maximum payload length is 127 bytes
-                continue  # The packet is lost (not valid)
+        payload_length = int(payload_length[0])
+        if payload_length > self.max_packet_len:  # Maximum payload length is 127 bytes
+            return None
 
-            try:
-                # Payload reading
+        try:
+            # Payload reading
+            with stage("despreading", payload_length * 64):
                 payload = pack_chips_to_bytes(
                     chip_samples[payload_start : payload_start + payload_length * 64],
                     num_bytes=payload_length,
                     chip_mapping=self.chip_mapping,
                     threshold=32,  # Once the preamble and length are detected, just return closest guess
                 )
-            except AssertionError as e:  # There was a problem processing the packet
-                continue
-
-            crc_check = None
-            # CRC check
-            if CRC_included:
-                computed_crc = compute_crc(
-                    payload[: -self.crc_size], crc_init=0x0000, crc_poly=0x011021, crc_size=self.crc_size
-                )
-                crc_check = True if (computed_crc == payload[-self.crc_size :]).all() else False
-                payload = payload[: -self.crc_size]  # Remove CRC bytes
+        except AssertionError as e:  # There was a problem processing the packet
+            return None
 
-            # Append dictionary to return list
-            detected_packets.append(
-                {"payload": payload, "length": len(payload), "crc_check": crc_check, "position_in_array": payload_start}
-            )
+        crc_data, received_crc = None, None
+        # The CRC covers the payload
+        if CRC_included:
+            crc_data, received_crc = payload[: -self.crc_size], payload[-self.crc_size :]
+            payload = crc_data  # Remove CRC bytes
 
-        return detected_packets
+        packet = {"payload": payload, "length": len(payload), "crc_check": None, "position_in_array": payload_start}
+        return packet, crc_data, received_crc
 
     # Receive IQ data and return dictionary with detected packets.
     def demodulate_to_packet(
@@ -388,14 +770,65 @@ class Receiver802154(Receiver):
         CRC_included: bool = True,
     ) -> list[dict]:
         """Receive IQ data and return dictionary with detected packets."""
+        return self._check_crcs(
+            self._demodulate_to_unchecked(iq_samples, demodulation_type, ted_type, preamble_threshold, CRC_included)
+        )
+
+    def _demodulate_to_unchecked(
+        self,
+        iq_samples: np.ndarray,
+        demodulation_type: DemodulationType = "BAND_PASS",
+        ted_type: TEDType = "GARDNER",
+        preamble_threshold: int = 12,
+        CRC_included: bool = True,
+    ) -> list[_UncheckedPacket]:
+        count_packets()  # Denominator of the time per packet of the stage timing
         bit_samples = self.demodulate(
             iq_samples, demodulation_type=demodulation_type, ted_type=ted_type
         )  # From IQ samples to hard decisions
-        received_packets: list[dict] = self.process_phy_packet(
-            bit_samples, CRC_included=CRC_included, preamble_threshold=preamble_threshold
-        )  # From hard decisions to packets
+        return self._read_packets(bit_samples, preamble_threshold, CRC_included)  # From hard decisions to packets
 
-        return received_packets
+    # Receives IQ data chunk by chunk and yields the hard decisions of each chunk.
+    def demodulate_stream(
+        self,
+        iq_chunks: Iterable[np.ndarray],
+        demodulation_type: DemodulationType = "BAND_PASS",
+        ted_type: TEDType = "GARDNER",
+    ) -> Iterator[np.ndarray]:
+        """Receives IQ data chunk by chunk and yields the hard decisions of each chunk (see StreamingFSKDemodulator)."""
+        demodulator = StreamingFSKDemodulator(
+            self.fs,
+            self.spc,
+            self.fsk_deviation,
+            lowpass_taps=self.hss_taps,
+            bandpass_taps=self.rect_taps,
+            post_demodulation_taps=self.rect_taps,
+            demodulation_type=demodulation_type,
+            ted_type=ted_type,
+            **self._symbol_sync_parameters(),
+        )
+        yield from demodulator.stream(self._channel_select_stream(iq_chunks))
+
+    # Receives IQ data chunk by chunk and yields the detected packets as they complete.
+    def demodulate_to_packet_stream(
+        self,
+        iq_chunks: Iterable[np.ndarray],
+        demodulation_type: DemodulationType = "BAND_PASS",
+        ted_type: TEDType = "GARDNER",
+        preamble_threshold: int = 12,
+        CRC_included: bool = True,
+    ) -> Iterator[dict]:
+        """
+        Receives IQ data chunk by chunk and yields the detected packets as they complete.
+        Same packets as demodulate_to_packet() with constant memory, e.g. for long captures or live streams.
+        """
+        yield from self._stream_packets(
+            self.demodulate_stream(iq_chunks, demodulation_type=demodulation_type, ted_type=ted_type),
+            find_preambles=lambda chips: preamble_detection_802154(chips, preamble_threshold, self.chip_mapping),
+            decode_packet=lambda chips, preamble: self._decode_packet(chips, preamble, CRC_included=CRC_included),
+            preamble_span=5 * 64,  # Preamble and SFD, 64 chips per byte
+            packet_span=(1 + self.max_packet_len) * 64,  # Length byte and longest payload
+        )
 
 
 def adc_quantise(iq: np.ndarray, vmax: float, bits: int) -> np.ndarray:
@@ -1,7 +1,9 @@
 import click
 import numpy as np
 from sic_simulator import SimulationConfig, SimulatorSIC
-from data_io import sic_save_simulation
+from data_io import SICResultsStore, sic_save_simulation
+from snr_related import wilson_interval
+import stage_timing
 
 
 @click.command()
@@ -22,7 +24,44 @@ from data_io import sic_save_simulation
 @click.option("--payload-len-low", default=200, type=int, help="Bytes in low-power payload.")
 @click.option("--num-trials", default=4, type=int, help="Number of Monte Carlo trials.")
 @click.option("--sampling-rate", default=10e6, type=float, help="Sampling rate in samples/second")
-def run_simulation(protocol_high, protocol_low, ble_rate, payload_len_high, payload_len_low, num_trials, sample_rate):
+@click.option(
+    "--search",
+    default="CROSS_AMBIGUITY",
+    type=click.Choice(["BRUTE_FORCE", "CROSS_AMBIGUITY", "INTERPOLATED"]),
+    help="Interference parameter estimation strategy.",
+)
+@click.option("--fractional-delay", is_flag=True, help="Sub-sample delay estimation and subtraction.")
+@click.option(
+    "--resume/--no-resume",
+    default=False,
+    help="Save finished trials incrementally and resume from previous runs with the same configuration.",
+)
+@click.option(
+    "--ci-width",
+    default=None,
+    type=float,
+    help="Adaptive mode: stop each cell once its 95% PDR intervals are this wide (num-trials is then the maximum).",
+)
+@click.option(
+    "--stage-timing",
+    "stage_timing_report",
+    is_flag=True,
+    help="Time the receiver and SIC stages and print a report at the end.",
+)
+def run_simulation(
+    protocol_high,
+    protocol_low,
+    ble_rate,
+    payload_len_high,
+    payload_len_low,
+    num_trials,
+    sample_rate,
+    search,
+    fractional_delay,
+    resume,
+    ci_width,
+    stage_timing_report,
+):
     cfg = SimulationConfig(
         sample_rate=sample_rate,  # Samples per second
         protocol_high=protocol_high,  # BLE or IEEE 802.15.4
@@ -45,18 +84,42 @@ def run_simulation(protocol_high, protocol_low, ble_rate, payload_len_high, payl
         adc_bits=12,  # ADC resolution in bits
         adc_vmax=1.0,  # Maximum ADC input amplitude
         padding=500,  # Zero-pad the generated signals before adding them to ensure equal length
+        search=search,  # Interference parameter estimation strategy
+        fractional_delay=fractional_delay,  # Sub-sample delay estimation and subtraction
     )
 
     high_power_db = -6  # dB, around 0.707 amplitude
     low_powers_db = np.arange(-6, -20, -1)  # dB, up to around 0.1 amplitude
     snr_lows_db = np.arange(0, 15, 2)  # dB
 
+    stage_timing.enable(stage_timing_report)
     simulator = SimulatorSIC(cfg)
-    pdr: np.ndarray = simulator.run_monte_carlo_parallel(
-        high_power_db, low_powers_db, snr_lows_db, num_trials=num_trials
+    store = SICResultsStore(cfg, folder="./sic_simulations") if resume else None  # Checkpoints keyed by cfg hash
+    pdr, successes, trials = simulator.run_monte_carlo_parallel(
+        high_power_db,
+        low_powers_db,
+        snr_lows_db,
+        num_trials=num_trials,
+        store=store,
+        ci_width=ci_width,
+        return_counts=True,
+    )
+    pdr_interval = np.array(wilson_interval(successes, trials))  # Shape (2, 2, Powers, SNRs)
+
+    sic_save_simulation(
+        cfg,
+        high_power_db,
+        low_powers_db,
+        snr_lows_db,
+        num_trials,
+        pdr,
+        folder="./sic_simulations",
+        trials=trials,
+        pdr_interval=pdr_interval,
     )
 
-    sic_save_simulation(cfg, high_power_db, low_powers_db, snr_lows_db, num_trials, pdr, folder="./sic_simulations")
+    if stage_timing_report:
+        print(stage_timing.report())
 
 
 if __name__ == "__main__":
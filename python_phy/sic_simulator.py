@@ -1,16 +1,24 @@
 from dataclasses import dataclass
+import os
 import numpy as np
-from typing import Type
-import matplotlib.pyplot as plt
+from typing import TYPE_CHECKING, Type
 
 from receiver import Receiver, ReceiverType, ReceiverBLE, Receiver802154, adc_quantise
 from transmitter import Transmitter, TransmitterBLE, Transmitter802154
-from interference_utils import multiply_by_complex_exponential, subtract_interference_wrapper
-from snr_related import add_white_gaussian_noise
-from filters import fractional_delay_fir_filter
-from visualisation import subplots_iq
+from interference_utils import (
+    SearchStrategy,
+    multiply_by_complex_exponential,
+    subtract_interference_batch,
+    subtract_interference_wrapper,
+)
+from snr_related import add_white_gaussian_noise, wilson_interval
+import stage_timing
+from filters import fractional_delay_fir_filter, fractional_delay_fir_filter_batch
 from tqdm import tqdm
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+if TYPE_CHECKING:
+    from data_io import SICResultsStore
 
 
 @dataclass
@@ -38,6 +46,9 @@ class SimulationConfig:
     adc_bits: int = 12  # ADC resolution in bits
     adc_vmax: float = 1.0  # Maximum ADC input amplitude
     padding: int = 500  # Zero-pad the generated signals before adding them to ensure equal length
+    search: SearchStrategy = "CROSS_AMBIGUITY"  # Interference parameter estimation, "INTERPOLATED" skips the fine grid
+    fractional_delay: bool = False  # Estimate and subtract the interference with a sub-sample delay
+    batch_size: int = 16  # Trials simulated together by simulate_trials() (bounds the memory of each batch)
 
 
 class SimulatorSIC:
@@ -100,16 +111,55 @@ class SimulatorSIC:
         phase = phase if phase is not None else np.random.uniform(0, 2 * np.pi)
         return multiply_by_complex_exponential(iq, self.cfg.sample_rate, freq_offset, phase, amplitude)
 
-    # Helper function to equalise the size of two arrays
+    # Wrapper to generate baseband IQ samples for a batch of payloads, with random offsets drawn for each packet.
+    def _generate_signal_batch(
+        self,
+        payloads: np.ndarray,  # Shape (trials, payload bytes)
+        transmitter: Transmitter,
+        amplitude: float,
+        freq_offset: float,
+        phase: float,
+        zero_padding: int,
+    ) -> np.ndarray:  # Shape (trials, samples)
+        """
+        Wrapper to generate baseband IQ samples for a batch of payloads, with random offsets drawn for each packet.
+        """
+        iq = transmitter.modulate_from_payload_batch(payloads, zero_padding=zero_padding)  # Unit amplitude baseband
+        num_trials = len(payloads)
+        freq_offset = (
+            np.full(num_trials, freq_offset)
+            if freq_offset is not None
+            else np.random.uniform(self.cfg.freq_offset_range.start, self.cfg.freq_offset_range.stop, num_trials)
+        )
+        phase = np.full(num_trials, phase) if phase is not None else np.random.uniform(0, 2 * np.pi, num_trials)
+        return multiply_by_complex_exponential(
+            iq, self.cfg.sample_rate, freq_offset[:, np.newaxis], phase[:, np.newaxis], amplitude
+        )
+
+    # Helper function to equalise the size of two arrays (along the last axis)
     def _zero_padding(self, array1: np.ndarray, array2: np.ndarray, padding: int) -> tuple[np.ndarray, np.ndarray]:
-        target_length = max(len(array1), len(array2)) + padding
+        target_length = max(array1.shape[-1], array2.shape[-1]) + padding
 
         # Add left and right padding to match target length
-        array1 = np.pad(array1, (padding, target_length - len(array1)))
-        array2 = np.pad(array2, (padding, target_length - len(array2)))
+        array1 = np.pad(array1, [(0, 0)] * (array1.ndim - 1) + [(padding, target_length - array1.shape[-1])])
+        array2 = np.pad(array2, [(0, 0)] * (array2.ndim - 1) + [(padding, target_length - array2.shape[-1])])
 
         return array1, array2
 
+    # Helper function to demodulate the first packet of each row, treating any exception as no packet received
+    def _demodulate_first_packets(self, receiver: Receiver, rx_iq: np.ndarray) -> list[dict | None]:
+        try:
+            received_batch: list[list[dict]] = receiver.demodulate_to_packet_batch(rx_iq)  # All CRCs in one pass
+        except Exception:  # Find the failing rows one by one
+            received_batch = []
+            for iq in rx_iq:
+                try:
+                    received_packets: list[dict] = receiver.demodulate_to_packet(iq)
+                except Exception:
+                    received_packets: list[dict] = []
+                received_batch.append(received_packets)
+        return [received_packets[0] if received_packets else None for received_packets in received_batch]
+
     # Run a single trial of SIC. Returns tuple: (delivery_success_high, delivery_success_low)
     def simulate_single_trial(
         self, amplitude_high: float, amplitude_low: float, snr_low_db: float = None, *, verbose: bool = False
@@ -176,10 +226,14 @@ class SimulatorSIC:
                 self.cfg.freq_offset_range,
                 fine_step=self.cfg.fine_step,
                 fine_window=self.cfg.fine_window,
+                search=self.cfg.search,
+                fractional_delay=self.cfg.fractional_delay,
                 verbose=verbose,
             )
 
             if verbose:
+                from visualisation import subplots_iq  # Plotting (matplotlib) only loaded when needed
+
                 subplots_iq(
                     [rx_iq, rx_iq - subtracted_iq, subtracted_iq],
                     self.cfg.sample_rate,
@@ -210,17 +264,114 @@ class SimulatorSIC:
 
         return success_high, success_low
 
-    # Sweep over the power and SNR of the low-power signal, and compute the PDR for both the high-power and low-power signals.
+    # Run a batch of SIC trials at once. Returns arrays: (delivery_success_high, delivery_success_low), shape (trials,)
+    def simulate_trials(
+        self, amplitude_high: float, amplitude_low: float, snr_low_db: float = None, num_trials: int = 1
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Run a batch of SIC trials at once.
+        Returns arrays: (delivery_success_high, delivery_success_low), shape (trials,)
+        Same trial as simulate_single_trial() on a (trials, samples) matrix: modulation, fractional delays, noise,
+        ADC quantisation, interference parameter search and subtraction are computed for all trials together.
+        Only the demodulation (packet detection and decoding) runs packet by packet, with the CRCs of all trials checked
+        in one pass.
+        """
+        # Generate payloads outside _generate_signal_batch() method in case we want to compute BER in the future
+        payloads_high = np.random.randint(0, 256, size=(num_trials, self.cfg.payload_len_high), dtype=np.uint8)
+        payloads_low = np.random.randint(0, 256, size=(num_trials, self.cfg.payload_len_low), dtype=np.uint8)
+
+        # Generate IQ signals independently
+        zero_padding: int = 10 + int(
+            np.ceil(np.max(self.cfg.sample_shift_range_low + self.cfg.sample_shift_range_high))
+        )  # Ensures no information loss/cropping
+        iq_high = self._generate_signal_batch(
+            payloads_high,
+            self.transmitter_high,
+            amplitude_high,
+            self.cfg.freq_high,
+            self.cfg.phase_high,
+            zero_padding,
+        )
+        iq_low = self._generate_signal_batch(
+            payloads_low,
+            self.transmitter_low,
+            amplitude_low,
+            self.cfg.freq_low,
+            self.cfg.phase_low,
+            zero_padding,
+        )
+
+        # Mix and add noise, with a random fractional delay for every signal of every trial
+        iq_high = fractional_delay_fir_filter_batch(
+            iq_high, np.random.uniform(*self.cfg.sample_shift_range_high, num_trials)
+        )
+        iq_low = fractional_delay_fir_filter_batch(
+            iq_low, np.random.uniform(*self.cfg.sample_shift_range_low, num_trials)
+        )
+        iq_high, iq_low = self._zero_padding(iq_high, iq_low, padding=self.cfg.padding)  # Ensure same signals length
+
+        # O-QPSK and FSK modulated signals' power is their amplitude squared
+        noise_power = self.cfg.amplitude_low**2 / (10 ** (snr_low_db / 10))
+        rx_iq: np.ndarray = add_white_gaussian_noise(iq_high + iq_low, noise_power, noise_power_db=False)
+
+        rx_iq = adc_quantise(rx_iq, self.cfg.adc_vmax, self.cfg.adc_bits)  # Simulate ADC quantisation
+
+        # Demodulate high-power signals first
+        packets_high = self._demodulate_first_packets(self.receiver_high, rx_iq)
+        success_high = np.array([packet is not None and bool(packet["crc_check"]) for packet in packets_high])
+
+        # Synthesise the high-power signals and subtract, even with wrong CRC check. Trials are grouped by decoded
+        # payload length so that each group is synthesised and subtracted as one batch
+        subtracted_iq = rx_iq.copy()  # Trials without a high-power packet try the low-power signal directly
+        payload_lengths = {len(packet["payload"]) for packet in packets_high if packet is not None}
+        for payload_length in payload_lengths:
+            trials = [
+                idx
+                for idx, packet in enumerate(packets_high)
+                if packet is not None and len(packet["payload"]) == payload_length
+            ]
+            synth_high_iq = self.transmitter_high.modulate_from_payload_batch(
+                np.stack([packets_high[idx]["payload"] for idx in trials])
+            )
+            subtracted_iq[trials] = subtract_interference_batch(
+                rx_iq[trials],
+                synth_high_iq,
+                self.cfg.sample_rate,
+                self.cfg.freq_offset_range,
+                fine_step=self.cfg.fine_step,
+                fine_window=self.cfg.fine_window,
+                search=self.cfg.search,
+                fractional_delay=self.cfg.fractional_delay,
+            )
+
+        # Demodulate low-power signals
+        packets_low = self._demodulate_first_packets(self.receiver_low, subtracted_iq)
+        success_low = np.array([packet is not None and bool(packet["crc_check"]) for packet in packets_low])
+
+        return success_high, success_low
+
+    # Sweep over the power and SNR of the low-power signal,
+    # and compute the PDR for both the high-power and low-power signals.
     def run_monte_carlo(
         self,
         high_power_db: float,
         low_powers_db: np.ndarray,  # Shape (Powers,)
         snr_lows_db: np.ndarray,  # Shape (SNRs,)
         *,
-        num_trials: int,
-    ) -> np.ndarray:  # Shape (2, Powers, SNRs)
+        num_trials: int,  # Trials per cell (maximum trials per cell if ci_width is given)
+        store: "SICResultsStore | None" = None,  # Resume from, and save every finished chunk to, this results store
+        ci_width: float | None = None,  # Stop a cell once both PDR confidence intervals are at most this wide
+        confidence: float = 0.95,  # Confidence level of the Wilson intervals for ci_width
+        chunk_size: int = None,  # Trials between stopping checks, defaults to all trials (4 batches if ci_width)
+        return_counts: bool = False,
+    ) -> np.ndarray | tuple[np.ndarray, np.ndarray, np.ndarray]:  # Shape (2, Powers, SNRs) [, same, (Powers, SNRs)]
         """
-        Sweep over the power and SNR of the low-power signal and compute the PDR for both the high- and low-power signals.
+        Sweep over the power and SNR of the low-power signal
+        and compute the PDR for both the high- and low-power signals.
+        With a store, only the trials missing to reach num_trials are simulated in each cell, and the PDR is computed
+        from all the stored trials of the cell (possibly more than num_trials).
+        With ci_width (adaptive mode), trials run in chunks and a cell stops as soon as the Wilson intervals of both
+        PDRs are at most ci_width wide: saturated cells (PDR 0 or 1) need far fewer trials than cells on the waterfall.
 
         Returns
         -------
@@ -230,10 +381,13 @@ class SimulatorSIC:
             - Axis 1 (Powers): swept values for power differences
             - Axis 2 (SNRs): SNR values relative to the low-power signal
             Each pdr estimation is (num_successes / num_trials).
+        successes : np.ndarray
+            Only if return_counts. Shape (2, Powers, SNRs), the integer number of successes of every pdr estimation.
+        trials : np.ndarray
+            Only if return_counts. Shape (Powers, SNRs), the number of trials of every pdr estimation.
         """
-        Powers = low_powers_db.size
-        SNRs = snr_lows_db.size
-        pdr = np.empty((2, Powers, SNRs), dtype=float)
+        successes, trials_done = self._stored_counts(store, high_power_db, low_powers_db, snr_lows_db)
+        chunk_size = chunk_size or (num_trials if ci_width is None else 4 * self.cfg.batch_size)
 
         # Power dB -> amplitude
         high_amplitude: float = 10 ** (high_power_db / 20)
@@ -245,14 +399,20 @@ class SimulatorSIC:
 
         for idx_power, amp_low in enumerate(low_amplitudes):
             for idx_snr, snr_low in enumerate(snr_lows_db):
-                pdr_high, pdr_low = _worker_task(self, high_amplitude, amp_low, snr_low, num_trials)
-                pdr[0, idx_power, idx_snr] = pdr_high
-                pdr[1, idx_power, idx_snr] = pdr_low
+                cell = (idx_power, idx_snr)
+                while trials := _next_chunk_trials(
+                    successes[:, cell[0], cell[1]], trials_done[cell], 0, num_trials, chunk_size, ci_width, confidence
+                ):
+                    chunk_successes = _count_successes(self, high_amplitude, amp_low, snr_low, trials)
+                    successes[:, cell[0], cell[1]] += chunk_successes
+                    trials_done[cell] += trials
+                    if store is not None:
+                        store.add(high_power_db, low_powers_db[idx_power], snr_low, *chunk_successes, trials)
 
                 progress_bar.update(1)
 
         progress_bar.close()
-        return pdr
+        return _pdr_from_counts(successes, trials_done, return_counts)
 
     def run_monte_carlo_parallel(
         self,
@@ -260,11 +420,22 @@ class SimulatorSIC:
         low_powers_db: np.ndarray,  # Shape (Powers,)
         snr_lows_db: np.ndarray,  # Shape (SNRs,)
         *,
-        num_trials: int,
+        num_trials: int,  # Trials per cell (maximum trials per cell if ci_width is given)
         max_workers: int = None,  # defaults to number of CPUs
-    ) -> np.ndarray:  # Shape (2, Powers, SNRs)
+        chunk_size: int = None,  # Trials per task, defaults to 4 batches of cfg.batch_size
+        store: "SICResultsStore | None" = None,  # Resume from, and save every finished chunk to, this results store
+        ci_width: float | None = None,  # Stop a cell once both PDR confidence intervals are at most this wide
+        confidence: float = 0.95,  # Confidence level of the Wilson intervals for ci_width
+        return_counts: bool = False,
+    ) -> np.ndarray | tuple[np.ndarray, np.ndarray, np.ndarray]:  # Shape (2, Powers, SNRs) [, same, (Powers, SNRs)]
         """
-        Sweep over the power and SNR of the low-power signal and compute the PDR for both the high- and low-power signals.
+        Sweep over the power and SNR of the low-power signal
+        and compute the PDR for both the high- and low-power signals.
+        Every (power, SNR) cell is split into chunks of trials, scheduled round-robin across cells so that slow cells
+        (near the cancellation threshold) are spread over all workers. The simulator is sent once to each worker.
+        With a store or ci_width, as run_monte_carlo(). In adaptive mode (ci_width), only a few chunks of each cell
+        are in flight at once, and a new one is submitted when a chunk finishes and the cell has not converged.
+        With stage timing enabled (stage_timing.enable()), the totals of the workers are merged into this process.
 
         Returns
         -------
@@ -274,64 +445,170 @@ class SimulatorSIC:
             - Axis 1 (Powers): swept values for power differences
             - Axis 2 (SNRs): SNR values relative to the low-power signal
             Each pdr estimation is (num_successes / num_trials).
+        successes : np.ndarray
+            Only if return_counts. Shape (2, Powers, SNRs), the integer number of successes of every pdr estimation.
+        trials : np.ndarray
+            Only if return_counts. Shape (Powers, SNRs), the number of trials of every pdr estimation.
         """
         Powers: int = low_powers_db.size
         SNRs: int = snr_lows_db.size
-        pdr: np.ndarray = np.empty((2, Powers, SNRs), dtype=float)
+        successes, trials_done = self._stored_counts(store, high_power_db, low_powers_db, snr_lows_db)
+        trials_pending: np.ndarray = np.zeros((Powers, SNRs), dtype=int)  # Trials submitted but not finished
+        chunk_size = chunk_size or 4 * self.cfg.batch_size
+
+        # Chunks in flight per cell: all of them, or in adaptive mode enough to keep every worker busy
+        max_workers = max_workers or os.cpu_count() or 1
+        max_chunks = -(-num_trials // chunk_size) if ci_width is None else -(-2 * max_workers // (Powers * SNRs))
 
         # Power dB -> amplitude
         high_amplitude: float = 10 ** (high_power_db / 20)
         low_amplitudes: np.ndarray = 10 ** (low_powers_db / 20)
 
-        # Prepare task tuples: (sim_obj, amplitude_high, amplitude_low, snr_low_db, num_trials, idx_power, idx_snr)
-        tasks = [
-            (self, high_amplitude, amp_low, snr_low_db, num_trials, idx_power, idx_snr)
-            for idx_power, amp_low in enumerate(low_amplitudes)
-            for idx_snr, snr_low_db in enumerate(snr_lows_db)
-        ]
-
-        with ProcessPoolExecutor(max_workers=max_workers) as executor:
-            futures = {
-                executor.submit(
-                    _worker_task,
-                    sim_obj,
-                    amplitude_high,
-                    amplitude_low,
-                    snr_low_db,
-                    num_trials,
-                ): (idx_power, idx_snr)
-                for sim_obj, amplitude_high, amplitude_low, snr_low_db, num_trials, idx_power, idx_snr in tasks
-            }
-
-            for future in tqdm(
-                as_completed(futures),
-                total=len(futures),
+        def _next_chunk(cell: tuple[int, int]) -> int:
+            return _next_chunk_trials(
+                successes[:, cell[0], cell[1]],
+                trials_done[cell],
+                trials_pending[cell],
+                num_trials,
+                chunk_size,
+                ci_width,
+                confidence,
+            )
+
+        with ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_worker, initargs=(self, stage_timing.is_enabled())
+        ) as executor:
+            futures = {}
+
+            def _submit(cell: tuple[int, int], trials: int) -> None:
+                amp_low, snr_low_db = low_amplitudes[cell[0]], snr_lows_db[cell[1]]
+                futures[executor.submit(_worker_chunk, high_amplitude, amp_low, snr_low_db, trials)] = (trials, cell)
+                trials_pending[cell] += trials
+
+            # The first chunk of every cell goes first
+            for _ in range(max_chunks):
+                for cell in np.ndindex(Powers, SNRs):
+                    if trials := _next_chunk(cell):
+                        _submit(cell, trials)
+
+            progress_bar = tqdm(
+                total=Powers * SNRs,
+                initial=np.count_nonzero(trials_pending == 0),
                 desc="Simulating",
+                unit="cell",
                 mininterval=5.0,
-            ):
-                idx_power, idx_snr = futures[future]
-                p_high, p_low = future.result()
-                pdr[0, idx_power, idx_snr] = p_high
-                pdr[1, idx_power, idx_snr] = p_low
-
-        return pdr
-
-
-def _worker_task(
+            )
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    trials, cell = futures.pop(future)
+                    chunk_successes, chunk_timing = future.result()
+                    stage_timing.merge(chunk_timing)  # Stage timing totals of all workers, in this process
+                    successes[:, cell[0], cell[1]] += chunk_successes
+                    trials_done[cell] += trials
+                    trials_pending[cell] -= trials
+                    if store is not None:
+                        store.add(high_power_db, low_powers_db[cell[0]], snr_lows_db[cell[1]], *chunk_successes, trials)
+
+                    if next_trials := _next_chunk(cell):
+                        _submit(cell, next_trials)
+                    elif trials_pending[cell] == 0:  # Cell finished
+                        progress_bar.update(1)
+                progress_bar.set_postfix_str(f"{np.sum(trials_done)} trials", False)
+            progress_bar.close()
+
+        return _pdr_from_counts(successes, trials_done, return_counts)
+
+    # Success and trial counts already in the store for every cell (zeros without a store)
+    def _stored_counts(
+        self,
+        store: "SICResultsStore | None",
+        high_power_db: float,
+        low_powers_db: np.ndarray,
+        snr_lows_db: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray]:  # Shapes (2, Powers, SNRs), (Powers, SNRs)
+        successes = np.zeros((2, low_powers_db.size, snr_lows_db.size), dtype=int)
+        trials = np.zeros((low_powers_db.size, snr_lows_db.size), dtype=int)
+        if store is not None:
+            for idx_power, idx_snr in np.ndindex(trials.shape):
+                counts = store.counts(high_power_db, low_powers_db[idx_power], snr_lows_db[idx_snr])
+                successes[:, idx_power, idx_snr] = counts[:2]
+                trials[idx_power, idx_snr] = counts[2]
+        return successes, trials
+
+
+# Trials of the next chunk of a cell: 0 once it has num_trials trials (finished or pending) or its intervals converged
+def _next_chunk_trials(
+    successes: np.ndarray,  # Shape (2,), successes of the high- and low-power signals
+    trials: int,
+    trials_pending: int,
+    num_trials: int,
+    chunk_size: int,
+    ci_width: float | None,
+    confidence: float,
+) -> int:
+    """
+    Trials of the next chunk of a cell: 0 once it has num_trials trials (finished or pending) or, if ci_width is given,
+    once the Wilson intervals of both PDRs are at most ci_width wide.
+    """
+    if ci_width is not None and trials > 0:
+        lower, upper = wilson_interval(successes, trials, confidence)
+        if np.all(upper - lower <= ci_width):
+            return 0
+    return int(max(0, min(chunk_size, num_trials - trials - trials_pending)))
+
+
+# PDR of every cell from its success and trial counts, NaN for cells without trials
+def _pdr_from_counts(
+    successes: np.ndarray, trials: np.ndarray, return_counts: bool
+) -> np.ndarray | tuple[np.ndarray, np.ndarray, np.ndarray]:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pdr = successes / trials
+    return (pdr, successes, trials) if return_counts else pdr
+
+
+# Counts the successes of num_trials trials for a single (amp_low, snr_low_db), in batches of cfg.batch_size trials.
+def _count_successes(
     sim_obj: SimulatorSIC, amp_high: float, amp_low: float, snr_low_db: float, num_trials: int
-) -> tuple[float, float]:
-    """Worker that runs num_trials for a single (amp_low, snr_low_db)."""
+) -> tuple[int, int]:
+    """Counts the successes of num_trials trials for a single (amp_low, snr_low_db), in batches of cfg.batch_size."""
     num_successes_high: int = 0
     num_successes_low: int = 0
-    for _ in range(num_trials):
-        success_high, success_low = sim_obj.simulate_single_trial(
+    for first in range(0, num_trials, sim_obj.cfg.batch_size):
+        success_high, success_low = sim_obj.simulate_trials(
             amplitude_high=amp_high,
             amplitude_low=amp_low,
             snr_low_db=snr_low_db,
+            num_trials=min(sim_obj.cfg.batch_size, num_trials - first),
         )
-        num_successes_high += int(success_high)
-        num_successes_low += int(success_low)
-    return num_successes_high / num_trials, num_successes_low / num_trials
+        num_successes_high += int(np.count_nonzero(success_high))
+        num_successes_low += int(np.count_nonzero(success_low))
+    return num_successes_high, num_successes_low
+
+
+# Simulator of each worker process of run_monte_carlo_parallel(), set once by _init_worker()
+_worker_simulator: SimulatorSIC | None = None
+
+
+def _init_worker(sim_obj: SimulatorSIC, timing: bool = False) -> None:
+    """
+    Worker initialiser: keeps the simulator received once per process, and reseeds the random generator.
+    timing enables the stage timing of the worker, as in the parent process.
+    """
+    global _worker_simulator
+    _worker_simulator = sim_obj
+    np.random.seed()  # Forked workers would otherwise draw the same trials
+    stage_timing.enable(timing)
+    stage_timing.reset()  # Forked workers would otherwise also report the parent's totals
+
+
+def _worker_chunk(amp_high: float, amp_low: float, snr_low_db: float, num_trials: int) -> tuple[tuple[int, int], dict]:
+    """
+    Worker that runs a chunk of num_trials for a single (amp_low, snr_low_db).
+    Returns the success counts, and the stage timing totals of the chunk (stage_timing.snapshot()).
+    """
+    counts = _count_successes(_worker_simulator, amp_high, amp_low, snr_low_db, num_trials)
+    return counts, stage_timing.snapshot(reset_totals=True)
 
 
 if __name__ == "__main__":
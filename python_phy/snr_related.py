@@ -1,6 +1,5 @@
 import numpy as np
 import scipy
-from gnuradio import digital, blocks, gr, analog, channels
 
 
 def qfunc(x: float) -> float:
@@ -20,19 +19,40 @@ def theoretical_pdr(SNR_dB: float, PDU_bytes: int = 124) -> float:
     return PDR
 
 
+# Wilson score interval of a packet delivery ratio estimated from `successes` out of `trials`
+def wilson_interval(
+    successes: int | np.ndarray, trials: int | np.ndarray, confidence: float = 0.95
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Wilson score interval of a packet delivery ratio estimated from `successes` out of `trials`. Works element-wise.
+    Returns (lower, upper) bounds, (0, 1) where there are no trials. Unlike the normal approximation, the interval
+    does not collapse to zero width when the ratio is 0 or 1.
+    """
+    successes, trials = np.asarray(successes, dtype=float), np.asarray(trials, dtype=float)
+    z2 = scipy.special.ndtri(0.5 + confidence / 2) ** 2  # Normal quantile, as scipy.stats.norm.ppf()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = successes / trials
+        denominator = 1 + z2 / trials
+        centre = (ratio + z2 / (2 * trials)) / denominator
+        half_width = np.sqrt(z2 * ratio * (1 - ratio) / trials + z2**2 / (4 * trials**2)) / denominator
+    lower = np.where(trials > 0, np.clip(centre - half_width, 0, 1), 0.0)
+    upper = np.where(trials > 0, np.clip(centre + half_width, 0, 1), 1.0)
+    return lower, upper
+
+
 # Adds white Gaussian noise to a signal (complex or real)
 def add_white_gaussian_noise(signal: np.ndarray, noise_power: float, noise_power_db: bool = True) -> np.ndarray:
-    """Adds white noise to a signal (complex or real)."""
+    """Adds white noise to a signal (complex or real). Also works on a 2D batch of signals (packets, samples)."""
     if noise_power_db:
         noise_power = 10 ** (noise_power / 10)
     if np.iscomplexobj(signal):
         # Half the power in I and Q components respectively
         noise = np.sqrt(noise_power) * (
-            np.random.normal(0, np.sqrt(2) / 2, len(signal)) + 1j * np.random.normal(0, np.sqrt(2) / 2, len(signal))
+            np.random.normal(0, np.sqrt(2) / 2, signal.shape) + 1j * np.random.normal(0, np.sqrt(2) / 2, signal.shape)
         )
     else:
         # White Gaussian noise power is equal to its variance
-        noise = np.sqrt(noise_power) * np.random.normal(0, 1, len(signal))
+        noise = np.sqrt(noise_power) * np.random.normal(0, 1, signal.shape)
     return signal + noise
 
 def compute_snr_from_pearson(signal: np.ndarray, noisy_signal: np.ndarray, snr_db: bool = True) -> float:
@@ -83,6 +103,7 @@ def flat_fader_impl(
 ) -> np.ndarray:
     
     """Fading channel model from gnuradio."""
+    from gnuradio import blocks, gr, channels
 
     # Convert NumPy array to GNU Radio format
     src = blocks.vector_source_c(input_samples.tolist(), False, 1, [])
@@ -0,0 +1,118 @@
+import contextlib
+import os
+import time
+
+# Pipeline stages in report order (stages timed under other names are reported after these)
+STAGES: tuple[str, ...] = (
+    "channeliser",
+    "channel_select",
+    "resample",
+    "matched_filter",
+    "squelch",
+    "discriminator",
+    "symbol_sync",
+    "access_code_search",
+    "despreading",
+    "crc",
+    "interference_search",
+    "interference_subtraction",
+)
+
+# Disabled unless enable() is called or the SDR_STAGE_TIMING environment variable is set (and not "0")
+_enabled: bool = os.environ.get("SDR_STAGE_TIMING", "0") not in ("", "0")
+
+# Per-process totals: [calls, seconds, samples] of every stage, and number of packets (receptions)
+_stages: dict[str, list] = {}
+_packets: int = 0
+
+_disabled_stage = contextlib.nullcontext()  # Shared, so that a disabled stage costs one function call
+
+
+# Enable or disable stage timing in this process.
+def enable(enabled: bool = True) -> None:
+    """Enable or disable stage timing in this process. Worker processes are enabled through their initialisers."""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+# Clear the totals of this process.
+def reset() -> None:
+    global _packets
+    _stages.clear()
+    _packets = 0
+
+
+# Context manager that adds the time spent in its block to a stage, with the number of samples processed.
+def stage(name: str, samples: int = 0) -> contextlib.AbstractContextManager:
+    """
+    Context manager that adds the time spent in its block to a stage, with the number of samples processed.
+    Samples are IQ samples for the front-end stages, hard decisions for the access code search and despreading,
+    and bytes for the CRC. Does nothing while stage timing is disabled.
+    """
+    if not _enabled:
+        return _disabled_stage
+    return _timed_stage(name, samples)
+
+
+@contextlib.contextmanager
+def _timed_stage(name: str, samples: int):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        totals = _stages.setdefault(name, [0, 0.0, 0])
+        totals[0] += 1
+        totals[1] += time.perf_counter() - start
+        totals[2] += int(samples)
+
+
+# Count processed packets (one per demodulate_to_packet() call), the denominator of the time per packet.
+def count_packets(num_packets: int = 1) -> None:
+    global _packets
+    if _enabled:
+        _packets += num_packets
+
+
+# Totals of this process, picklable so that worker processes can return them. Optionally reset them.
+def snapshot(reset_totals: bool = False) -> dict:
+    """
+    Totals of this process, picklable so that worker processes can return them. Optionally reset them, so that
+    consecutive snapshots of a worker can all be merged without counting any stage twice.
+    Returns {"packets": int, "stages": {name: [calls, seconds, samples]}}.
+    """
+    totals = {"packets": _packets, "stages": {name: list(values) for name, values in _stages.items()}}
+    if reset_totals:
+        reset()
+    return totals
+
+
+# Add the totals of another process (a snapshot()) to the totals of this process.
+def merge(totals: dict) -> None:
+    global _packets
+    _packets += totals["packets"]
+    for name, values in totals["stages"].items():
+        own = _stages.setdefault(name, [0, 0.0, 0])
+        for idx, value in enumerate(values):
+            own[idx] += value
+
+
+# Table with the calls, total time, throughput (samples/s) and time per packet of every stage.
+def report(totals: dict | None = None) -> str:
+    """Table with the calls, total time, throughput (samples/s) and time per packet of every stage (this process if
+    totals is None, with the workers' snapshots merged)."""
+    totals = snapshot() if totals is None else totals
+    stages = totals["stages"]
+    names = [name for name in STAGES if name in stages] + sorted(set(stages) - set(STAGES))
+
+    lines = [f"{'Stage':<26}{'Calls':>10}{'Total (s)':>12}{'Samples/s':>14}{'ms/packet':>12}"]
+    for name in names:
+        calls, seconds, samples = stages[name]
+        throughput = f"{samples / seconds:.3g}" if seconds > 0 and samples > 0 else "-"
+        per_packet = f"{1e3 * seconds / totals['packets']:.3f}" if totals["packets"] > 0 else "-"
+        lines.append(f"{name:<26}{calls:>10}{seconds:>12.3f}{throughput:>14}{per_packet:>12}")
+    lines.append(f"{totals['packets']} packets")
+    return "\n".join(lines)
@@ -0,0 +1,79 @@
+import functools
+import importlib.util
+from unittest import mock
+
+import click
+import numpy as np
+
+import receiver
+from demodulation import symbol_sync, symbol_sync_gnuradio
+from receiver import ReceiverBLE, Receiver802154
+from transmitter import TransmitterBLE, Transmitter802154
+
+_protocols = {"ble": (TransmitterBLE, ReceiverBLE), "802154": (Transmitter802154, Receiver802154)}
+
+
+# Packets decoded with each symbol synchroniser, for every start offset of the packets in the capture.
+def decoded_packets(
+    protocol: str, fs: float, offsets: range, trials: int, noise: float, synchronisers: dict, seed: int = 0
+) -> dict[str, list[int]]:
+    """
+    Packets decoded with each symbol synchroniser, for every start offset (samples of silence before the packet).
+    Every synchroniser receives the same captures, through the same receiver front end.
+    """
+    transmitter_class, receiver_class = _protocols[protocol]
+    rng = np.random.default_rng(seed)
+    counts = {name: [0] * len(offsets) for name in synchronisers}
+
+    for index, offset in enumerate(offsets):
+        for _ in range(trials):
+            payload = rng.integers(0, 256, 20, dtype=np.uint8)
+            iq = transmitter_class(fs).modulate_from_payload(payload)
+            iq = np.concatenate((np.zeros(offset, dtype=complex), iq, np.zeros(50, dtype=complex)))
+            iq = iq + noise * (rng.standard_normal(len(iq)) + 1j * rng.standard_normal(len(iq)))
+
+            for name, synchroniser in synchronisers.items():
+                with mock.patch.object(receiver, "symbol_sync", synchroniser):
+                    packets = receiver_class(fs).demodulate_to_packet(iq)
+                counts[name][index] += any(
+                    np.array_equal(packet["payload"], payload) and packet["crc_check"] for packet in packets
+                )
+
+    return counts
+
+
+@click.command()
+@click.option("--protocol", type=click.Choice(list(_protocols)), default="ble", show_default=True)
+@click.option("--fs", type=float, default=4e6, show_default=True, help="Sampling rate (Hz).")
+@click.option("--offsets", type=int, default=4, show_default=True, help="Start offsets 0 .. offsets-1 (samples).")
+@click.option("--trials", type=int, default=20, show_default=True, help="Packets per start offset.")
+@click.option("--noise", type=float, default=0.03, show_default=True, help="Noise standard deviation per component.")
+def main(protocol, fs, offsets, trials, noise):
+    """
+    Compare the native symbol_sync() with the GNU Radio Symbol Sync block on packet round trips.
+
+    Decodes the same packets, at every start offset, with the native loop (initial timing estimate), the native loop
+    started as GNU Radio does (acquisition_symbols=0) and symbol_sync_gnuradio() if GNU Radio is installed.
+    Fails if the native loop decodes fewer packets than GNU Radio at any offset.
+    """
+    synchronisers = {
+        "native": symbol_sync,
+        "native, GNU Radio start": functools.partial(symbol_sync, acquisition_symbols=0),
+    }
+    if importlib.util.find_spec("gnuradio") is not None:
+        synchronisers["GNU Radio"] = symbol_sync_gnuradio
+    else:
+        click.echo("GNU Radio is not installed: comparing the native loops only.")
+
+    counts = decoded_packets(protocol, fs, range(offsets), trials, noise, synchronisers)
+
+    click.echo(f"Packets decoded out of {trials} per start offset ({protocol}, {fs / 1e6:g} Msps, noise {noise:g}):")
+    for name, decoded in counts.items():
+        click.echo(f"  {name:<24} {decoded}")
+
+    if "GNU Radio" in counts and any(n < g for n, g in zip(counts["native"], counts["GNU Radio"])):
+        raise click.ClickException("The native symbol_sync() decodes fewer packets than GNU Radio")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import numpy as np
+import scipy
+
+from channeliser import pfb_channelise, pfb_prototype_taps
+from interference_utils import (
+    find_interference_parameters,
+    find_interference_parameters_batch,
+    multiply_by_complex_exponential,
+    subtract_interference_batch,
+    subtract_interference_wrapper,
+)
+from packet_utils import _whitening_lfsr, ble_whitening, ble_whitening_keystream, compute_crc, compute_crc_batch
+from timing_recovery import clock_recovery, StreamingClockRecovery
+
+# Symbol sync parameters of the receivers (set_symbol_sync_parameters defaults)
+RECEIVER_LOOP = {"loop_BW": 4.5e-3, "damping": 1.0, "TED_gain": 1.0, "max_deviation": 0}
+
+
+# Noisy antipodal symbols with linear transitions, sampled with a clock offset of `ppm` parts per million.
+def offset_clock_symbols(num_symbols: int, sps: int, ppm: float, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    symbols = rng.choice([-1.0, 1.0], num_symbols)
+    t = np.arange(num_symbols * sps) * (1 + ppm * 1e-6) / sps  # Time of every sample, in symbols
+    index = np.minimum(t.astype(int), num_symbols - 1)
+    transition = np.minimum((t - np.floor(t)) / 0.25, 1.0)  # The first quarter of every symbol is the transition
+    previous = symbols[np.maximum(index - 1, 0)]
+    x = previous + (symbols[index] - previous) * transition
+    return x + 0.05 * rng.standard_normal(len(x))
+
+
+# Chunk by chunk clock recovery of x, flushed at the end.
+def streaming_clock_recovery(x: np.ndarray, sps: float, chunks: int = 37, **kwargs) -> np.ndarray:
+    recovery = StreamingClockRecovery(sps, **kwargs)
+    outputs = [recovery.process(chunk) for chunk in np.array_split(x, chunks)]
+    return np.concatenate(outputs + [recovery.process(np.array([]), flush=True)])
+
+
+def test_clock_recovery_keeps_every_symbol_with_a_clock_offset():
+    # The instantaneous period is not limited, so more symbols than len(x) / sps can come out of a slow clock
+    for ppm in (-200, 50, 200):
+        x = offset_clock_symbols(400_000, 4, ppm)
+        batch = clock_recovery(x, 4, ted_type="GARDNER", **RECEIVER_LOOP)
+        stream = streaming_clock_recovery(x, 4, ted_type="GARDNER", **RECEIVER_LOOP)
+        assert len(batch) == len(stream), (ppm, len(batch), len(stream))
+
+
+def test_streaming_clock_recovery_equals_batch_over_long_streams():
+    # Past 1e5 samples, a float position rounds the fraction differently once the stream drops consumed samples
+    for ted_type, ppm in (("GARDNER", 100), ("MOD_MUELLER_AND_MULLER", -100)):
+        x = offset_clock_symbols(300_000, 4, ppm)
+        batch = clock_recovery(x, 4, ted_type=ted_type, **RECEIVER_LOOP)
+        stream = streaming_clock_recovery(x, 4, ted_type=ted_type, **RECEIVER_LOOP)
+        assert np.array_equal(batch, stream), ted_type
+
+    noise = np.random.default_rng(1).standard_normal(2_000_000)
+    for sps, out_sps in ((4, 1), (4.3, 2)):
+        batch = clock_recovery(noise, sps, ted_type="GARDNER", out_sps=out_sps, **RECEIVER_LOOP)
+        stream = streaming_clock_recovery(noise, sps, ted_type="GARDNER", out_sps=out_sps, **RECEIVER_LOOP)
+        assert np.array_equal(batch, stream), (sps, out_sps)
+
+
+# Bit by bit reflected CRC, as computed before the lookup tables.
+def bit_serial_crc(data: np.ndarray, crc_init: int, crc_poly: int, crc_size: int) -> np.ndarray:
+    width = crc_size * 8
+    crc = int(f"{crc_init & ((1 << width) - 1):0{width}b}"[::-1], 2)
+    crc_poly = int(f"{crc_poly & ((1 << width) - 1):0{width}b}"[::-1], 2)
+    for byte in data:
+        crc ^= int(byte)
+        for _ in range(8):
+            crc = (crc >> 1) ^ crc_poly if crc & 0x01 else crc >> 1
+    return np.array([(crc >> (8 * i)) & 0xFF for i in range(crc_size)], dtype=np.uint8)
+
+
+def test_table_crc_equals_bit_serial_crc():
+    rng = np.random.default_rng(2)
+    for parameters in (
+        {"crc_init": 0x00FFFF, "crc_poly": 0x00065B, "crc_size": 3},
+        {"crc_init": 0x0000, "crc_poly": 0x011021, "crc_size": 2},
+    ):
+        for length in (0, 1, 7, 255):
+            packets = rng.integers(0, 256, (5, length), dtype=np.uint8)
+            expected = np.array([bit_serial_crc(packet, **parameters) for packet in packets])
+            assert np.array_equal([compute_crc(packet, **parameters) for packet in packets], expected), length
+            assert np.array_equal(compute_crc_batch(packets, **parameters), expected), length
+
+
+def test_cached_whitening_keystream_equals_lfsr():
+    data = np.random.default_rng(3).integers(0, 256, 300, dtype=np.uint8)
+    for lfsr in (0x01, 0x25, 0x7F):
+        keystream, states = _whitening_lfsr(lfsr, 0x11, len(data))
+        whitened, final_state = ble_whitening(data, lfsr=lfsr)
+        assert np.array_equal(ble_whitening_keystream(lfsr)[0], keystream[:127]), lfsr
+        assert np.array_equal(whitened, data ^ keystream) and final_state == states[-1], lfsr
+        assert np.array_equal(ble_whitening(np.stack([data, data]), lfsr=lfsr)[0], [whitened, whitened]), lfsr
+
+
+def test_pfb_channelise_equals_mix_filter_decimate():
+    rng = np.random.default_rng(4)
+    iq = rng.standard_normal(5_003) + 1j * rng.standard_normal(5_003)
+    for num_channels, oversampling in ((8, 2), (16, 4), (6, 1)):
+        taps = pfb_prototype_taps(num_channels)
+        decimation = num_channels // oversampling
+        channels = pfb_channelise(iq, num_channels, oversampling=oversampling)
+        for k in range(num_channels):
+            mixed = iq * np.exp(-2j * np.pi * k * np.arange(len(iq)) / num_channels)
+            expected = scipy.signal.lfilter(taps, 1, mixed)[::decimation]
+            assert np.allclose(channels[k], expected, atol=1e-9), (num_channels, oversampling, k)
+
+
+def test_sic_batch_estimates_equal_single_estimates():
+    rng = np.random.default_rng(5)
+    fs, trials = 4e6, 4
+    interference = np.exp(1j * np.cumsum(rng.choice([-0.4, 0.4], (trials, 400)), axis=-1))
+    shifts, frequencies = rng.integers(20, 80, trials), rng.uniform(-5_000, 5_000, trials)
+    rotated = multiply_by_complex_exponential(
+        interference, fs, freq=frequencies[:, np.newaxis], phase=1.0, amplitude=0.7
+    )
+    affected = np.zeros((trials, 600), dtype=complex)
+    for trial, shift in enumerate(shifts):
+        affected[trial, shift : shift + 400] = rotated[trial]
+    affected += 0.05 * (rng.standard_normal(affected.shape) + 1j * rng.standard_normal(affected.shape))
+
+    search_kwargs = {"fine_step": 10, "fine_window": 250}
+    for search in ("BRUTE_FORCE", "CROSS_AMBIGUITY", "INTERPOLATED"):
+        for fractional_delay in (False, True):
+            kwargs = {"search": search, "fractional_delay": fractional_delay, **search_kwargs}
+            batch = find_interference_parameters_batch(affected, interference, range(-6_000, 6_000, 500), fs, **kwargs)
+            for trial in range(trials):
+                single = find_interference_parameters(
+                    affected[trial], interference[trial], range(-6_000, 6_000, 500), fs, **kwargs
+                )
+                assert np.allclose([parameter[trial] for parameter in batch], single), (search, fractional_delay, trial)
+
+            subtracted = subtract_interference_batch(affected, interference, fs, range(-6_000, 6_000, 500), **kwargs)
+            for trial in range(trials):
+                expected = subtract_interference_wrapper(
+                    affected[trial], interference[trial], fs, range(-6_000, 6_000, 500), **kwargs
+                )
+                assert np.allclose(subtracted[trial], expected), (search, fractional_delay, trial)
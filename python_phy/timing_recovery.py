@@ -0,0 +1,368 @@
+import numpy as np
+
+try:  # Optional JIT compilation of the timing loop
+    from numba import njit
+except ImportError:  # Fall back to the (slower) pure Python loop
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda function: function
+
+
+# Timing error detectors, following the GNU Radio Symbol Sync block naming.
+# Values: (identifier used inside the compiled loop, inputs per symbol)
+TED_CODES: dict[str, tuple[int, int]] = {
+    "MUELLER_AND_MULLER": (0, 1),
+    "MOD_MUELLER_AND_MULLER": (1, 1),
+    "ZERO_CROSSING": (2, 2),
+    "GARDNER": (3, 2),
+    "EARLY_LATE": (4, 2),
+    "SIGNAL_TIMES_SLOPE_ML": (7, 1),
+    "SIGNUM_TIMES_SLOPE_ML": (8, 1),
+}
+
+# GNU Radio detectors without a native port (GNU Radio runs them on float input as complex samples with a zero
+# imaginary part): they are only available through demodulation.symbol_sync_gnuradio()
+UNSUPPORTED_TEDS: tuple[str, ...] = ("DANDREA_AND_MENGALI_GEN_MSK", "MENGALI_AND_DANDREA_GMSK")
+
+_INTERP_TAPS: int = 8  # Same length as GNU Radio IR_MMSE_8TAP
+_INTERP_FILTERS: int = 128  # Same number of filter arms as GNU Radio default
+# Fewest samples per symbol for the initial timing estimate: at 2, the symbol rate line of x² sits at fs/2, where its
+# phase is only ever 0 or pi (measured on IEEE 802.15.4 at 2 samples per chip, the estimate loses packets that the
+# GNU Radio start decodes)
+_ACQUISITION_MIN_SPS: float = 3.0
+_interpolator_banks: dict[tuple[int, int], tuple[np.ndarray, np.ndarray]] = {}
+
+
+# Build (and cache) the polyphase interpolator and its derivative filter banks.
+def interpolator_banks(ntaps: int = _INTERP_TAPS, nfilters: int = _INTERP_FILTERS) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Build (and cache) the polyphase interpolator and its derivative filter banks.
+    Row `k` interpolates between samples (ntaps/2 - 1) and (ntaps/2) at fractional position mu = k / nfilters.
+    """
+    key = (ntaps, nfilters)
+    if key not in _interpolator_banks:
+        half = ntaps // 2
+
+        def kernel(u: np.ndarray) -> np.ndarray:  # Raised cosine windowed sinc
+            return np.sinc(u) * 0.5 * (1 + np.cos(np.pi * u / half))
+
+        mu = np.arange(nfilters + 1)[:, np.newaxis] / nfilters
+        u = (half - 1) + mu - np.arange(ntaps)[np.newaxis, :]  # Distance from each tap to the interpolation point
+        taps = kernel(u)
+        taps /= np.sum(taps, axis=1, keepdims=True)  # Unitary DC gain on every arm
+
+        eps = 1e-4  # Central difference for the derivative arms
+        derivative_taps = (kernel(u + eps) - kernel(u - eps)) / (2 * eps)
+
+        _interpolator_banks[key] = (taps, derivative_taps)
+
+    return _interpolator_banks[key]
+
+
+# Proportional and integral gains of the clock tracking loop, as computed in GNU Radio.
+def clock_loop_gains(loop_BW: float, damping: float, TED_gain: float) -> tuple[float, float]:
+    """Proportional (alpha) and integral (beta) gains of the clock tracking loop, as computed in GNU Radio."""
+    omega_n_T = loop_BW
+    zeta_omega_n_T = damping * omega_n_T
+    k0 = 2.0 / TED_gain
+    k1 = np.exp(-zeta_omega_n_T)
+    sinh_zeta_omega_n_T = np.sinh(zeta_omega_n_T)
+
+    if damping > 1.0:  # Over-damped
+        cosx_omega_d_T = np.cosh(omega_n_T * np.sqrt(damping**2 - 1.0))
+    elif damping == 1.0:  # Critically damped
+        cosx_omega_d_T = 1.0
+    else:  # Under-damped
+        cosx_omega_d_T = np.cos(omega_n_T * np.sqrt(1.0 - damping**2))
+
+    alpha = k0 * k1 * sinh_zeta_omega_n_T
+    beta = k0 * (1.0 - k1 * (sinh_zeta_omega_n_T + cosx_omega_d_T))
+    return float(alpha), float(beta)
+
+
+@njit(cache=True)
+def _interpolate(x, taps, index, mu):
+    # Interpolate x at sample index + mu (0 <= mu < 1) with the closest filter arm
+    half = taps.shape[1] // 2
+    arm = int(mu * (taps.shape[0] - 1) + 0.5)
+    start = index - (half - 1)
+    accumulator = 0.0
+    for k in range(taps.shape[1]):
+        accumulator += taps[arm, k] * x[start + k]
+    return accumulator
+
+
+@njit(cache=True)
+def _slice(value):
+    # BPSK constellation slicer (same decision as GNU Radio's default constellation)
+    return 1.0 if value >= 0 else -1.0
+
+
+# Check a TED type and return its (loop identifier, inputs per symbol).
+def _ted_code(ted_type: str) -> tuple[int, int]:
+    if ted_type in UNSUPPORTED_TEDS:
+        raise ValueError(f"TED type '{ted_type}' is only available through demodulation.symbol_sync_gnuradio()")
+    if ted_type not in TED_CODES:
+        raise ValueError(f"Invalid TED type '{ted_type}'. Choose from {list(TED_CODES.keys())}")
+    return TED_CODES[ted_type]
+
+
+# Interpolations per symbol, per TED input and per output sample (the internal clocks of the GNU Radio block).
+def _interpolation_clocks(inputs_per_symbol: int, out_sps: int) -> tuple[int, int, int]:
+    interps_per_symbol = max(out_sps, inputs_per_symbol)
+    return interps_per_symbol, interps_per_symbol // inputs_per_symbol, interps_per_symbol // out_sps
+
+
+# Timing phase of the symbols in x (Oerder and Meyr): sampling offset in [0, sps) where the signal energy peaks.
+def initial_timing_phase(x: np.ndarray, sps: float) -> float:
+    """
+    Timing phase of the symbols in x (Oerder and Meyr): sampling offset in [0, sps) where the signal energy peaks.
+    Feed-forward estimate from the phase of the symbol rate component of x², used to place the first interpolation
+    of the clock recovery loop. Returns 0 for a signal without any energy at the symbol rate (e.g. all zeros).
+    Samples are clipped at twice the median magnitude first, so that a single spike (e.g. of a frequency
+    discriminator where the squelch opens or closes) cannot outweigh the symbols.
+    """
+    nonzero = np.abs(x[x != 0])
+    if len(nonzero) == 0:
+        return 0.0
+    limit = 2 * np.median(nonzero)
+    n = np.arange(len(x))
+    component = np.sum(np.clip(x, -limit, limit) ** 2 * np.exp(-2j * np.pi * n / sps))
+    return float((-np.angle(component) / (2 * np.pi) * sps) % sps)
+
+
+# Initial state of the clock recovery loop:
+# (next interpolation index, mu, average period, instantaneous period, interpolation clock, y0, y1, y2, d0, d1, d2)
+def _initial_loop_state(
+    sps: float, interps_per_symbol: int, timing_phase: float | None = None, ntaps: int = _INTERP_TAPS
+) -> np.ndarray:
+    """
+    Initial state of the clock recovery loop, as after the sync reset of the GNU Radio block: the first interpolation
+    is an on-time sample at the first full interpolation window (input[ntaps/2 - 1] plus the fractional part of sps),
+    and the timing error detector history is zero. With a timing_phase (initial_timing_phase()), the first
+    interpolation is instead the first sample at that phase within the first full interpolation window.
+    As in GNU Radio, the position of the next interpolation is an integer sample index plus a fraction mu in [0, 1).
+    """
+    first = ntaps // 2 - 1
+    if timing_phase is None:
+        position = first + (sps - np.floor(sps))
+    else:
+        position = timing_phase + sps * np.ceil((first - timing_phase) / sps)
+    index = np.floor(position)
+    return np.array([index, position - index, sps, sps, interps_per_symbol - 1, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0])
+
+
+@njit(cache=True)
+def _clock_recovery_loop(
+    x,
+    taps,
+    derivative_taps,
+    alpha,
+    beta,
+    min_period,
+    max_period,
+    ted_code,
+    interps_per_symbol,
+    interps_per_ted_input,
+    interps_per_output,
+    state,
+):
+    # Runs while x holds enough samples, then saves the loop state in place (sample indices are indices of x).
+    # One interpolation per iteration; the interpolation clock strobes the outputs, the TED inputs and the symbols.
+    half = taps.shape[1] // 2
+    # Expected number of outputs: the instantaneous period is not limited (as in GNU Radio), so the buffer may grow
+    output = np.empty(int(len(x) * interps_per_symbol / (interps_per_output * min_period)) + 2)
+    n_out = 0
+
+    # Next interpolation at sample index + mu: whole samples are kept apart, so that the fraction does not lose
+    # precision as the index grows, and is the same whatever samples the streaming loop has dropped
+    index, mu, avg_period, inst_period, clock = int(state[0]), state[1], state[2], state[3], int(state[4])
+
+    # Timing error detector history (index 0 is the latest TED input)
+    y0, y1, y2, d0, d1, d2 = state[5], state[6], state[7], state[8], state[9], state[10]
+
+    # Interpolating at `index + mu` needs x[index + half]
+    last_index = len(x) - half
+    while True:
+        next_clock = (clock + 1) % interps_per_symbol
+        symbol_clock = next_clock == 0
+        if index >= last_index:
+            break
+        look_ahead_mu = mu + interps_per_ted_input * inst_period / interps_per_symbol
+        look_ahead_index = index + int(np.floor(look_ahead_mu))
+        look_ahead_mu -= np.floor(look_ahead_mu)
+        if ted_code == 4 and symbol_clock and look_ahead_index >= last_index:
+            break  # The early-late detector needs the next TED input too
+        clock = next_clock
+
+        value = _interpolate(x, taps, index, mu)
+        if clock % interps_per_output == 0:
+            if n_out == len(output):
+                output = np.concatenate((output, np.empty(len(output) // 8 + 2)))
+            output[n_out] = value
+            n_out += 1
+
+        if clock % interps_per_ted_input == 0:
+            y2, y1, y0 = y1, y0, value
+            d2, d1, d0 = d1, d0, _slice(value)
+
+            if symbol_clock:
+                # Timing error, on the TED inputs of this symbol
+                if ted_code == 0:  # Mueller and Müller
+                    error = d1 * y0 - d0 * y1
+                elif ted_code == 1:  # Modified Mueller and Müller
+                    error = ((y0 - y2) * d1 - (d0 - d2) * y1) / 2
+                elif ted_code == 2:  # Zero crossing: y1 is the mid-symbol input, d2 the previous symbol
+                    error = y1 * (d2 - d0)
+                elif ted_code == 3:  # Gardner: y1 is the mid-symbol input, y2 the previous symbol
+                    error = y1 * (y2 - y0)
+                elif ted_code == 4:  # Early-late: y1 (early) and the next TED input (late) around the on-time y0
+                    error = d0 * (_interpolate(x, taps, look_ahead_index, look_ahead_mu) - y1)
+                elif ted_code == 7:  # Signal times slope maximum likelihood
+                    error = y0 * _interpolate(x, derivative_taps, index, mu)
+                else:  # Signum times slope maximum likelihood
+                    error = d0 * _interpolate(x, derivative_taps, index, mu)
+
+                # Clock tracking loop (proportional-integral), then average period limiting
+                avg_period = avg_period + beta * error
+                inst_period = avg_period + alpha * error
+                if inst_period <= 0:
+                    inst_period = avg_period
+                avg_period = min(max(avg_period, min_period), max_period)
+
+        mu += inst_period / interps_per_symbol
+        step = int(np.floor(mu))
+        index += step
+        mu -= step
+
+    state[0], state[1], state[2], state[3], state[4] = index, mu, avg_period, inst_period, clock
+    state[5], state[6], state[7], state[8], state[9], state[10] = y0, y1, y2, d0, d1, d2
+    return output[:n_out]
+
+
+# Initial timing phase over the first acquisition_symbols symbols of x, None without acquisition (GNU Radio start).
+def _acquisition_phase(x: np.ndarray, sps: float, acquisition_symbols: int) -> float | None:
+    if acquisition_symbols <= 0 or sps < _ACQUISITION_MIN_SPS:
+        return None
+    return initial_timing_phase(x[: int(np.ceil(acquisition_symbols * sps))], sps)
+
+
+# Symbol synchronisation with a polyphase interpolator and a PI clock tracking loop (GNU Radio Symbol Sync model)
+def clock_recovery(
+    input_samples: np.ndarray,
+    sps: float,
+    TED_gain: float = 1.0,
+    loop_BW: float = 0.045,
+    damping: float = 1.0,
+    max_deviation: float = 1.5,
+    out_sps: int = 1,
+    ted_type: str = "MOD_MUELLER_AND_MULLER",
+    acquisition_symbols: int = 256,  # Symbols of the initial timing estimate, 0 to start as GNU Radio does
+) -> np.ndarray:
+    """
+    Symbol synchronisation with a polyphase interpolator and a PI clock tracking loop.
+    Mirrors the GNU Radio Symbol Sync block (same TEDs, loop parameters and period limits) on NumPy arrays.
+
+    With narrow loops (e.g. the receivers' loop_BW of 4.5e-3 and max_deviation of 0), the loop moves the sampling
+    instant by less than 0.01 samples per symbol, so the sampling phase stays where the first interpolation falls,
+    which can be on the symbol transitions. The loop therefore starts at the timing phase estimated over the first
+    acquisition_symbols symbols (initial_timing_phase()), and tracks from there. Below 3 samples per symbol, where
+    that estimate is unreliable, the loop starts as GNU Radio does.
+    """
+    if out_sps < 1:
+        raise ValueError("out_sps must be a positive integer")
+
+    ted_code, inputs_per_symbol = _ted_code(ted_type)
+    interps_per_symbol, interps_per_ted_input, interps_per_output = _interpolation_clocks(inputs_per_symbol, out_sps)
+    alpha, beta = clock_loop_gains(loop_BW, damping, TED_gain)
+    taps, derivative_taps = interpolator_banks()
+
+    x = np.ascontiguousarray(input_samples, dtype=np.float64)
+    if len(x) < _INTERP_TAPS:
+        return np.array([], dtype=np.float64)
+
+    return _clock_recovery_loop(
+        x,
+        taps,
+        derivative_taps,
+        alpha,
+        beta,
+        float(max(sps - max_deviation, 1.0)),
+        float(sps + max_deviation),
+        ted_code,
+        interps_per_symbol,
+        interps_per_ted_input,
+        interps_per_output,
+        _initial_loop_state(float(sps), interps_per_symbol, _acquisition_phase(x, float(sps), acquisition_symbols)),
+    )
+
+
+# Chunk by chunk clock_recovery(): same loop, with its state and the samples still to interpolate kept between calls.
+class StreamingClockRecovery:
+    def __init__(
+        self,
+        sps: float,
+        TED_gain: float = 1.0,
+        loop_BW: float = 0.045,
+        damping: float = 1.0,
+        max_deviation: float = 1.5,
+        out_sps: int = 1,
+        ted_type: str = "MOD_MUELLER_AND_MULLER",
+        acquisition_symbols: int = 256,
+    ):
+        """
+        Chunk by chunk clock_recovery(): same loop, with its state and the samples still to interpolate kept
+        between calls. Concatenating the outputs of process() gives the clock_recovery() output of the whole stream.
+        The first outputs wait for the acquisition_symbols symbols of the initial timing estimate (or flush=True).
+        """
+        if out_sps < 1:
+            raise ValueError("out_sps must be a positive integer")
+
+        self._ted_code, inputs_per_symbol = _ted_code(ted_type)
+        self._interpolation_clocks = _interpolation_clocks(inputs_per_symbol, out_sps)
+        self._alpha, self._beta = clock_loop_gains(loop_BW, damping, TED_gain)
+        self._taps, self._derivative_taps = interpolator_banks()
+        self._min_period = float(max(sps - max_deviation, 1.0))
+        self._max_period = float(sps + max_deviation)
+        self._sps = float(sps)
+        self._acquisition_symbols = acquisition_symbols
+
+        self._buffer = np.array([], dtype=np.float64)  # Input samples not yet consumed by the interpolator
+        self._state = None  # Loop state, once the initial timing is acquired
+
+    # Symbol synchronisation of the next chunk of input samples (flush=True at the end of the stream).
+    def process(self, input_samples: np.ndarray, flush: bool = False) -> np.ndarray:
+        """
+        Symbol synchronisation of the next chunk of input samples (flush=True at the end of the stream, to start the
+        loop on a stream shorter than the acquisition window).
+        """
+        self._buffer = np.concatenate((self._buffer, np.asarray(input_samples, dtype=np.float64)))
+        if len(self._buffer) < _INTERP_TAPS:
+            return np.array([], dtype=np.float64)
+
+        if self._state is None:
+            if len(self._buffer) < self._acquisition_symbols * self._sps and not flush:
+                return np.array([], dtype=np.float64)
+            timing_phase = _acquisition_phase(self._buffer, self._sps, self._acquisition_symbols)
+            self._state = _initial_loop_state(self._sps, self._interpolation_clocks[0], timing_phase)
+
+        output = _clock_recovery_loop(
+            self._buffer,
+            self._taps,
+            self._derivative_taps,
+            self._alpha,
+            self._beta,
+            self._min_period,
+            self._max_period,
+            self._ted_code,
+            *self._interpolation_clocks,
+            self._state,
+        )
+
+        # Drop the samples before the interpolation window of the next interpolation
+        keep_from = max(0, int(self._state[0]) - _INTERP_TAPS // 2)
+        self._buffer = self._buffer[keep_from:]
+        self._state[0] -= keep_from
+        return output
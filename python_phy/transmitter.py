@@ -2,7 +2,8 @@ import numpy as np
 import scipy
 from abc import ABC, abstractmethod
 
-from modulation import modulate_frequency, pulse_shape_bits_fir, gaussian_fir_taps, oqpsk_modulate, half_sine_fir_taps
+from filters import integer_sps_resampling, rational_resampler_taps
+from modulation import modulate_gfsk, oqpsk_modulate_half_sine
 from packet_utils import (
     create_ble_phy_packet,
     unpack_uint8_to_bits,
@@ -28,6 +29,28 @@ class Transmitter(ABC):
     def modulate_from_payload(self, *args, **kwargs) -> np.ndarray:
         pass
 
+    # Generates IQ data for a batch of payloads of the same length. Returns shape (packets, samples)
+    def modulate_from_payload_batch(self, payloads: np.ndarray, **kwargs) -> np.ndarray:
+        """Generates IQ data for a batch of payloads of the same length. Returns shape (packets, samples)."""
+        return np.stack([self.modulate_from_payload(payload, **kwargs) for payload in payloads])
+
+    # Samples per symbol and resampling factors for sample_rate (see filters.integer_sps_resampling())
+    def _set_sps(self, symbol_rate: float) -> None:
+        self.sps, up, down = integer_sps_resampling(self.sample_rate, symbol_rate)
+        self._modulation_rate: float = self.sps * symbol_rate  # Sampling rate of the modulator
+        self._resampling: tuple[int, int] = (down, up)  # From the modulator rate to sample_rate
+
+    # Resample the modulated signal to sample_rate, when it is not an integer multiple of the symbol rate
+    def _resample(self, iq_signal: np.ndarray) -> np.ndarray:
+        """
+        Resample the modulated signal to sample_rate, when it is not an integer multiple of the symbol rate.
+        Zero-phase polyphase resampling (scipy.signal.resample_poly) with the cached filter bank, row by row if 2D.
+        """
+        up, down = self._resampling
+        if up == down:
+            return iq_signal
+        return scipy.signal.resample_poly(iq_signal, up, down, axis=-1, window=rational_resampler_taps(up, down))
+
 
 class TransmitterBLE(Transmitter):
     # Class variables
@@ -41,28 +64,19 @@ class TransmitterBLE(Transmitter):
         self.transmission_rate: float = transmission_rate  # BLE 1Mb/s or 2Mb/s
         self._fsk_deviation: float = self.transmission_rate * 0.25  # Hz
 
-        # For now, assume sampling rate is an integer multiple of transmission rate.
-        # For generalisation, it's necessary to implement a rational resampler to generate the final IQ signal.
-        self.sps: int = int(self.sample_rate / self.transmission_rate)  # Samples per symbol
+        # Samples per symbol of the modulator, which is resampled to sample_rate if it is not an integer multiple
+        self._set_sps(self.transmission_rate)
 
     # Receives a binary array and returns IQ GFSK modulated compplex signal.
     def modulate(self, bits: np.ndarray, zero_padding: int = 0) -> np.ndarray:
-        """Receives a binary array and returns IQ GFSK modulated complex signal."""
-
-        # Generate Gaussian taps and convolve with rectangular window
-        gauss_taps = gaussian_fir_taps(sps=self.sps, ntaps=self.sps, bt=self._bt)
-        gauss_taps = scipy.signal.convolve(gauss_taps, np.ones(self.sps))
+        """Receives a binary array and returns IQ GFSK modulated complex signal. A 2D input is modulated row by row."""
 
-        # Apply Gaussian pulse shaping with BT = 0.5 (BLE PHY specification)
-        pulse_shaped_symbols = pulse_shape_bits_fir(bits, fir_taps=gauss_taps, sps=self.sps)
-
-        # Frequency modulation
-        iq_signal = modulate_frequency(pulse_shaped_symbols, self._fsk_deviation, self.sample_rate)
+        # Gaussian pulse shaping with BT = 0.5 (BLE PHY specification) and frequency modulation, by table gather
+        iq_signal = modulate_gfsk(bits, self.sps, self._bt, self._fsk_deviation, self._modulation_rate)
+        iq_signal = self._resample(iq_signal)  # To sample_rate, if needed
 
         # Append zeros
-        iq_signal = np.concatenate(
-            (np.zeros(zero_padding, dtype=iq_signal.dtype), iq_signal, np.zeros(zero_padding, dtype=iq_signal.dtype))
-        )
+        iq_signal = np.pad(iq_signal, [(0, 0)] * (iq_signal.ndim - 1) + [(zero_padding, zero_padding)])
 
         return iq_signal
 
@@ -86,6 +100,14 @@ class TransmitterBLE(Transmitter):
         bits = self.process_phy_payload(payload, base_address)
         return self.modulate(bits, zero_padding)
 
+    # Generates IQ data for a batch of payloads of the same length. Returns shape (packets, samples)
+    def modulate_from_payload_batch(
+        self, payloads: np.ndarray, base_address: int = 0x12345678, zero_padding: int = 0
+    ) -> np.ndarray:
+        """Generates IQ data for a batch of payloads of the same length. Returns shape (packets, samples)."""
+        bits = unpack_uint8_to_bits(create_ble_phy_packet(payloads, base_address))  # All CRCs in one pass
+        return self.modulate(bits, zero_padding)  # Pulse shaping and frequency modulation of all packets at once
+
     @property
     def transmission_rate(self) -> float:
         return self._transmission_rate
@@ -96,7 +118,7 @@ class TransmitterBLE(Transmitter):
             raise ValueError(f"BLE transmission rate must be one of {self._valid_rates!r}")
         self._transmission_rate = rate
         self._fsk_deviation = self.transmission_rate * 0.25
-        self.sps: int = int(self.sample_rate / self.transmission_rate)  # Samples per symbol
+        self._set_sps(self.transmission_rate)  # Samples per symbol
 
 
 class Transmitter802154(Transmitter):
@@ -130,22 +152,19 @@ class Transmitter802154(Transmitter):
     def __init__(self, sample_rate: int | float):
         # Instance variables
         self.sample_rate = sample_rate
-        # For now, assume sampling rate is an integer multiple of transmission rate.
-        # For generalisation, it's necessary to implement a rational resampler to generate the final IQ signal.
-        self.sps: int = int(2 * self.sample_rate / self._transmission_rate)  # Samples per OQPSK symbol
+        # Samples per O-QPSK symbol (two chips) of the modulator, resampled to sample_rate if not an integer multiple
+        self._set_sps(self._transmission_rate / 2)
 
     # Receives a chip uint32 array and returns IQ O-QPSK modulated complex signal.
     def modulate(self, chips: np.ndarray, zero_padding: int = 0) -> np.ndarray:
-        """Receives a chip uint32 array and returns IQ O-QPSK modulated complex signal."""
+        """Receives a chip uint32 array and returns IQ O-QPSK modulated complex signal (row by row if 2D)."""
 
         I_chips, Q_chips = split_iq_chips(chips)  # Maps a the even and odd chips to I chips and Q chips respectively.
-        half_sine_pulse = half_sine_fir_taps(self.sps)  # Generate the half-sine pulse
-        iq_signal = oqpsk_modulate(I_chips, Q_chips, half_sine_pulse, self.sps)  # O-QPSK modulation
+        iq_signal = oqpsk_modulate_half_sine(I_chips, Q_chips, self.sps)  # O-QPSK modulation with half-sine pulses
+        iq_signal = self._resample(iq_signal)  # To sample_rate, if needed
 
         # Append zeros
-        iq_signal = np.concatenate(
-            (np.zeros(zero_padding, dtype=iq_signal.dtype), iq_signal, np.zeros(zero_padding, dtype=iq_signal.dtype))
-        )
+        iq_signal = np.pad(iq_signal, [(0, 0)] * (iq_signal.ndim - 1) + [(zero_padding, zero_padding)])
 
         return iq_signal
 
@@ -166,3 +185,12 @@ class Transmitter802154(Transmitter):
         """Generates IQ data from physical payload"""
         chips = self.process_phy_payload(payload, append_crc)
         return self.modulate(chips, zero_padding)
+
+    # Generates IQ data for a batch of payloads of the same length. Returns shape (packets, samples)
+    def modulate_from_payload_batch(
+        self, payloads: np.ndarray, append_crc: bool = True, zero_padding: int = 0
+    ) -> np.ndarray:
+        """Generates IQ data for a batch of payloads of the same length. Returns shape (packets, samples)."""
+        byte_packets = create_802154_phy_packet(payloads, append_crc=append_crc)  # All CRCs in one pass
+        chips = map_nibbles_to_chips(byte_packets, self.chip_mapping, return_string=False)
+        return self.modulate(chips, zero_padding)  # Chip splitting and O-QPSK modulation of all packets at once